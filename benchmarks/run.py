@@ -0,0 +1,327 @@
+"""
+Solalendar Benchmark Suite
+
+    python benchmarks/run.py                                  # 全ケース、既定サイズ
+    python benchmarks/run.py --sizes 100 10000 --cases codec_lpn tier1_analyze
+    python benchmarks/run.py --compare benchmarks/baselines/abc1234.json
+
+固定シードの合成データ (出生データ・B5V回答) を複数サイズで用意し、各エンジンの
+ホットパスについてスループット、p50/p99 レイテンシ、ピークメモリを計測する。
+結果は JSON (既定: benchmarks/baselines/<git commit>.json) に保存され、
+--compare で別コミットのベースラインと比較できる (スループット低下が許容幅を超えたら exit 1)。
+
+Tier 3 の end-to-end はローカルのスタブサーバー (llm.stub_server) に対して計測する。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "..", "src"))
+
+import numpy as np
+
+DEFAULT_SIZES = (100, 1_000, 10_000)
+SEED = 20240204
+# 1レコードずつ LLM スタブを呼ぶケースは件数を抑える
+E2E_MAX_CALLS = 200
+
+
+# ---------------------------------------------------------------------------
+# 合成データ (固定シード)
+# ---------------------------------------------------------------------------
+def synthetic_births(n, seed=SEED):
+    rng = np.random.default_rng(seed)
+    return {
+        "year": rng.integers(1940, 2011, n),
+        "month": rng.integers(1, 13, n),
+        "day": rng.integers(1, 29, n),
+        "hour": rng.integers(0, 24, n),
+        "minute": rng.integers(0, 60, n),
+        "lat": rng.uniform(24.0, 46.0, n),
+        "lon": rng.uniform(123.0, 146.0, n),
+    }
+
+
+def synthetic_answers(n, question_ids, seed=SEED):
+    rng = np.random.default_rng(seed + 1)
+    values = rng.integers(1, 6, (n, len(question_ids)))
+    return [dict(zip(question_ids, map(int, row))) for row in values]
+
+
+def _rows(births):
+    """列指向 → (year, month, day, hour, minute, lat, lon) のタプル列"""
+    return list(zip(*(births[k].tolist() for k in ("year", "month", "day", "hour", "minute", "lat", "lon"))))
+
+
+def _tier2_stub():
+    return {"anxiety": 30, "energy": 70, "log": "新しい提案書を作ったが少し疲れた。", "timestamp": "2024-02-04 12:00:00"}
+
+
+# ---------------------------------------------------------------------------
+# ケース定義: size → (関数, 引数タプルのリスト, 1呼び出しあたりのレコード数)
+# ---------------------------------------------------------------------------
+def case_tier1_analyze(size):
+    from tier1_engine import SolalendarTier1
+
+    def run(y, m, d, h, mi, lat, lon):
+        return SolalendarTier1("bench", y, m, d, h, mi, lat, lon).analyze()
+
+    return run, _rows(synthetic_births(size)), 1
+
+
+def case_tier1_analyze_compact(size):
+    from tier1_engine import SolalendarTier1
+
+    def run(y, m, d, h, mi, lat, lon):
+        return SolalendarTier1("bench", y, m, d, h, mi, lat, lon).analyze_compact()
+
+    return run, _rows(synthetic_births(size)), 1
+
+
+def case_tier1_analyze_many(size):
+    from tier1_engine import SolalendarTier1
+
+    return SolalendarTier1.analyze_many, [(synthetic_births(size),)], size
+
+
+def case_tier1_forecast_returns(size):
+    from datetime import date
+
+    from tier1_engine import SolalendarTier1
+
+    # 1人分の10年の日次 State 軸 (木星・土星のリターン判定はイベント一覧の二分探索)
+    def run(y, m, d, h, mi, lat, lon):
+        return list(SolalendarTier1("bench", y, m, d, h, mi, lat, lon).forecast(date(2025, 1, 1), date(2035, 1, 1)))
+
+    return run, _rows(synthetic_births(size)), 1
+
+
+def case_gazetteer_search(size):
+    from tier1.gazetteer import Gazetteer
+
+    places = Gazetteer.default()
+    names = [p.name for p in places.places]
+    # オートコンプリートの入力途中 (先頭2-4文字)
+    prefixes = [(names[i % len(names)][:2 + i % 3],) for i in range(size)]
+    return places.search, prefixes, 1
+
+
+def case_houses_batch(size):
+    from tier1.houses import HouseCalculator
+    from tier1.sexagenary import julian_day_number
+
+    b = synthetic_births(size)
+    jd = julian_day_number(b["year"], b["month"], b["day"]) - 0.5 + (b["hour"] + b["minute"] / 60.0) / 24.0
+    # 出生地は50都市に集約 (実データに近い分布)。出生時刻は行ごとに異なるので
+    # ハウスのメモはヒットせず、swe.houses を行数ぶん呼ぶ素のバッチ性能を測る
+    lat, lon = b["lat"][:50].round(3), b["lon"][:50].round(3)
+    city = np.arange(size) % 50
+
+    def run(jd, lat, lon):
+        return HouseCalculator("placidus").compute(jd, lat, lon)
+
+    return run, [(jd, lat[city], lon[city])], size
+
+
+def case_oriental_solar_term(size):
+    from tier1.oriental_engine import OrientalEngine
+
+    return OrientalEngine.get_solar_term, [r[:3] for r in _rows(synthetic_births(size))], 1
+
+
+def case_oriental_sexagenary(size):
+    from tier1.oriental_engine import OrientalEngine
+
+    return OrientalEngine.get_sexagenary_cycle, [r[:3] for r in _rows(synthetic_births(size))], 1
+
+
+def case_codec_lpn(size):
+    from tier1.codec_engine import Tier1Codec
+
+    return Tier1Codec.calculate_lpn, [r[:3] for r in _rows(synthetic_births(size))], 1
+
+
+def case_codec_lpn_many(size):
+    from tier1.codec_engine import Tier1Codec
+
+    b = synthetic_births(size)
+    return Tier1Codec.calculate_lpn_many, [(b["year"], b["month"], b["day"])], size
+
+
+def case_b5v_bigfive(size):
+    from tier2_b5v import SolalendarB5V
+
+    engine = SolalendarB5V()
+    ids = [q["id"] for qs in engine.bigfive_questions.values() for q in qs]
+    return engine.calculate_bigfive, [(a,) for a in synthetic_answers(size, ids)], 1
+
+
+def case_b5v_score_matrix(size):
+    from b5v.scoring import ScoringKey
+
+    key = ScoringKey.bigfive()
+    rng = np.random.default_rng(SEED + 1)
+    responses = rng.integers(1, 6, (size, len(key.item_ids))).astype(np.int8)
+    return key.score, [(responses,)], size
+
+
+def _tier1_results(n):
+    from tier1_engine import SolalendarTier1
+
+    return [SolalendarTier1("bench", *row).analyze() for row in _rows(synthetic_births(n))]
+
+
+def case_tier3_prompt(size):
+    from tier3_engine import SolalendarTier3
+
+    engine = SolalendarTier3("sk-bench")
+    tier2 = _tier2_stub()
+    return engine._build_prompts, [(t1, tier2) for t1 in _tier1_results(size)], 1
+
+
+def case_tier3_e2e_stub(size):
+    from llm import client
+    from llm.stub_server import serve_in_background
+    from tier3_engine import SolalendarTier3
+
+    _, base_url = serve_in_background(port=0)
+    client.configure(base_url=base_url)
+    engine = SolalendarTier3("sk-bench")
+    tier2 = _tier2_stub()
+    return engine.integrate, [(t1, tier2) for t1 in _tier1_results(min(size, E2E_MAX_CALLS))], 1
+
+
+CASES = {
+    "tier1_analyze": case_tier1_analyze,
+    "tier1_analyze_compact": case_tier1_analyze_compact,
+    "tier1_analyze_many": case_tier1_analyze_many,
+    "tier1_forecast_returns": case_tier1_forecast_returns,
+    "gazetteer_search": case_gazetteer_search,
+    "houses_batch": case_houses_batch,
+    "oriental_solar_term": case_oriental_solar_term,
+    "oriental_sexagenary": case_oriental_sexagenary,
+    "codec_lpn": case_codec_lpn,
+    "codec_lpn_many": case_codec_lpn_many,
+    "b5v_bigfive": case_b5v_bigfive,
+    "b5v_score_matrix": case_b5v_score_matrix,
+    "tier3_prompt": case_tier3_prompt,
+    "tier3_e2e_stub": case_tier3_e2e_stub,
+}
+
+
+# ---------------------------------------------------------------------------
+# 計測
+# ---------------------------------------------------------------------------
+def measure(fn, calls, records_per_call):
+    # ウォームアップ (遅延 import・暦表の読み込みなどを除外する)
+    fn(*calls[0])
+
+    gc.collect()
+    gc.disable()
+    try:
+        latencies = []
+        started = time.perf_counter()
+        for args in calls:
+            t0 = time.perf_counter()
+            fn(*args)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+    finally:
+        gc.enable()
+
+    # ピークメモリは tracemalloc を有効にした別パスで測る (計時に影響させない)
+    tracemalloc.start()
+    for args in calls[:1000]:
+        fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    records = len(calls) * records_per_call
+    return {
+        "records": records,
+        "calls": len(calls),
+        "throughput_per_s": records / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "peak_mem_kb": peak / 1024,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(case_names, sizes):
+    results = {}
+    for name in case_names:
+        for size in sizes:
+            fn, calls, records_per_call = CASES[name](size)
+            stats = measure(fn, calls, records_per_call)
+            results[f"{name}@{size}"] = stats
+            print(f"{name:<22} n={size:<7} {stats['throughput_per_s']:>14,.0f} rec/s  "
+                  f"p50={stats['p50_ms']:.4f}ms  p99={stats['p99_ms']:.4f}ms  peak={stats['peak_mem_kb']:.0f}KB",
+                  file=sys.stderr)
+    return {
+        "metadata": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """スループットが baseline の (1 - tolerance) 倍を下回ったケースを返す"""
+    regressions = []
+    for key, stats in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = stats["throughput_per_s"] / base["throughput_per_s"]
+        flag = "REGRESSION" if ratio < 1 - tolerance else ""
+        print(f"{key:<30} {ratio:>6.2f}x  {flag}", file=sys.stderr)
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solalendar benchmark suite")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/baselines/<commit>.json)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop (fraction)")
+    args = parser.parse_args(argv)
+
+    report = run(args.cases, args.sizes)
+    output = args.output or os.path.join(ROOT, "baselines", f"{report['metadata']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
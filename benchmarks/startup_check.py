@@ -0,0 +1,69 @@
+"""
+Startup-time regression check (headless entry points)
+
+    python benchmarks/startup_check.py [--budget-ms 50] [--runs 15]
+
+各エントリーポイントを新しいインタプリタで import し、素のインタプリタ起動との差
+(中央値) を起動オーバーヘッドとして測る。予算を超えた場合、または import しただけで
+重いエンジン依存 (numpy / swisseph / openai / streamlit) を読み込んだ場合は exit 1。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+ENTRY_POINTS = ("service", "cli")
+# エントリーポイントの import 時点で読み込まれてはいけないモジュール
+LAZY_MODULES = ("streamlit", "openai", "swisseph", "numpy", "tier1_engine", "tier3_engine")
+
+
+def _run(code):
+    env = dict(os.environ, PYTHONPATH=SRC, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - started, out
+
+
+def median_time(code, runs):
+    _run(code)  # 1回目はファイルキャッシュを温めるだけ
+    return statistics.median(_run(code)[0] for _ in range(runs))
+
+
+def eagerly_imported(module):
+    _, out = _run(f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))")
+    loaded = set(json.loads(out))
+    return sorted(m for m in LAZY_MODULES if m in loaded)
+
+
+def check(budget_ms=50.0, runs=15):
+    baseline = median_time("pass", runs)
+    report = {"baseline_ms": baseline * 1000, "entry_points": {}}
+    ok = True
+    for module in ENTRY_POINTS:
+        overhead_ms = (median_time(f"import {module}", runs) - baseline) * 1000
+        eager = eagerly_imported(module)
+        passed = overhead_ms <= budget_ms and not eager
+        ok &= passed
+        report["entry_points"][module] = {"overhead_ms": round(overhead_ms, 2), "eager_imports": eager, "ok": passed}
+    report["ok"] = ok
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup-time regression check")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="max import overhead over a bare interpreter")
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    report = check(args.budget_ms, args.runs)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import streamlit as st
 import sys
 import os
-from datetime import datetime
+from datetime import date, datetime
 
 # パス設定 (モジュールが見つからないエラー防止)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from tier1_engine import SolalendarTier1
+from tier1.gazetteer import Gazetteer
+from tier1_engine import IncrementalTier1
 from tier3_engine import SolalendarTier3
+from llm.cache import MemoryCache
 
 # --- Page Config ---
 st.set_page_config(
@@ -17,6 +19,50 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- Shared Resources ---
+@st.cache_resource
+def get_llm_cache():
+    """LLM応答キャッシュ (全セッション共有。再クリック・再実行ではAPIを呼ばない)"""
+    return MemoryCache(max_entries=512, ttl=24 * 60 * 60)
+
+@st.cache_resource(max_entries=64, ttl=24 * 60 * 60)
+def get_tier3_engine(api_key):
+    """Tier 3 エンジン (APIキーごとにプロセスで1つ。HTTP接続プールは llm.client 側で共有)"""
+    return SolalendarTier3(api_key, cache=get_llm_cache())
+
+@st.cache_resource
+def get_gazetteer():
+    """出生地の辞書 (オフライン。名前の前方一致・UTC オフセットの解決)"""
+    return Gazetteer.default()
+
+@st.cache_data(max_entries=1024, ttl=24 * 60 * 60)
+def run_tier1(name, year, month, day, hour, minute, lat, lon, tz, today, _graph):
+    """
+    Tier 1 解析結果のキャッシュ (全セッション共有、件数と期限で上限あり)。
+    State 軸 (年齢・パーソナルデイ・日干支など) は日付で変わるので today もキーに含める。
+    キャッシュに無い場合はセッションの IncrementalTier1 (_graph はキーに含まれない) で
+    変わったレイヤーだけを再計算する。
+    セッションにはコンパクトな Tier1Result を保持し、表示・Tier 3 の直前で to_dict() する。
+    """
+    return _graph.analyze_compact(name, year, month, day, hour, minute, lat, lon, tz=tz)
+
+def render_wisdom_card(msg):
+    """Wisdom カードの HTML (ストリーミング中は届いたフィールドだけを表示)"""
+    advice = ""
+    if 'actionable_advice' in msg:
+        advice = f"""
+        <hr style='border-color:#9C27B0; margin:20px 0;'>
+        <div style='background-color:#1E112A; padding:15px; border-radius:10px; border-left:5px solid #00E5FF;'>
+            <p style='font-weight:bold; color:#00E5FF; margin:0;'>💡 ACTIONABLE ADVICE:</p>
+            <p style='margin-top:5px; color:#DDD;'>{msg['actionable_advice']}</p>
+        </div>"""
+    return f"""
+    <div style='background-color:#2D1E3E; padding:25px; border-radius:15px; border: 1px solid #9C27B0; margin-top:20px;'>
+        <h2 style='color:#E0B0FF; text-align:center; margin-bottom:20px;'>{msg.get('headline', '')}</h2>
+        <p style='line-height:1.8; font-size:1.05em;'>{msg.get('narrative', '')}</p>{advice}
+    </div>
+    """
+
 # --- CSS Injection ---
 st.markdown("""
 <style>
@@ -74,6 +120,20 @@ with st.sidebar:
     with c4: hour = st.number_input("Hour", 0, 23, 7)
     with c5: minute = st.number_input("Minute", 0, 59, 1)
 
+    # 出生地: 前方一致の候補から選ぶ (緯度経度とタイムゾーンが決まる)
+    place_query = st.text_input("Birthplace", value="東京", help="都市名 (日本語・ひらがな・英語) の先頭")
+    candidates = get_gazetteer().search(place_query, limit=10) if place_query else []
+    if candidates:
+        place = st.selectbox("Place", candidates, format_func=lambda p: f"{p.label}, {p.country}")
+    else:
+        place = get_gazetteer().lookup("Tokyo")
+        st.caption("候補がありません。東京で計算します。")
+    lat, lon, tz = place.lat, place.lon, place.tz
+    try:
+        st.caption(f"{lat:.2f}, {lon:.2f} · {tz} (UTC{place.utc_offset(year, month, day, hour, minute):+g})")
+    except ValueError:  # 存在しない日付 (2月30日など)
+        st.caption(f"{lat:.2f}, {lon:.2f} · {tz}")
+
     tier1_btn = st.button("Decode Tier 1 (PSC) 🚀")
 
 # --- Main Area ---
@@ -85,11 +145,13 @@ tab1, tab2, tab3 = st.tabs(["🧬 Tier 1: Nature", "🔭 Tier 2: Observation", "
 # --- TAB 1: Tier 1 (Nature) ---
 with tab1:
     if tier1_btn:
-        engine = SolalendarTier1(name, year, month, day, hour, minute)
-        st.session_state['psc_data'] = engine.analyze()
+        if 'tier1_graph' not in st.session_state:
+            st.session_state['tier1_graph'] = IncrementalTier1()
+        st.session_state['psc_data'] = run_tier1(name, year, month, day, hour, minute, lat, lon, tz,
+                                                 date.today().isoformat(), st.session_state['tier1_graph'])
         
     if 'psc_data' in st.session_state:
-        d = st.session_state['psc_data']
+        d = st.session_state['psc_data'].to_dict()
         
         # Evidence Dictionary
         evidence = {
@@ -170,6 +232,8 @@ with tab1:
 
             if l2['saturn_return']:
                 st.warning("🪐 SATURN RETURN: 約29.5年周期の土星回帰。人生の再定義期間です。")
+            if l2.get('jupiter_return'):
+                st.info("♃ JUPITER RETURN: 約12年周期の木星回帰。機能拡張・新しい機会の期間です。")
 
             # L3: Environment
             solar_term = l3.get('solar_term', {'name': 'Unknown'})
@@ -266,31 +330,29 @@ with tab3:
             if not api_key:
                 st.error("Please enter OpenAI API Key in the sidebar.")
             else:
+                t3 = get_tier3_engine(api_key)
+                
+                # リアルデータを渡す
+                tier1_data = st.session_state['psc_data'].to_dict()
+                tier2_data = st.session_state['tier2_data']
+                
+                st.markdown("---")
+                st.subheader("📊 System Diagnostics")
+                diag_slot = st.empty()
+                wisdom_slot = st.empty()
+                
+                # ストリーミング: フィールドが確定した順に表示を更新する
+                gap, msg = {}, {}
                 with st.spinner("Analyzing Gap between Fate (Tier 1) and Reality (Tier 2)..."):
-                    t3 = SolalendarTier3(api_key)
-                    
-                    # リアルデータを渡す
-                    tier1_data = st.session_state['psc_data']
-                    tier2_data = st.session_state['tier2_data']
-                    
-                    result = t3.integrate(tier1_data, tier2_data)
-                    
-                    # Display Result
-                    gap = result.get('gap_analysis', {})
-                    msg = result.get('wisdom_message', {})
-                    
-                    st.markdown("---")
-                    st.subheader("📊 System Diagnostics")
-                    st.info(f"Analysis: Tier 1 Element vs Tier 2 State = {gap.get('relationship_type')} (Stress: {gap.get('stress_level')})")
-                    
-                    st.markdown(f"""
-                    <div style='background-color:#2D1E3E; padding:25px; border-radius:15px; border: 1px solid #9C27B0; margin-top:20px;'>
-                        <h2 style='color:#E0B0FF; text-align:center; margin-bottom:20px;'>{msg.get('headline')}</h2>
-                        <p style='line-height:1.8; font-size:1.05em;'>{msg.get('narrative')}</p>
-                        <hr style='border-color:#9C27B0; margin:20px 0;'>
-                        <div style='background-color:#1E112A; padding:15px; border-radius:10px; border-left:5px solid #00E5FF;'>
-                            <p style='font-weight:bold; color:#00E5FF; margin:0;'>💡 ACTIONABLE ADVICE:</p>
-                            <p style='margin-top:5px; color:#DDD;'>{msg.get('actionable_advice')}</p>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
\ No newline at end of file
+                    for path, value in t3.integrate_stream(tier1_data, tier2_data):
+                        if not path:
+                            if 'error' in value:
+                                st.error(value['error'])
+                            continue
+                        if path[0] == 'gap_analysis' and len(path) == 2:
+                            gap[path[1]] = value
+                            if 'relationship_type' in gap:
+                                diag_slot.info(f"Analysis: Tier 1 Element vs Tier 2 State = {gap.get('relationship_type')} (Stress: {gap.get('stress_level', '...')})")
+                        elif path[0] == 'wisdom_message' and len(path) == 2:
+                            msg[path[1]] = value
+                            wisdom_slot.markdown(render_wisdom_card(msg), unsafe_allow_html=True)
\ No newline at end of file
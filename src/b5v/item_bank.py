@@ -0,0 +1,116 @@
+# B5V Item Bank
+# 質問票の定義 (因子 → 項目リスト)。SolalendarB5V.bigfive_questions と同じ形で、
+# score は 1 (正方向) / -1 (反転項目)。ScoringKey.from_bank() で採点キー行列にコンパイルする。
+
+# Layer B: BigFive (OS) — 各因子10問 (正方向5 / 反転5)
+BIGFIVE_ITEMS = {
+    "Openness": [
+        {"id": "O01", "text": "想像力が豊かな方だ", "score": 1},
+        {"id": "O02", "text": "独創的なアイデアがよく浮かぶ", "score": 1},
+        {"id": "O03", "text": "難しい概念でもすぐに理解できる", "score": 1},
+        {"id": "O04", "text": "物事についてじっくり考えるのが好きだ", "score": 1},
+        {"id": "O05", "text": "芸術や音楽に心を動かされることが多い", "score": 1},
+        {"id": "O06", "text": "抽象的な考えにはあまり興味がない", "score": -1},
+        {"id": "O07", "text": "哲学的な議論は退屈だと感じる", "score": -1},
+        {"id": "O08", "text": "新しいやり方より慣れたやり方を選ぶ", "score": -1},
+        {"id": "O09", "text": "美術館や演奏会に行きたいとは思わない", "score": -1},
+        {"id": "O10", "text": "空想にふけることはほとんどない", "score": -1},
+    ],
+    "Conscientiousness": [
+        {"id": "C01", "text": "いつも準備を怠らない", "score": 1},
+        {"id": "C02", "text": "細部にまで気を配る", "score": 1},
+        {"id": "C03", "text": "用事はすぐに片付ける", "score": 1},
+        {"id": "C04", "text": "計画を立ててから行動する", "score": 1},
+        {"id": "C05", "text": "仕事では手を抜かない", "score": 1},
+        {"id": "C06", "text": "持ち物をあちこちに置きっぱなしにする", "score": -1},
+        {"id": "C07", "text": "使った物を元の場所に戻し忘れる", "score": -1},
+        {"id": "C08", "text": "やるべきことを後回しにしがちだ", "score": -1},
+        {"id": "C09", "text": "約束の時間や締め切りに遅れることがよくある", "score": -1},
+        {"id": "C10", "text": "部屋や机の上が散らかっていても気にならない", "score": -1},
+    ],
+    "Extraversion": [
+        {"id": "E01", "text": "初対面の人ともすぐに打ち解けられる", "score": 1},
+        {"id": "E02", "text": "自分から会話を始めることが多い", "score": 1},
+        {"id": "E03", "text": "集まりでは場の中心にいることが多い", "score": 1},
+        {"id": "E04", "text": "人と一緒にいると元気が出る", "score": 1},
+        {"id": "E05", "text": "注目を浴びても気にならない", "score": 1},
+        {"id": "E06", "text": "あまり口数が多くない", "score": -1},
+        {"id": "E07", "text": "目立たないようにしている", "score": -1},
+        {"id": "E08", "text": "見知らぬ人の前では静かになる", "score": -1},
+        {"id": "E09", "text": "大人数より一人か少人数で過ごすのが好きだ", "score": -1},
+        {"id": "E10", "text": "人と長く話すと疲れてしまう", "score": -1},
+    ],
+    "Agreeableness": [
+        {"id": "A01", "text": "他人の感情に共感しやすい", "score": 1},
+        {"id": "A02", "text": "人のために時間を割くことを惜しまない", "score": 1},
+        {"id": "A03", "text": "周りの人を安心させることができる", "score": 1},
+        {"id": "A04", "text": "困っている人を見ると放っておけない", "score": 1},
+        {"id": "A05", "text": "相手の立場に立って考えるようにしている", "score": 1},
+        {"id": "A06", "text": "他人の問題にはあまり関心がない", "score": -1},
+        {"id": "A07", "text": "つい皮肉や悪口を口にしてしまう", "score": -1},
+        {"id": "A08", "text": "自分の利益のためなら他人と対立しても構わない", "score": -1},
+        {"id": "A09", "text": "人に冷たく接してしまうことがある", "score": -1},
+        {"id": "A10", "text": "人を簡単には信用しない", "score": -1},
+    ],
+    "Neuroticism": [
+        {"id": "N01", "text": "ストレスを感じやすい", "score": 1},
+        {"id": "N02", "text": "心配事が多い", "score": 1},
+        {"id": "N03", "text": "気分が変わりやすい", "score": 1},
+        {"id": "N04", "text": "些細なことでイライラしたり落ち込んだりしやすい", "score": 1},
+        {"id": "N05", "text": "憂うつな気分になることが多い", "score": 1},
+        {"id": "N06", "text": "たいていはリラックスしている", "score": -1},
+        {"id": "N07", "text": "めったに落ち込まない", "score": -1},
+        {"id": "N08", "text": "プレッシャーがかかる状況でも冷静でいられる", "score": -1},
+        {"id": "N09", "text": "感情は安定している方だ", "score": -1},
+        {"id": "N10", "text": "失敗してもすぐに立ち直れる", "score": -1},
+    ],
+}
+
+# Layer A: VALS (Drive) — 3つの主要動機 + リソース (各6問)
+VALS_ITEMS = {
+    "Ideals": [
+        {"id": "VI1", "text": "自分の原則や信念に沿って行動したい", "score": 1},
+        {"id": "VI2", "text": "決める前に十分な情報を集める", "score": 1},
+        {"id": "VI3", "text": "伝統や決まりごとには意味があると思う", "score": 1},
+        {"id": "VI4", "text": "知識を深めること自体に喜びを感じる", "score": 1},
+        {"id": "VI5", "text": "家族や地域への責任を果たしたい", "score": 1},
+        {"id": "VI6", "text": "その場の流れで物事を決めることが多い", "score": -1},
+    ],
+    "Achievement": [
+        {"id": "VA1", "text": "周囲から成功している人だと見られたい", "score": 1},
+        {"id": "VA2", "text": "仕事での評価や肩書きは重要だ", "score": 1},
+        {"id": "VA3", "text": "目標を立てて達成することにやりがいを感じる", "score": 1},
+        {"id": "VA4", "text": "持ち物で自分の立場を示したい", "score": 1},
+        {"id": "VA5", "text": "競争で勝つことが好きだ", "score": 1},
+        {"id": "VA6", "text": "人からどう評価されるかは気にならない", "score": -1},
+    ],
+    "SelfExpression": [
+        {"id": "VS1", "text": "新しいことや刺激的なことを試したい", "score": 1},
+        {"id": "VS2", "text": "自分の手で何かを作ったり直したりするのが好きだ", "score": 1},
+        {"id": "VS3", "text": "体を動かす活動に夢中になる", "score": 1},
+        {"id": "VS4", "text": "他人とは違う自分らしさを表現したい", "score": 1},
+        {"id": "VS5", "text": "モノより体験にお金を使いたい", "score": 1},
+        {"id": "VS6", "text": "変化のない安定した毎日が一番だ", "score": -1},
+    ],
+    "Resources": [
+        {"id": "VR1", "text": "新しいことを学ぶのが得意だ", "score": 1},
+        {"id": "VR2", "text": "自分の判断に自信がある", "score": 1},
+        {"id": "VR3", "text": "いつもエネルギーに満ちている", "score": 1},
+        {"id": "VR4", "text": "お金や時間にある程度の余裕がある", "score": 1},
+        {"id": "VR5", "text": "困難な状況でも主導権を握れる", "score": 1},
+        {"id": "VR6", "text": "毎日をやり過ごすだけで精一杯だ", "score": -1},
+    ],
+}
+
+# VALS の8タイプ (主要動機 × リソースの高低。両端は動機によらない)
+VALS_TYPES = (
+    "Innovators", "Thinkers", "Achievers", "Experiencers",
+    "Believers", "Strivers", "Makers", "Survivors",
+)
+VALS_MOTIVATIONS = ("Ideals", "Achievement", "SelfExpression")
+# 動機ごとの (リソース高, リソース低) のタイプ
+VALS_TYPE_MAP = {
+    "Ideals": ("Thinkers", "Believers"),
+    "Achievement": ("Achievers", "Strivers"),
+    "SelfExpression": ("Experiencers", "Makers"),
+}
@@ -0,0 +1,172 @@
+"""
+B5V Scoring Engine (vectorized)
+
+質問票 (因子 → 項目) を採点キー行列 K (項目 × 因子, 値は +1 / -1 / 0) にコンパイルし、
+回答行列 R (回答者 × 項目) をまとめて採点する。
+
+    key = ScoringKey.bigfive()                      # 50問版 (b5v.item_bank.BIGFIVE_ITEMS)
+    R = key.responses([{"O01": 5, "C03": 2}, ...])  # dict の回答 → 回答行列 (未回答は 0)
+    scores = key.score(R)                           # (回答者, 因子) の 0-100
+    key.score_dicts(R)                              # [{"Openness": 62.5, ...}, ...]
+
+    vals = ScoringKey.vals()
+    vals_type_codes(vals.score(R_vals), vals.factors)   # VALS_TYPES の番号
+
+採点: 各項目を中央値 (3) からの偏差にし、反転項目は K の符号で反転して、因子ごとに
+「回答済み項目の平均」をとる。平均 -2〜+2 を 0〜100 に線形に写す (全問 5 なら 100)。
+未回答の項目は分子・分母の両方から外すので、回答数が因子ごとに違っても同じ尺度になる。
+1問も回答のない因子は missing_score (既定 NaN) になる。
+
+回答行列は整数 (0 = 未回答) でも浮動小数 (NaN = 未回答) でもよい。int8 で持てば
+100万人 × 50問でも 50MB に収まる。計算は chunk_size 行ずつ行列積で行う。
+"""
+import numpy as np
+
+from b5v.item_bank import BIGFIVE_ITEMS, VALS_ITEMS, VALS_MOTIVATIONS, VALS_TYPE_MAP, VALS_TYPES
+
+# 1回の行列積で扱う行数 (中間配列が 数十MB に収まる程度)
+CHUNK_SIZE = 131_072
+
+# VALS タイプ判定のリソース閾値 (0-100)
+VALS_RESOURCES_TOP = 80.0      # 以上は動機によらず Innovators
+VALS_RESOURCES_BOTTOM = 20.0   # 以下は動機によらず Survivors
+VALS_RESOURCES_HIGH = 50.0     # 動機ごとの高/低の境目
+
+
+class ScoringKey:
+    """質問票をコンパイルした採点キー (不変。プロセス内で共有してよい)"""
+
+    _defaults = {}
+
+    def __init__(self, factors, item_ids, key, scale=(1, 5)):
+        self.factors = tuple(factors)
+        self.item_ids = tuple(item_ids)
+        self.key = np.asarray(key, dtype=np.float32)
+        if self.key.shape != (len(self.item_ids), len(self.factors)):
+            raise ValueError(f"key shape {self.key.shape} does not match "
+                             f"{len(self.item_ids)} items x {len(self.factors)} factors")
+        self.key.flags.writeable = False
+        self._weight = np.abs(self.key)  # 回答数の集計用 (項目が因子に属するか)
+        self.scale = (int(scale[0]), int(scale[1]))
+        self.midpoint = (self.scale[0] + self.scale[1]) / 2
+        self.half_range = (self.scale[1] - self.scale[0]) / 2
+        self.index = {item_id: j for j, item_id in enumerate(self.item_ids)}
+
+    @classmethod
+    def from_bank(cls, bank, scale=(1, 5)):
+        """{因子: [{"id", "text", "score"}, ...]} の質問票から作る"""
+        factors = list(bank)
+        item_ids, rows = [], []
+        for f, questions in enumerate(bank.values()):
+            for q in questions:
+                if q["score"] not in (1, -1):
+                    raise ValueError(f"item {q['id']!r}: score must be 1 or -1")
+                if q["id"] in item_ids:
+                    raise ValueError(f"duplicate item id: {q['id']!r}")
+                row = [0] * len(factors)
+                row[f] = q["score"]
+                item_ids.append(q["id"])
+                rows.append(row)
+        return cls(factors, item_ids, np.array(rows, dtype=np.float32).reshape(len(item_ids), len(factors)), scale)
+
+    @classmethod
+    def bigfive(cls):
+        """BigFive 50問版 (共有インスタンス)"""
+        return cls._default("bigfive", BIGFIVE_ITEMS)
+
+    @classmethod
+    def vals(cls):
+        """VALS (動機3 + リソース) 版 (共有インスタンス)"""
+        return cls._default("vals", VALS_ITEMS)
+
+    @classmethod
+    def _default(cls, name, bank):
+        key = cls._defaults.get(name)
+        if key is None:
+            key = cls._defaults.setdefault(name, cls.from_bank(bank))
+        return key
+
+    # --- 回答行列 ---
+    def responses(self, answers):
+        """
+        [{項目ID: 回答}, ...] → int8 の回答行列 (回答者, 項目)。未回答 (None / NaN)・キーにない項目は 0。
+        範囲外や整数でない回答は int8 に詰める前に ValueError にする (300 → 44 のような桁あふれを防ぐ)
+        """
+        n = len(answers)
+        lo, hi = self.scale
+        matrix = np.zeros((n, len(self.item_ids)), dtype=np.int8)
+        for j, item_id in enumerate(self.item_ids):
+            column = np.fromiter((a.get(item_id) or 0 for a in answers), dtype=np.float64, count=n)
+            column[np.isnan(column)] = 0
+            invalid = (column != 0) & ((column < lo) | (column > hi) | (column != np.rint(column)))
+            if invalid.any():
+                row = int(np.argmax(invalid))
+                raise ValueError(f"answer out of range {self.scale} for item {item_id!r}: {answers[row][item_id]!r}")
+            matrix[:, j] = column
+        return matrix
+
+    # --- 採点 ---
+    def score(self, responses, missing_score=np.nan, chunk_size=CHUNK_SIZE):
+        """回答行列 (回答者, 項目) → 因子スコア (回答者, 因子) の 0-100 (float64)"""
+        responses = np.asarray(responses)
+        if responses.ndim == 1:
+            return self.score(responses[np.newaxis], missing_score, chunk_size)[0]
+        if responses.shape[1] != len(self.item_ids):
+            raise ValueError(f"expected {len(self.item_ids)} item columns, got {responses.shape[1]}")
+
+        n = len(responses)
+        scores = np.empty((n, len(self.factors)), dtype=np.float64)
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            scores[start:stop] = self._score_chunk(responses[start:stop])
+        if not np.isnan(missing_score):
+            np.nan_to_num(scores, copy=False, nan=missing_score)
+        return scores
+
+    def _score_chunk(self, r):
+        lo, hi = self.scale
+        answered = (r >= lo) & (r <= hi)    # NaN / 0 は False
+        invalid = ~answered & (r != 0)
+        if r.dtype.kind == "f":
+            invalid &= ~np.isnan(r)
+        if invalid.any():
+            row, col = np.argwhere(invalid)[0]
+            raise ValueError(f"answer out of range {self.scale} for item {self.item_ids[col]!r}: {r[row, col]}")
+
+        centered = np.where(answered, r.astype(np.float32) - np.float32(self.midpoint), np.float32(0))
+        # 和・件数は小さな整数 (半整数) なので float32 の行列積でも誤差はない。割り算は float64 で行う
+        sums = (centered @ self.key).astype(np.float64)
+        counts = (answered.astype(np.float32) @ self._weight).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts           # 回答のない因子は NaN
+        return 50.0 + 50.0 * means / self.half_range
+
+    def score_dicts(self, responses, missing_score=np.nan):
+        """score() の結果を [{因子: スコア}, ...] で返す"""
+        scores = self.score(responses, missing_score)
+        return [dict(zip(self.factors, row)) for row in scores.tolist()]
+
+
+def vals_type_codes(scores, factors=tuple(VALS_ITEMS)):
+    """
+    VALS 因子スコア (回答者, 因子) → VALS_TYPES の番号 (int8)。
+    リソースが上端/下端なら Innovators / Survivors、それ以外は最も高い主要動機と
+    リソースの高低で決める。スコアが NaN (未回答) の動機は最低として扱う。
+    リソースが未回答、または主要動機が1つも回答されていない行は判定できないので -1。
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.ndim == 1:
+        return vals_type_codes(scores[np.newaxis], factors)[0]
+    factors = list(factors)
+    resources = scores[:, factors.index("Resources")]
+    motivation = np.nan_to_num(scores[:, [factors.index(m) for m in VALS_MOTIVATIONS]], nan=-np.inf)
+    dominant = np.argmax(motivation, axis=1)
+
+    # (動機, 高/低) → タイプ番号
+    table = np.array([[VALS_TYPES.index(t) for t in VALS_TYPE_MAP[m]] for m in VALS_MOTIVATIONS], dtype=np.int8)
+    high = np.nan_to_num(resources, nan=0.0) >= VALS_RESOURCES_HIGH
+    codes = table[dominant, np.where(high, 0, 1)]
+    codes[resources >= VALS_RESOURCES_TOP] = VALS_TYPES.index("Innovators")
+    codes[np.nan_to_num(resources, nan=0.0) <= VALS_RESOURCES_BOTTOM] = VALS_TYPES.index("Survivors")
+    codes[np.isnan(resources) | np.isneginf(motivation).all(axis=1)] = -1
+    return codes
@@ -0,0 +1,77 @@
+"""
+Solalendar CLI (headless)
+
+    python cli.py tier1 --year 1974 --month 11 --day 4 --hour 7 --minute 1
+    python cli.py tier1 --year 1974 --month 11 --day 4 --hour 7 --minute 1 --place 札幌 --date 2024-02-04
+    python cli.py b5v --answers '{"O1": 5, "O2": 2}'
+    python cli.py tier3 --input request.json        # {"tier1": {...}, "tier2": {...}}
+    python cli.py serve --port 8080
+
+結果は JSON で標準出力に書き出す。エンジンはサブコマンドの実行時にだけ import する。
+"""
+import argparse
+import json
+import sys
+
+import service
+
+
+def _load_json(value):
+    """JSON 文字列、ファイルパス、または "-" (標準入力) を読み込む"""
+    if value == "-":
+        return json.load(sys.stdin)
+    if value.lstrip().startswith("{"):
+        return json.loads(value)
+    with open(value, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solalendar headless CLI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p1 = sub.add_parser("tier1", help="Tier 1 analyze")
+    p1.add_argument("--name", default="")
+    p1.add_argument("--year", type=int, required=True)
+    p1.add_argument("--month", type=int, required=True)
+    p1.add_argument("--day", type=int, required=True)
+    p1.add_argument("--hour", type=int, default=12)
+    p1.add_argument("--minute", type=int, default=0)
+    p1.add_argument("--lat", type=float, default=35.68)
+    p1.add_argument("--lon", type=float, default=139.76)
+    p1.add_argument("--tz", help="IANA time zone of the birth time (e.g. Asia/Tokyo); default treats it as UT")
+    p1.add_argument("--place", help="birthplace name from the gazetteer (sets lat/lon/tz)")
+    p1.add_argument("--date", help="reference date for the State axis (YYYY-MM-DD, default today)")
+
+    pb = sub.add_parser("b5v", help="B5V Big Five scoring")
+    pb.add_argument("--answers", required=True, help="JSON object, file path or '-'")
+
+    p3 = sub.add_parser("tier3", help="Tier 3 integrate")
+    p3.add_argument("--input", required=True, help='JSON {"tier1": ..., "tier2": ...}, file path or "-"')
+    p3.add_argument("--api-key")
+
+    ps = sub.add_parser("serve", help="run the HTTP/JSON service")
+    ps.add_argument("--host", default="127.0.0.1")
+    ps.add_argument("--port", type=int, default=8080)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        service.serve(args.host, args.port)
+        return
+    if args.command == "tier1":
+        result = service.tier1_analyze(vars(args))
+    elif args.command == "b5v":
+        result = service.b5v_score({"answers": _load_json(args.answers)})
+    else:
+        payload = _load_json(args.input)
+        if args.api_key:
+            payload["api_key"] = args.api_key
+        result = service.tier3_integrate(payload)
+
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+def _normalize(value):
+    """キャッシュキー用の正規化 (文字列は NFC + 前後の空白除去)"""
+    if isinstance(value, str):
+        return unicodedata.normalize("NFC", value).strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(model, prompt_version, payload):
+    """
+    (モデル, システムプロンプトのバージョン, 正規化した入力JSON) の正準ハッシュ。
+    キー順・空白・Unicode 表記の揺れに依存しない。
+    """
+    canonical = json.dumps(
+        {"model": model, "prompt_version": prompt_version, "input": _normalize(payload)},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    LLM 応答キャッシュの共通インターフェース。
+    値は JSON 文字列で保存し、取り出すたびに新しい dict を返す (呼び出し側での変更が波及しない)。
+    _get は self._lock を取った状態で呼ばれる (参照とヒット数の更新を1回のロックで行う)。
+    """
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl  # 秒 (None = 無期限)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    key = staticmethod(cache_key)
+
+    def get(self, key):
+        with self._lock:
+            raw = self._get(key)
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self._set(key, json.dumps(value, ensure_ascii=False))
+
+    def stats(self):
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    @abstractmethod
+    def _get(self, key):
+        """生の JSON 文字列 (無い・期限切れなら None)"""
+
+    @abstractmethod
+    def _set(self, key, raw):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """プロセス内 LRU キャッシュ (スレッドセーフ)"""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        super().__init__(max_entries, ttl)
+        self._data = OrderedDict()
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        created, raw = entry
+        if self._expired(created):
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return raw
+
+    def _set(self, key, raw):
+        with self._lock:
+            self._data[key] = (time.time(), raw)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    ディスク永続キャッシュ (SQLite)。プロセス再起動後も有効で、複数プロセスから共有できる。
+    件数が max_entries を超えたら最終アクセスが古いものから削除する。
+    """
+
+    def __init__(self, path, max_entries=100_000, ttl=None):
+        super().__init__(max_entries, ttl)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _get(self, key):
+        row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        raw, created = row
+        if self._expired(created):
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return raw
+
+    def _set(self, key, raw):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, raw, now, now),
+            )
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY accessed LIMIT ?)", (overflow,)
+                )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+
+import httpx
+import openai
+
+# 接続プール設定 (configure() で変更可。変更後に作られるクライアントから有効)
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+# 1プロセス (1イベントループ) あたりの同時リクエスト上限
+MAX_CONCURRENCY = 256
+# OpenAI 互換サーバーの URL (None = OPENAI_BASE_URL 環境変数 / 公式API)
+BASE_URL = None
+# 1ループあたりに保持するクライアント数 (APIキーの種類)。超えたら最も古く使われたものを手放す
+MAX_CLIENTS = 64
+
+# httpx の接続はイベントループに紐づくので、クライアントはループ × APIキーごとに1つ
+_clients = weakref.WeakKeyDictionary()     # loop -> OrderedDict{api_key: AsyncOpenAI} (LRU)
+_semaphores = weakref.WeakKeyDictionary()  # loop -> asyncio.Semaphore
+_lock = threading.Lock()
+
+_background_loop = None
+
+
+def configure(max_concurrency=None, max_connections=None, max_keepalive_connections=None, keepalive_expiry=None,
+              base_url=None):
+    global MAX_CONCURRENCY, MAX_CONNECTIONS, MAX_KEEPALIVE_CONNECTIONS, KEEPALIVE_EXPIRY, BASE_URL
+    if base_url is not None:
+        BASE_URL = base_url
+    if max_concurrency is not None:
+        MAX_CONCURRENCY = max_concurrency
+    if max_connections is not None:
+        MAX_CONNECTIONS = max_connections
+    if max_keepalive_connections is not None:
+        MAX_KEEPALIVE_CONNECTIONS = max_keepalive_connections
+    if keepalive_expiry is not None:
+        KEEPALIVE_EXPIRY = keepalive_expiry
+
+
+def get_async_client(api_key):
+    """現在のイベントループで共有される AsyncOpenAI (HTTP keep-alive の接続プール付き)"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _clients.setdefault(loop, OrderedDict())
+        client = clients.get(api_key)
+        if client is not None:
+            clients.move_to_end(api_key)
+        else:
+            http_client = openai.DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ))
+            client = openai.AsyncOpenAI(api_key=api_key, base_url=BASE_URL, http_client=http_client)
+            clients[api_key] = client
+            # 実行中のリクエストが参照を持っているので close はせず、参照を外すだけにする
+            while len(clients) > MAX_CLIENTS:
+                clients.popitem(last=False)
+    return client
+
+
+def concurrency_limit():
+    """現在のイベントループで共有される同時実行数セマフォ"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return semaphore
+
+
+async def chat_completion(api_key, **kwargs):
+    """共有クライアントで chat.completions.create を呼ぶ (同時実行数は MAX_CONCURRENCY まで)"""
+    async with concurrency_limit():
+        return await get_async_client(api_key).chat.completions.create(**kwargs)
+
+
+async def chat_completion_stream(api_key, on_usage=None, **kwargs):
+    """
+    chat.completions.create(stream=True) の本文の差分を順に返す。
+    ストリームを読み終えるまで同時実行枠を保持する。
+    stream_options={"include_usage": True} を付けた場合、usage の付いたチャンクを on_usage(chunk) に渡す
+    (tracing.record_usage にそのまま渡せる)。
+    """
+    async with concurrency_limit():
+        stream = await get_async_client(api_key).chat.completions.create(stream=True, **kwargs)
+        async for chunk in stream:
+            if on_usage is not None and getattr(chunk, "usage", None) is not None:
+                on_usage(chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def run_sync(coro):
+    """
+    同期コードから非同期処理を実行する。
+    呼び出しごとに asyncio.run すると接続プールが使い捨てになるため、
+    プロセス共有のバックグラウンドループ上で実行して結果を待つ。
+    """
+    global _background_loop
+    with _lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="llm-client-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop).result()
+
+
+async def _anext(agen):
+    return await agen.__anext__()
+
+
+def iterate_sync(agen):
+    """非同期ジェネレーターを同期イテレーターとして読む (run_sync と同じバックグラウンドループ上で実行)"""
+    try:
+        while True:
+            try:
+                yield run_sync(_anext(agen))
+            except StopAsyncIteration:
+                return
+    finally:
+        run_sync(agen.aclose())
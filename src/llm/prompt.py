@@ -0,0 +1,155 @@
+"""
+トークン節約型のプロンプト組み立て
+
+    builder = PromptBuilder(SYSTEM_PROMPT, budget=1500)
+    prompt = builder.build([("TRAIT", "core=Seeker mask=Leo", False),
+                            ("TIER2", compact(tier2_result), True)])
+    prompt.system, prompt.user, prompt.tokens   # tokens = {"system": n, "TRAIT": n, ..., "total": n}
+
+- system は呼び出しごとに組み立て直さない固定文字列にする。毎回バイト単位で同じ先頭部分に
+  なるので、プロバイダ側のプロンプトキャッシュ (先頭一致) がそのまま効く。
+- 可変データは compact() で「キー=値」の決定的なテキストにする (同じ入力なら同じバイト列)。
+- count_tokens() でセクションごとのトークン数を数え、budget を超えた場合は切り詰め可能な
+  セクションを後ろから短くする。それでも収まらなければ ValueError。
+
+トークン数は tiktoken があればその数え方、無ければ文字種からの概算
+(ASCII は4文字 ≒ 1トークン、それ以外は1文字 ≒ 1トークン。日本語では多めに出る)。
+"""
+import math
+import re
+from dataclasses import dataclass
+
+TIKTOKEN_ENCODING = "o200k_base"  # gpt-4o / gpt-4o-mini
+TRUNCATION_MARK = "…"
+
+_encoding = None
+_LAYER_PREFIX = re.compile(r"^layer_\d+[a-z]?_")
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception:  # 未インストール・エンコーディング取得失敗 (オフライン) は概算にする
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    """text のトークン数 (tiktoken が無い環境では概算)"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+# ---------------------------------------------------------------------------
+# 直列化
+# ---------------------------------------------------------------------------
+def _scalar(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    if isinstance(value, (list, tuple)):
+        return ",".join(_scalar(v) for v in value)
+    return " ".join(str(value).split())  # 改行・連続空白を詰める
+
+
+def compact(data, skip=()):
+    """
+    入れ子 dict → 「キー=値」の行 (キーはソート順、None と skip のキーは省く)。
+    スカラーだけの dict は1行にまとめる:
+        behavior.big_five_scores: agreeableness=66 conscientiousness=48 ...
+    layer_6_ のような層番号の接頭辞は省く。
+    """
+    lines = []
+    _compact_into(lines, "", data, frozenset(skip))
+    return "\n".join(lines)
+
+
+def _compact_into(lines, path, data, skip):
+    scalars, nested = [], []
+    for key in sorted(data, key=str):
+        value = data[key]
+        if key in skip or value is None:
+            continue
+        name = _LAYER_PREFIX.sub("", str(key))
+        if isinstance(value, dict):
+            nested.append((name, value))
+        else:
+            scalars.append(f"{name}={_scalar(value)}")
+    if scalars:
+        lines.append(f"{path}: {' '.join(scalars)}" if path else " ".join(scalars))
+    for name, value in nested:
+        _compact_into(lines, f"{path}.{name}" if path else name, value, skip)
+
+
+# ---------------------------------------------------------------------------
+# 組み立て
+# ---------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class Prompt:
+    system: str
+    user: str
+    tokens: dict   # {"system": n, <セクション名>: n, ..., "total": n}
+
+    def messages(self):
+        return [{"role": "system", "content": self.system}, {"role": "user", "content": self.user}]
+
+
+class PromptBuilder:
+    """固定の system プロンプトと可変セクションからプロンプトを作る (スレッド間で共有してよい)"""
+
+    def __init__(self, system, budget=None):
+        self.system = system
+        self.system_tokens = count_tokens(system)  # 固定部分は1回だけ数える
+        self.budget = budget
+
+    def build(self, sections, footer=""):
+        """
+        sections: [(名前, 本文, 切り詰め可能か)]。user プロンプトは "## 名前" の見出しと本文を
+        順に並べ、最後に footer を付けたもの。
+        """
+        blocks = [[name, f"## {name}\n{text}", trimmable] for name, text, trimmable in sections]
+        tokens = {name: count_tokens(block) for name, block, _ in blocks}
+        footer_tokens = count_tokens(footer) if footer else 0
+        total = self.system_tokens + sum(tokens.values()) + footer_tokens
+
+        if self.budget is not None and total > self.budget:
+            # 切り詰め可能なセクションを後ろから短くする
+            for block in reversed(blocks):
+                if total <= self.budget:
+                    break
+                name, text, trimmable = block
+                if not trimmable:
+                    continue
+                allowed = tokens[name] - (total - self.budget)
+                block[1] = self._truncate(text, allowed, header_chars=len(name) + 4)
+                total -= tokens[name]
+                tokens[name] = count_tokens(block[1])
+                total += tokens[name]
+            if total > self.budget:
+                raise ValueError(f"prompt needs {total} tokens even after truncation (budget {self.budget})")
+
+        user = "\n".join([block for _, block, _ in blocks] + ([footer] if footer else []))
+        if footer:
+            tokens["footer"] = footer_tokens
+        return Prompt(self.system, user, {"system": self.system_tokens, **tokens, "total": total})
+
+    @staticmethod
+    def _truncate(text, max_tokens, header_chars):
+        """見出し (先頭 header_chars 文字) を残して max_tokens 以下に収まる最長の前方部分"""
+        if max_tokens <= count_tokens(text[:header_chars] + TRUNCATION_MARK):
+            return text[:header_chars].rstrip("\n")
+        lo, hi = header_chars, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(text[:mid] + TRUNCATION_MARK) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo] + TRUNCATION_MARK
@@ -0,0 +1,133 @@
+"""
+Single-flight (同一リクエストの合流)
+
+同じ入力 (正準ハッシュ) のリクエストが同時に来た場合、最初の1件 (リーダー) だけが実際に
+LLM を呼び、実行中に来た残り (フォロワー) はその結果を待って共有する。
+結果は呼び出し側ごとに deepcopy して返す (共有した dict の変更が波及しない)。
+
+    flights = SingleFlight.default()
+    result = await flights.do_async(key, fetch, arg)    # asyncio
+    result = flights.do(key, fetch_sync, arg)           # スレッド
+    flights.stats()   # {"calls": 実行した回数, "coalesced": 合流した回数, "in_flight": 実行中の件数}
+
+実行中の呼び出しは concurrent.futures.Future で持つので、スレッドからでも別のイベント
+ループからでも同じ呼び出しに合流できる。リーダーがキャンセルされた場合、フォロワーは
+結果を共有せず改めて (誰か1件が) 実行し直す。
+"""
+import asyncio
+import concurrent.futures
+import copy
+import threading
+
+
+class FlightAbandoned(Exception):
+    """リーダーが結果を出さずに終わった (キャンセルなど)。フォロワーはやり直す"""
+
+
+class SingleFlight:
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> concurrent.futures.Future
+        self.calls = 0
+        self.coalesced = 0
+
+    @classmethod
+    def default(cls):
+        """プロセスで共有するインスタンス (Tier 2 / Tier 3 エンジンの既定)"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    # --- 低レベル API (ストリーミングのように結果が最後に決まる処理用) ---
+    def acquire(self, key):
+        """(future, is_leader)。is_leader なら実行して release() で結果を渡す"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = concurrent.futures.Future()
+            self._calls[key] = future
+            self.calls += 1
+            return future, True
+
+    def release(self, key, future, result=None, error=None):
+        """リーダーの結果 (または例外) をフォロワーに渡して登録を外す"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    async def wait_async(future):
+        """フォロワーとして結果を待つ (リーダーが結果を出さずに終わったら FlightAbandoned)"""
+        # フォロワーがキャンセルされても共有の future (リーダーと他のフォロワー) は取り消さない
+        return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(future)))
+
+    def abandon(self, key, future):
+        """リーダーが結果を出さずに終わった (フォロワーは実行し直す)"""
+        self.release(key, future, error=FlightAbandoned())
+
+    # --- 高レベル API ---
+    def do(self, key, fn, *args):
+        """fn(*args) を実行する (同じ key の実行中の呼び出しがあればその結果を待つ)"""
+        while True:
+            future, leader = self.acquire(key)
+            if leader:
+                return self._run_leader(key, future, fn, *args)
+            try:
+                return copy.deepcopy(future.result())
+            except FlightAbandoned:
+                continue
+
+    async def do_async(self, key, coro_fn, *args):
+        """do の asyncio 版 (coro_fn(*args) を await する)"""
+        while True:
+            future, leader = self.acquire(key)
+            if leader:
+                break
+            try:
+                return await self.wait_async(future)
+            except FlightAbandoned:
+                continue
+        try:
+            result = await coro_fn(*args)
+        except Exception as e:
+            self.release(key, future, error=e)
+            raise
+        except BaseException:
+            self.abandon(key, future)
+            raise
+        self.release(key, future, result)
+        return result
+
+    def _run_leader(self, key, future, fn, *args):
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self.release(key, future, error=e)
+            raise
+        except BaseException:
+            self.abandon(key, future)
+            raise
+        self.release(key, future, result)
+        return result
+
+    def stats(self):
+        total = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0,
+            "in_flight": len(self._calls),
+        }
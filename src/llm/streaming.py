@@ -0,0 +1,80 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    トークンストリーム用の逐次 JSON パーサー。
+    feed() に届いた断片を渡すと、値が確定したリーフ (文字列・数値・真偽値・null) を
+    (path, value) のリストで返す。path はキー/インデックスのタプル
+    (例: ("wisdom_message", "headline"))。これまでに受け取ったテキスト全体を
+    再パースしないので、1トークンあたりの処理は断片の長さに比例するだけで済む。
+    """
+
+    def __init__(self):
+        self._stack = []       # [{"key": str|None, "index": int|None, "expect_key": bool}]
+        self._string = None    # 文字列リテラルの途中 (エスケープを含む生テキスト)
+        self._escape = False
+        self._scalar = None    # 数値・true/false/null の途中
+        self.text = []         # 受信した全テキスト (最後に json.loads で検証する)
+
+    def feed(self, chunk):
+        self.text.append(chunk)
+        events = []
+        for ch in chunk:
+            if self._string is not None:
+                self._feed_string(ch, events)
+            elif self._scalar is not None and ch not in _WHITESPACE and ch not in ",}]":
+                self._scalar.append(ch)
+            else:
+                if self._scalar is not None:
+                    self._emit(json.loads("".join(self._scalar)), events)
+                    self._scalar = None
+                self._feed_structure(ch, events)
+        return events
+
+    def result(self):
+        """ストリーム終了後の完全な JSON"""
+        return json.loads("".join(self.text))
+
+    def _feed_string(self, ch, events):
+        if self._escape:
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            value = json.loads('"' + "".join(self._string) + '"')
+            self._string = None
+            frame = self._stack[-1] if self._stack else None
+            if frame is not None and frame["expect_key"]:
+                frame["key"] = value
+                frame["expect_key"] = False
+            else:
+                self._emit(value, events)
+            return
+        self._string.append(ch)
+
+    def _feed_structure(self, ch, events):
+        if ch in _WHITESPACE or ch == ":":
+            return
+        if ch == '"':
+            self._string = []
+        elif ch == "{":
+            self._stack.append({"key": None, "index": None, "expect_key": True})
+        elif ch == "[":
+            self._stack.append({"key": None, "index": 0, "expect_key": False})
+        elif ch in "}]":
+            self._stack.pop()
+        elif ch == ",":
+            frame = self._stack[-1]
+            if frame["index"] is None:
+                frame["expect_key"] = True
+            else:
+                frame["index"] += 1
+        else:
+            self._scalar = [ch]
+
+    def _emit(self, value, events):
+        path = tuple(f["key"] if f["index"] is None else f["index"] for f in self._stack)
+        events.append((path, value))
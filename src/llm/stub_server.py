@@ -0,0 +1,133 @@
+"""
+OpenAI 互換のローカルスタブサーバー (オフラインでのスループット計測用)
+
+    python -m llm.stub_server --port 8765 --latency 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python tier3_batch.py in.jsonl out.jsonl
+
+POST /v1/chat/completions に対して固定の JSON 応答を返す (stream=True なら SSE)。
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Tier 2 の LLM は自由記述からの Big Five 推定だけを返す (残りは tier2_rules で計算)
+TIER2_RESPONSE = {"openness": 62, "conscientiousness": 48, "extraversion": 55, "agreeableness": 66, "neuroticism": 41}
+
+TIER3_RESPONSE = {
+    "gap_analysis": {
+        "tier1_element": "Water",
+        "tier2_element": "Air",
+        "relationship_type": "Complement",
+        "stress_level": "Medium"
+    },
+    "wisdom_message": {
+        "headline": "静かな水面に風が渡る",
+        "narrative": "これはスタブサーバーの固定応答です。",
+        "actionable_advice": "今日は一つだけ、急がない選択をしてみてください。"
+    }
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # ヘッダーと本文の分割送信で遅延ACK待ちにならないように
+    latency = 0.0          # 応答までの待ち時間 (秒)
+    chunk_delay = 0.0      # ストリーミング時のチャンク間隔 (秒)
+    requests_served = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with StubHandler._count_lock:
+            StubHandler.requests_served += 1
+        time.sleep(self.latency)
+
+        messages = body.get("messages", [])
+        system = messages[0]["content"] if messages else ""
+        content = json.dumps(TIER2_RESPONSE if "Big Five rater" in system else TIER3_RESPONSE, ensure_ascii=False)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 3
+        completion_tokens = len(content) // 3
+        model = body.get("model", "stub")
+
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._send_stream(model, content, usage if include_usage else None)
+            return
+
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, model, content, usage=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for i in range(0, len(content), 8):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[i:i + 8]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+        if usage is not None:
+            # stream_options.include_usage: choices が空で usage だけの最終チャンク
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # 既定の 5 では高並列時に接続が溢れる
+
+
+def serve(host="127.0.0.1", port=8765, latency=0.0, chunk_delay=0.0):
+    """スタブサーバーを起動して返す (port=0 なら空きポート)。serve_forever は呼び出し側で。"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"latency": latency, "chunk_delay": chunk_delay})
+    return StubServer((host, port), handler)
+
+
+def serve_in_background(**kwargs):
+    """別スレッドでスタブサーバーを起動し、(server, base_url) を返す"""
+    server = serve(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.chunk_delay)
+    print(f"stub server listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,155 @@
+"""
+Solalendar Headless Service (HTTP/JSON)
+
+    python service.py --port 8080
+
+Streamlit を介さずにエンジンを呼び出すための軽量サービス。
+エンジン (swisseph / numpy / openai) は最初のリクエストで初めて import するので、
+起動は標準ライブラリの読み込みだけで済む。
+
+    GET  /health
+    GET  /metrics           single-flight で合流した LLM 呼び出しの件数など
+    POST /tier1/analyze     {"name", "year", "month", "day", "hour", "minute", "lat", "lon", "tz"}
+                            または "place": "札幌" (緯度経度・タイムゾーンを地名辞書から引く)
+                            "date": "2024-02-04" で State 軸の基準日を固定できる (省略時は今日)
+    POST /tier1/events      {"year", "month", "day", "hour", "minute", "days": 3650, "limit": 20}
+                            今後の木星・土星のリターン・トランジット
+    POST /places/search     {"q": "さっぽ", "limit": 10} または {"lat", "lon"} (最寄りの地名)
+    POST /b5v/score         {"answers": {"O1": 5, ...}, "bank": "simple" | "bigfive" | "vals" (省略時 simple)}
+    POST /tier3/integrate   {"tier1": {...}, "tier2": {...}, "api_key": "..." (省略時は OPENAI_API_KEY)}
+"""
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_b5v = None
+
+
+def _tier1_engine(payload):
+    from tier1_engine import SolalendarTier1
+
+    args = (payload.get("name", ""), int(payload["year"]), int(payload["month"]), int(payload["day"]),
+            int(payload.get("hour", 12)), int(payload.get("minute", 0)))
+    if payload.get("place"):
+        return SolalendarTier1.at_place(*args, payload["place"])
+    return SolalendarTier1(
+        *args, float(payload.get("lat", 35.68)), float(payload.get("lon", 139.76)), tz=payload.get("tz"),
+    )
+
+
+def tier1_analyze(payload):
+    from datetime import date
+
+    now = date.fromisoformat(payload["date"]) if payload.get("date") else None
+    return _tier1_engine(payload).analyze(now)
+
+
+def tier1_events(payload):
+    events = _tier1_engine(payload).upcoming_events(days=int(payload.get("days", 3650)),
+                                                    limit=int(payload.get("limit", 20)))
+    return {"events": [e.to_dict() for e in events]}
+
+
+def places_search(payload):
+    from tier1.gazetteer import Gazetteer
+
+    places = Gazetteer.default()
+    if "q" not in payload:
+        place, distance = places.nearest(float(payload["lat"]), float(payload["lon"]))
+        return {"places": [{**place.to_dict(), "distance_km": distance}]}
+    return {"places": [p.to_dict() for p in places.search(payload["q"], int(payload.get("limit", 10)))]}
+
+
+def b5v_score(payload):
+    global _b5v
+    if _b5v is None:
+        from tier2_b5v import SolalendarB5V
+        _b5v = SolalendarB5V()
+    bank = payload.get("bank", "simple")
+    if bank == "bigfive":
+        return _b5v.calculate_bigfive_full(payload["answers"])
+    if bank == "vals":
+        return _b5v.calculate_vals(payload["answers"])
+    return _b5v.calculate_bigfive(payload["answers"])
+
+
+def tier3_integrate(payload):
+    from tier3_engine import SolalendarTier3
+
+    api_key = payload.get("api_key") or os.environ.get("OPENAI_API_KEY", "")
+    return SolalendarTier3(api_key).integrate(payload["tier1"], payload["tier2"])
+
+
+ROUTES = {
+    "/tier1/analyze": tier1_analyze,
+    "/tier1/events": tier1_events,
+    "/places/search": places_search,
+    "/b5v/score": b5v_score,
+    "/tier3/integrate": tier3_integrate,
+}
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # ヘッダーと本文の分割送信で遅延ACK待ちにならないように
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            from llm.singleflight import SingleFlight
+            self._send(200, {"singleflight": SingleFlight.default().stats()})
+        else:
+            self._send(404, {"error": f"unknown path: {self.path}"})
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if handler is None:
+            self._send(404, {"error": f"unknown path: {self.path}"})
+            return
+        try:
+            payload = json.loads(body or b"{}")
+            result = handler(payload)
+        except KeyError as e:
+            self._send(400, {"error": f"missing field: {e.args[0]}"})
+        except (ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            # エンジン内部の想定外の例外でも接続を切らずに JSON で返す (詳細はログへ。logging は起動時間のため遅延 import)
+            import logging
+            logging.getLogger("solalendar.service").exception("unhandled error in %s", self.path)
+            self._send(500, {"error": f"internal error: {type(e).__name__}"})
+        else:
+            self._send(200, result)
+
+    def _send(self, status, data):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Service(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def serve(host="127.0.0.1", port=8080):
+    server = Service((host, port), ServiceHandler)
+    print(f"solalendar service listening on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solalendar headless HTTP/JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,22 +1,103 @@
+import numpy as np
+
+
+def _digit_sum(n):
+    return sum(int(d) for d in str(n))
+
+
 class Tier1Codec:
     """
     L1a: Codec (Encoding)
     物理座標(L0)を数理的カテゴリ(1-9等)へ正規化する計算式。
+
+    YYYYMMDD の数字和は「年の数字和 + 月の数字和 + 日の数字和」に分解できるので、
+    1900-2100年の年テーブルと月・日テーブルを事前計算し、表引きだけで求める。
     """
+
+    YEAR_MIN, YEAR_MAX = 1900, 2100
+
+    # 数字和テーブル (スカラー用 tuple / 配列用 ndarray)
+    YEAR_DIGIT_SUM = tuple(_digit_sum(y) for y in range(YEAR_MIN, YEAR_MAX + 1))
+    MONTH_DIGIT_SUM = tuple(_digit_sum(m) for m in range(13))
+    DAY_DIGIT_SUM = tuple(_digit_sum(d) for d in range(32))
+    # 数字和 (最大 2+9+9+9 + 9 + 9 程度) → 1桁への縮約テーブル
+    REDUCED = tuple(0 if n == 0 else (n - 1) % 9 + 1 for n in range(64))
+
+    _YEAR_TABLE = np.array(YEAR_DIGIT_SUM, dtype=np.int16)
+    _MONTH_TABLE = np.array(MONTH_DIGIT_SUM, dtype=np.int16)
+    _DAY_TABLE = np.array(DAY_DIGIT_SUM, dtype=np.int16)
+    _REDUCED_TABLE = np.array(REDUCED, dtype=np.int8)
+
     @staticmethod
     def reduce_to_single_digit(n):
         """数秘術の基本計算：一桁になるまで足す（Codecの基本ルール）"""
         if n == 0: return 0
         return (n - 1) % 9 + 1
 
+    @staticmethod
+    def digit_sum(year, month, day):
+        """YYYYMMDD の各桁の総和 (テーブル範囲外の年は文字列から計算)"""
+        if Tier1Codec.YEAR_MIN <= year <= Tier1Codec.YEAR_MAX:
+            return (Tier1Codec.YEAR_DIGIT_SUM[year - Tier1Codec.YEAR_MIN]
+                    + Tier1Codec.MONTH_DIGIT_SUM[month] + Tier1Codec.DAY_DIGIT_SUM[day])
+        return sum(int(d) for d in f"{year:04d}{month:02d}{day:02d}")
+
     @staticmethod
     def calculate_lpn(year, month, day):
         """生年月日を1-9のフェーズにマッピングする"""
-        s = sum(int(d) for d in f"{year:04d}{month:02d}{day:02d}")
-        return Tier1Codec.reduce_to_single_digit(s)
+        return Tier1Codec.reduce_to_single_digit(Tier1Codec.digit_sum(year, month, day))
 
     @staticmethod
     def calculate_phase(current_year, birth_month, birth_day):
         """現在の年におけるパーソナル・イヤー・フェーズを算出"""
-        s = sum(int(d) for d in f"{current_year:04d}{birth_month:02d}{birth_day:02d}")
-        return Tier1Codec.reduce_to_single_digit(s)
\ No newline at end of file
+        return Tier1Codec.reduce_to_single_digit(Tier1Codec.digit_sum(current_year, birth_month, birth_day))
+
+    @staticmethod
+    def calculate_personal_month(current_year, current_month, birth_month, birth_day):
+        """パーソナル・マンス = パーソナル・イヤー + 暦月 (L4 Clock)"""
+        year_phase = Tier1Codec.calculate_phase(current_year, birth_month, birth_day)
+        return Tier1Codec.REDUCED[year_phase + Tier1Codec.MONTH_DIGIT_SUM[current_month]]
+
+    @staticmethod
+    def calculate_personal_day(current_year, current_month, current_day, birth_month, birth_day):
+        """パーソナル・デイ = パーソナル・マンス + 暦日 (L4 Clock)"""
+        month_phase = Tier1Codec.calculate_personal_month(current_year, current_month, birth_month, birth_day)
+        return Tier1Codec.REDUCED[month_phase + Tier1Codec.DAY_DIGIT_SUM[current_day]]
+
+    # --- Vectorized (Cohort) ---
+    # 引数は NumPy 配列 (スカラーとの混在も可)。
+    @staticmethod
+    def digit_sum_many(years, months, days):
+        """
+        digit_sum の配列版 (int16配列)。
+        YEAR_MIN-YEAR_MAX の範囲外の年は、年の数字和の代わりに 9 を法として合同な値
+        (年そのものを 1-9 に縮約した値) を使う。縮約後の値 (*_many の結果) は digit_sum と一致する。
+        """
+        years = np.asarray(years, dtype=np.int64)
+        in_table = (years >= Tier1Codec.YEAR_MIN) & (years <= Tier1Codec.YEAR_MAX)
+        year_sum = Tier1Codec._YEAR_TABLE[np.where(in_table, years - Tier1Codec.YEAR_MIN, 0)]
+        if not in_table.all():
+            year_sum = np.where(in_table, year_sum, np.where(years == 0, 0, (years - 1) % 9 + 1)).astype(np.int16)
+        return year_sum + Tier1Codec._MONTH_TABLE[np.asarray(months)] + Tier1Codec._DAY_TABLE[np.asarray(days)]
+
+    @staticmethod
+    def calculate_lpn_many(years, months, days):
+        """calculate_lpn の配列版 (int8配列)"""
+        return Tier1Codec._REDUCED_TABLE[Tier1Codec.digit_sum_many(years, months, days)]
+
+    @staticmethod
+    def calculate_phase_many(current_years, birth_months, birth_days):
+        """calculate_phase の配列版 (current_years はスカラー/配列どちらでも可)"""
+        return Tier1Codec._REDUCED_TABLE[Tier1Codec.digit_sum_many(current_years, birth_months, birth_days)]
+
+    @staticmethod
+    def calculate_personal_month_many(current_years, current_months, birth_months, birth_days):
+        """calculate_personal_month の配列版"""
+        year_phase = Tier1Codec.calculate_phase_many(current_years, birth_months, birth_days)
+        return Tier1Codec._REDUCED_TABLE[year_phase + Tier1Codec._MONTH_TABLE[np.asarray(current_months)]]
+
+    @staticmethod
+    def calculate_personal_day_many(current_years, current_months, current_days, birth_months, birth_days):
+        """calculate_personal_day の配列版"""
+        month_phase = Tier1Codec.calculate_personal_month_many(current_years, current_months, birth_months, birth_days)
+        return Tier1Codec._REDUCED_TABLE[month_phase + Tier1Codec._DAY_TABLE[np.asarray(current_days)]]
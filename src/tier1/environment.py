@@ -0,0 +1,83 @@
+"""
+Tier 1 L3: 今日の環境 (全ユーザー共通の State)
+
+その日の年・日の干支、節気、木星・土星の判定時刻はその日の全員に共通なので、
+日付 (とタイムゾーン) ごとに1回だけ計算してプロセスで共有する。
+
+    env = DailyEnvironment.today()                   # 今日 (サーバーのローカル日付) の環境
+    env = DailyEnvironment.today("Asia/Tokyo")       # タイムゾーンを指定した今日
+    env = DailyEnvironment.for_date(date(2024, 2, 4))   # 基準日を固定 (結果が再現できる)
+    SolalendarTier1(...).analyze_compact(env=env)
+
+today() は「現在のスナップショット」を1つだけ持ち、日付が変わった最初の呼び出しで
+新しいスナップショットを作ってから参照を差し替える。スナップショットは不変なので、
+読み手は差し替えの途中の状態を見ることがない (ロックが要るのは作り直す瞬間だけ)。
+"""
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+
+from tier1.oriental_engine import OrientalEngine
+from tier1.sexagenary import GANZHI_LABELS
+
+
+@dataclass(frozen=True, slots=True)
+class DailyEnvironment:
+    date: date
+    year_gz: int            # 0-59
+    day_gz: int             # 0-59
+    term_position: int      # SolarTermIndex 上の位置 (範囲外は -1)
+    term_angle: int
+    sun_longitude: float
+    term_days_until: int
+    state_jd: float         # 木星・土星のトランジットを評価する時刻 (その日の正午 JST, UT)
+
+    _current = {}           # タイムゾーン (None = ローカル) -> その日の DailyEnvironment
+    _lock = threading.Lock()
+
+    @classmethod
+    def for_date(cls, day):
+        """day の環境 (日付ごとにメモ化)"""
+        return _for_date(cls, day.year, day.month, day.day)
+
+    @classmethod
+    def today(cls, tz=None):
+        """今日の環境。日付が変わったときだけ作り直して差し替える"""
+        today = datetime.now(cls._zone(tz)).date() if tz else date.today()
+        env = cls._current.get(tz)
+        if env is None or env.date != today:
+            with cls._lock:
+                env = cls._current.get(tz)
+                if env is None or env.date != today:
+                    env = cls.for_date(today)
+                    cls._current[tz] = env
+        return env
+
+    @staticmethod
+    def _zone(tz):
+        import pytz
+
+        return pytz.timezone(tz)
+
+    # --- ラベル ---
+    @property
+    def year_ganzhi(self):
+        return GANZHI_LABELS[self.year_gz]
+
+    @property
+    def day_ganzhi(self):
+        return GANZHI_LABELS[self.day_gz]
+
+    @property
+    def solar_term(self):
+        return OrientalEngine.solar_term_dict(self.term_position, self.term_angle, self.sun_longitude,
+                                              self.term_days_until)
+
+
+@lru_cache(maxsize=4096)
+def _for_date(cls, year, month, day):
+    year_gz, day_gz = OrientalEngine.get_sexagenary_codes(year, month, day)
+    term = OrientalEngine.get_solar_term_code(year, month, day)
+    state_jd = OrientalEngine.julian_day_number(year, month, day) - OrientalEngine.TZ_OFFSET_HOURS / 24.0
+    return cls(date(year, month, day), year_gz, day_gz, *term, state_jd)
@@ -0,0 +1,267 @@
+"""
+Tier 1 L0: 出生地の解決 (オフライン地名辞書)
+
+    places = Gazetteer.default()
+    places.search("さっぽ")                  # 前方一致 (人口の多い順) -> [Place, ...]
+    places.lookup("Sapporo")                  # 完全一致 (無ければ None)
+    places.nearest(35.02, 135.76)             # 逆引き -> (Place, 距離 km)
+    Gazetteer.utc_offset("Asia/Tokyo", 1949, 7, 1, 12, 0)   # 10.0 (夏時間)
+
+- 名前の索引はトライ木。各ノードに人口上位 TOP_K 件を事前に持たせてあるので、
+  前方一致の検索は入力文字数ぶんノードを辿るだけ (地名の件数に依存しない)。
+- 名前は NFKC・小文字化・ラテン文字のアクセント除去・カタカナ→ひらがなで正規化し、
+  空白や記号は無視する ("sao paulo" / "São Paulo" / "さんぱうろ" はどれも一致)。
+- 逆引きは単位球面上の3次元座標の KD 木 (弦距離で最近傍を探し、大円距離に換算)。
+- UTC オフセットは pytz の履歴データ (LMT・夏時間を含む) から求め、(タイムゾーン, 日付) ごとに
+  メモ化する。その日の中でオフセットが変わる切替日だけは時刻ごとに求め直す。
+
+同梱の data/places.tsv は主要都市 (日本の都道府県庁所在地・政令市など + 世界の主要都市) の
+小さな辞書。GeoNames の cities*.txt から作り直すこともできる:
+
+    python -m tier1.gazetteer cities15000.txt --min-population 100000
+"""
+import csv
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+_IGNORED = re.compile(r"[\s\-\.'’,・･()（）]")
+_KATAKANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}  # ァ-ヶ → ぁ-ゖ
+
+
+def normalize_name(name):
+    """索引用の正規化 (大文字小文字・全角半角・アクセント・カタカナ/ひらがな・空白記号を区別しない)"""
+    text = unicodedata.normalize("NFKC", name).casefold()
+    # アクセント除去はラテン文字だけ (かなの濁点は残す)
+    text = "".join(unicodedata.normalize("NFKD", c)[0] if "À" <= c <= "ɏ" else c for c in text)
+    return _IGNORED.sub("", text).translate(_KATAKANA)
+
+
+@dataclass(frozen=True, slots=True)
+class Place:
+    name: str
+    alt_names: tuple     # 別名 (日本語表記・読み・旧称など)
+    country: str         # ISO 3166-1 alpha-2
+    lat: float
+    lon: float
+    tz: str              # IANA タイムゾーン名
+    population: int
+
+    @property
+    def label(self):
+        return f"{self.alt_names[0]} ({self.name})" if self.alt_names else self.name
+
+    def utc_offset(self, year, month, day, hour=12, minute=0):
+        """この地点の現地時刻の UTC オフセット (時間)"""
+        return Gazetteer.utc_offset(self.tz, year, month, day, hour, minute)
+
+    def to_dict(self):
+        return {"name": self.name, "label": self.label, "country": self.country,
+                "lat": self.lat, "lon": self.lon, "tz": self.tz, "population": self.population}
+
+
+@lru_cache(maxsize=8192)
+def _day_offsets(tz, year, month, day):
+    """(その日の 0:00 の UTC オフセット, 23:59 のオフセット) (時間)"""
+    import pytz
+
+    zone = pytz.timezone(tz)
+    start = zone.localize(datetime(year, month, day), is_dst=False).utcoffset()
+    end = zone.localize(datetime(year, month, day, 23, 59, 59), is_dst=False).utcoffset()
+    return start.total_seconds() / 3600.0, end.total_seconds() / 3600.0
+
+
+class _KDTree:
+    """単位球面上の点 (n, 3) の最近傍探索。index を中央値で分割した暗黙の木として持つ"""
+
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points.tolist()]
+        index = np.arange(len(points))
+        axis = np.zeros(len(points), dtype=np.int64)
+        self._build(points, index, axis, 0, len(points))
+        self.index, self.axis = index.tolist(), axis.tolist()
+
+    @classmethod
+    def _build(cls, points, index, axis, lo, hi):
+        if hi - lo <= 1:
+            return
+        segment = index[lo:hi]
+        coords = points[segment]
+        split = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))  # 広がりの最も大きい軸
+        mid = (lo + hi) // 2
+        index[lo:hi] = segment[np.argpartition(coords[:, split], mid - lo)]
+        axis[mid] = split
+        cls._build(points, index, axis, lo, mid)
+        cls._build(points, index, axis, mid + 1, hi)
+
+    def nearest(self, q):
+        """(弦距離の2乗, 点の番号)"""
+        return self._nearest(0, len(self.index), q, (math.inf, -1))
+
+    def _nearest(self, lo, hi, q, best):
+        if lo >= hi:
+            return best
+        mid = (lo + hi) // 2
+        i = self.index[mid]
+        p = self.points[i]
+        d = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+        if d < best[0]:
+            best = (d, i)
+        axis = self.axis[mid]
+        diff = q[axis] - p[axis]
+        near, far = ((mid + 1, hi), (lo, mid)) if diff > 0 else ((lo, mid), (mid + 1, hi))
+        best = self._nearest(*near, q, best)
+        if diff * diff < best[0]:
+            best = self._nearest(*far, q, best)
+        return best
+
+
+def _unit_vector(lat, lon):
+    phi, lam = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)], axis=-1)
+
+
+class Gazetteer:
+    TOP_K = 10  # トライ木の各ノードに持たせる候補数 (これ以下の limit は辿るだけで返せる)
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "places.tsv")
+    COLUMNS = ("name", "alt_names", "country", "lat", "lon", "tz", "population")
+
+    _default = None
+
+    def __init__(self, places):
+        # 人口の多い順に並べておくと、トライ木の候補も先着順でそのまま人口順になる
+        self.places = sorted(places, key=lambda p: -p.population)
+        self._trie = {"": []}
+        self._exact = {}
+        for i, place in enumerate(self.places):
+            for key in dict.fromkeys(normalize_name(n) for n in (place.name, *place.alt_names)):
+                if key:
+                    self._exact.setdefault(key, []).append(i)
+                    self._insert(key, i)
+        self._tree = _KDTree(_unit_vector(np.array([p.lat for p in self.places]),
+                                          np.array([p.lon for p in self.places])))
+
+    def _insert(self, key, i):
+        node = self._trie
+        for c in key:
+            if len(node[""]) < self.TOP_K and i not in node[""]:
+                node[""].append(i)
+            node = node.setdefault(c, {"": []})
+        if len(node[""]) < self.TOP_K and i not in node[""]:
+            node[""].append(i)
+
+    # --- 構築・永続化 ---
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+            return cls([Place(r["name"], tuple(n for n in r["alt_names"].split(",") if n), r["country"],
+                              float(r["lat"]), float(r["lon"]), r["tz"], int(r["population"]))
+                        for r in rows])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write("\t".join(self.COLUMNS) + "\n")
+            for p in self.places:
+                f.write(f"{p.name}\t{','.join(p.alt_names)}\t{p.country}\t{p.lat:.3f}\t{p.lon:.3f}\t"
+                        f"{p.tz}\t{p.population}\n")
+
+    @classmethod
+    def default(cls):
+        """同梱の地名辞書"""
+        if cls._default is None:
+            cls._default = cls.load(cls.DEFAULT_PATH)
+        return cls._default
+
+    @classmethod
+    def from_geonames(cls, path, min_population=15000, countries=None):
+        """GeoNames の cities*.txt (タブ区切り) から作る。別名は日本語表記のものだけ残す"""
+        japanese = re.compile(r"[぀-ヿ一-鿿]")
+        places = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                row = line.rstrip("\n").split("\t")
+                population = int(row[14] or 0)
+                if population < min_population or (countries and row[8] not in countries):
+                    continue
+                alt_names = tuple(dict.fromkeys(n for n in row[3].split(",") if japanese.search(n)))
+                if row[2] != row[1]:
+                    alt_names += (row[2],)  # ASCII 表記
+                places.append(Place(row[1], alt_names, row[8], float(row[4]), float(row[5]), row[17], population))
+        return cls(places)
+
+    # --- 名前 ---
+    def search(self, prefix, limit=10):
+        """名前 (別名を含む) の前方一致。人口の多い順に最大 limit 件"""
+        node = self._trie
+        for c in normalize_name(prefix):
+            node = node.get(c)
+            if node is None:
+                return []
+        if limit <= self.TOP_K:
+            return [self.places[i] for i in node[""][:limit]]
+        # TOP_K を超える件数が要る場合だけ部分木を全て辿る
+        found, stack = set(), [node]
+        while stack:
+            current = stack.pop()
+            found.update(current[""])
+            stack.extend(child for c, child in current.items() if c)
+        return [self.places[i] for i in sorted(found)[:limit]]
+
+    def lookup(self, name):
+        """名前 (別名を含む) の完全一致。同名が複数あれば人口の最も多い地点"""
+        ids = self._exact.get(normalize_name(name))
+        return self.places[ids[0]] if ids else None
+
+    # --- 座標 ---
+    def nearest(self, lat, lon):
+        """(最寄りの地点, 大円距離 km)"""
+        phi, lam = math.radians(lat), math.radians(lon)
+        d2, i = self._tree.nearest((math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)))
+        return self.places[i], 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(d2) / 2.0))
+
+    # --- タイムゾーン ---
+    @staticmethod
+    def utc_offset(tz, year, month, day, hour=12, minute=0):
+        """
+        IANA タイムゾーン tz の現地時刻の UTC オフセット (時間、LMT・夏時間を含む)。
+        切替で存在しない・重複する時刻は標準時として扱う。
+        """
+        start, end = _day_offsets(tz, year, month, day)
+        if start == end:
+            return start
+        # 切替日だけは時刻ごとに求める
+        import pytz
+
+        local = datetime(year, month, day, hour, minute)
+        return pytz.timezone(tz).localize(local, is_dst=False).utcoffset().total_seconds() / 3600.0
+
+    @staticmethod
+    def utc_offset_many(tz, year, month, day, hour=12, minute=0):
+        """utc_offset の配列版 (同じ日付の行はメモを共有する)"""
+        year, month, day, hour, minute = np.broadcast_arrays(year, month, day, hour, minute)
+        tz = np.broadcast_to(np.asarray(tz, dtype=object), year.shape)
+        return np.array([Gazetteer.utc_offset(*row) for row in zip(
+            tz.tolist(), year.tolist(), month.tolist(), day.tolist(), hour.tolist(), minute.tolist())],
+            dtype=np.float64).reshape(year.shape)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GeoNames の cities*.txt から地名辞書を生成する")
+    parser.add_argument("source")
+    parser.add_argument("--min-population", type=int, default=100000)
+    parser.add_argument("--countries", nargs="*", help="国コードで絞る (例: JP US)")
+    parser.add_argument("-o", "--output", default=Gazetteer.DEFAULT_PATH)
+    args = parser.parse_args()
+
+    Gazetteer.from_geonames(args.source, args.min_population, args.countries).save(args.output)
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import swisseph as swe
+
+
+class HouseCalculator:
+    """
+    Tier 1 L5: ハウス計算 (Batch + Memo)
+    (jd, lat, lon) の配列を受け取り、全カスプ (12) と感受点 (ASC / MC / Vertex / ARMC) を
+    配列で返す。ハウス方式は HOUSE_SYSTEMS の名前か swisseph の1文字コードで指定する。
+
+    メモ化: (jd, lat, lon) そのもの (丸めない) をキーに結果を保持する。計算は常に入力どおりの値で行う。
+    同じ人のチャートを繰り返し求める場合 (Tier1 の再解析など) と、バッチ内で
+    完全に同じ (jd, lat, lon) の行が重なる場合だけ swe.houses の呼び出しを省ける。
+    出生時刻が異なれば (同じ出生地でも) ARMC が変わるので共有できる計算はない。
+
+    極圏: Placidus / Koch などは極圏内で定義できず swe.houses が例外を投げる。
+    polar_fallback (既定: Porphyry) の方式で計算し直し、その行は fallback=True になる。
+    polar_fallback=None の場合は NaN を返す (バッチの途中で例外にはしない)。
+    """
+
+    HOUSE_SYSTEMS = {
+        "placidus": b'P',
+        "koch": b'K',
+        "porphyry": b'O',
+        "regiomontanus": b'R',
+        "campanus": b'C',
+        "alcabitius": b'B',
+        "equal": b'E',
+        "whole_sign": b'W',
+        "meridian": b'X',
+        "morinus": b'M',
+        "topocentric": b'T',
+    }
+
+    MAX_ENTRIES = 100_000
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, system="placidus", polar_fallback="porphyry", max_entries=None):
+        self.system = self._system_code(system)
+        self.polar_fallback = self._system_code(polar_fallback) if polar_fallback is not None else None
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self._memo = OrderedDict()  # (jd, lat, lon) -> (cusps, ascmc, fallback)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def _system_code(cls, system):
+        if isinstance(system, str):
+            if system not in cls.HOUSE_SYSTEMS:
+                raise ValueError(f"unknown house system: {system!r} (choose from {sorted(cls.HOUSE_SYSTEMS)})")
+            return cls.HOUSE_SYSTEMS[system]
+        if system not in cls.HOUSE_SYSTEMS.values():
+            raise ValueError(f"unsupported house system code: {system!r}")
+        return system
+
+    @classmethod
+    def for_system(cls, system="placidus"):
+        """方式ごとにプロセスで共有されるインスタンス (メモも共有)"""
+        code = cls._system_code(system)
+        instance = cls._instances.get(code)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.setdefault(code, cls(code))
+        return instance
+
+    def _compute_key(self, key):
+        jd, lat, lon = key
+        try:
+            cusps, ascmc = swe.houses(jd, lat, lon, self.system)
+            return cusps[:12], ascmc, False
+        except swe.Error:
+            if self.polar_fallback is None:
+                return (float("nan"),) * 12, (float("nan"),) * 8, True
+            cusps, ascmc = swe.houses(jd, lat, lon, self.polar_fallback)
+            return cusps[:12], ascmc, True
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = self._compute_key(key)
+        with self._lock:
+            self._memo[key] = entry
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return entry
+
+    # --- 計算 ---
+    def compute_one(self, jd, lat, lon):
+        """1件分: (cusps(12), ascmc(8), fallback) のタプル (ascmc は swe.houses と同じ並び)"""
+        return self._lookup((float(jd), float(lat), float(lon)))
+
+    def ascendant(self, jd, lat, lon):
+        return self.compute_one(jd, lat, lon)[1][0]
+
+    def compute(self, jd, lat, lon):
+        """
+        配列版。戻り値は dict:
+          cusps (n, 12), asc / mc / vertex / armc (n,), fallback (n,) bool
+        """
+        jd, lat, lon = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (jd, lat, lon)))
+        keys = np.stack([jd.ravel(), lat.ravel(), lon.ravel()], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+
+        keys = list(map(tuple, unique.tolist()))
+        # メモの参照・登録はロックを1回ずつ取ってまとめて行う
+        with self._lock:
+            memo = self._memo
+            entries = [memo.get(key) for key in keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        for i in missing:
+            entries[i] = self._compute_key(keys[i])
+        with self._lock:
+            for key, entry in zip(keys, entries):
+                memo[key] = entry
+                memo.move_to_end(key)
+            while len(memo) > self.max_entries:
+                memo.popitem(last=False)
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+
+        cusps = np.array([entry[0] for entry in entries], dtype=np.float64).reshape(len(keys), 12)
+        ascmc = np.array([entry[1][:4] for entry in entries], dtype=np.float64).reshape(len(keys), 4)
+        fallback = np.array([entry[2] for entry in entries], dtype=bool)
+
+        inverse = inverse.ravel()
+        # ascmc の並びは swe.houses と同じ (ASC, MC, ARMC, Vertex, ...)
+        return {
+            "cusps": cusps[inverse],
+            "asc": ascmc[inverse, 0],
+            "mc": ascmc[inverse, 1],
+            "vertex": ascmc[inverse, 3],
+            "armc": ascmc[inverse, 2],
+            "fallback": fallback[inverse],
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+            self.hits = self.misses = 0
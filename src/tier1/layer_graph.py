@@ -0,0 +1,65 @@
+import threading
+
+
+class LayerGraph:
+    """
+    Tier 1 レイヤーの依存グラフ (入力 → レイヤー)
+    各ノードは依存先 (入力または先に登録したノード) の値が変わったときだけ再計算し、
+    それ以外は前回の値を再利用する。直近の evaluate() で再利用・再計算したノードは
+    last_report に残る。
+
+        graph = LayerGraph(("year", "month", "day"))
+        graph.node("lpn", ("year", "month", "day"), Tier1Codec.calculate_lpn)
+        values, report = graph.evaluate(year=1974, month=11, day=4)
+    """
+
+    def __init__(self, inputs):
+        self.inputs = tuple(inputs)
+        self._nodes = []                                  # [(name, deps, fn)] (登録順 = 評価順)
+        self._values = {}                                 # name -> 値 (入力とノード)
+        self._versions = dict.fromkeys(self.inputs, 0)    # name -> 値が変わった回数
+        self._memo_keys = {}                              # ノード -> 前回計算時の依存先バージョン
+        self._lock = threading.Lock()
+        self.last_report = None
+
+    def node(self, name, deps, fn):
+        unknown = [d for d in deps if d not in self._versions]
+        if unknown:
+            raise ValueError(f"node {name!r} depends on unknown inputs/nodes: {unknown}")
+        if name in self._versions:
+            raise ValueError(f"duplicate node: {name!r}")
+        self._nodes.append((name, tuple(deps), fn))
+        self._versions[name] = 0
+        return self
+
+    def evaluate(self, **inputs):
+        """入力を更新して全ノードを評価する。({名前: 値}, {"recomputed": [...], "reused": [...]}) を返す"""
+        missing = [k for k in self.inputs if k not in inputs]
+        if missing:
+            raise ValueError(f"missing inputs: {missing}")
+
+        with self._lock:
+            values, versions = self._values, self._versions
+            for key in self.inputs:
+                value = inputs[key]
+                if key not in values or values[key] != value:
+                    values[key] = value
+                    versions[key] += 1
+
+            recomputed, reused = [], []
+            for name, deps, fn in self._nodes:
+                memo_key = tuple(versions[d] for d in deps)
+                if self._memo_keys.get(name) == memo_key:
+                    reused.append(name)
+                    continue
+                value = fn(*(values[d] for d in deps))
+                # 再計算しても値が同じなら依存ノードは再利用できる
+                if name not in values or values[name] != value:
+                    values[name] = value
+                    versions[name] += 1
+                self._memo_keys[name] = memo_key
+                recomputed.append(name)
+
+            report = {"recomputed": recomputed, "reused": reused}
+            self.last_report = report
+            return dict(values), report
@@ -1,15 +1,18 @@
 import swisseph as swe
+from tier1 import sexagenary
+from tier1.sexagenary import SexagenaryCalculator
+from tier1.solar_terms import SolarTermIndex
 
 class OrientalEngine:
     """
     Tier 1 Class C & B Engine
-    - Class C: Sexagenary Cycle (六十干支) for Year/Day
+    - Class C: Sexagenary Cycle (六十干支) for Year/Day (四柱は tier1.sexagenary)
     - Class B: 24 Solar Terms (二十四節気) using Astronomical Logic
     """
 
-    # 六十干支データ
-    HEAVENLY_STEMS = ["甲 (Wood+)", "乙 (Wood-)", "丙 (Fire+)", "丁 (Fire-)", "戊 (Earth+)", "己 (Earth-)", "庚 (Metal+)", "辛 (Metal-)", "壬 (Water+)", "癸 (Water-)"]
-    EARTHLY_BRANCHES = ["子 (Rat)", "丑 (Ox)", "寅 (Tiger)", "卯 (Rabbit)", "辰 (Dragon)", "巳 (Snake)", "午 (Horse)", "未 (Sheep)", "申 (Monkey)", "酉 (Rooster)", "戌 (Dog)", "亥 (Boar)"]
+    # 六十干支データ (tier1.sexagenary と共有)
+    HEAVENLY_STEMS = sexagenary.HEAVENLY_STEMS
+    EARTHLY_BRANCHES = sexagenary.EARTHLY_BRANCHES
     
     # 二十四節気データ (太陽黄経基準)
     # 0度=春分, 15度=清明... 315度=立春
@@ -27,56 +30,96 @@ class OrientalEngine:
     @staticmethod
     def get_sexagenary_cycle(year, month, day):
         """
-        年・日の干支を計算
+        年・日の干支を計算 (整数演算のみ、swisseph 不使用)
+        年干支は立春で切り替わる (1984年立春 = 甲子(0) が基準)
         """
-        # 年干支 (1984年 = 甲子(0) を基準とする簡易計算)
-        y_offset = (year - 1984) % 60
-        year_ganzhi = OrientalEngine._index_to_ganzhi(y_offset)
+        y_offset, d_offset = OrientalEngine.get_sexagenary_codes(year, month, day)
+        return {"year_ganzhi": sexagenary.GANZHI_LABELS[y_offset], "day_ganzhi": sexagenary.GANZHI_LABELS[d_offset]}
 
-        # 日干支 (JDNを使用)
-        # JDN計算時には正午(12.0)を指定して日付ズレを防ぐ
-        jd = swe.julday(year, month, day, 12.0)
-        # 基準値の補正 (この定数は暦の連続性に基づく)
-        d_offset = int(jd - 11) % 60
-        day_ganzhi = OrientalEngine._index_to_ganzhi(d_offset)
+    @staticmethod
+    def get_sexagenary_codes(year, month, day):
+        """get_sexagenary_cycle の整数コード版: (年干支, 日干支) の 0-59 インデックス"""
+        jdn = sexagenary.julian_day_number(year, month, day)
+        try:
+            y_offset = SexagenaryCalculator.default().year_pillar(year, month, day)
+        except ValueError:
+            # 節気の暦表の範囲外はグレゴリオ暦の年で近似する
+            y_offset = (year - 1984) % 60
+        # 日干支 (JDN基準。この定数は暦の連続性に基づく)
+        d_offset = (jdn - 11) % 60
+        return y_offset, d_offset
 
-        return {"year_ganzhi": year_ganzhi, "day_ganzhi": day_ganzhi}
+    julian_day_number = staticmethod(sexagenary.julian_day_number)
+
+    @staticmethod
+    def get_sexagenary_indices(years, months, days):
+        """
+        get_sexagenary_cycle の配列版 (Cohort用)
+        干支を文字列ではなく 0-59 のインデックス配列 (year_index, day_index) で返す。
+        """
+        pillars = SexagenaryCalculator.default().pillars(years, months, days)
+        return pillars["year"], pillars["day"]
 
     @staticmethod
     def _index_to_ganzhi(index):
-        if index < 0: index += 60
-        stem = OrientalEngine.HEAVENLY_STEMS[index % 10]
-        branch = OrientalEngine.EARTHLY_BRANCHES[index % 12]
-        return f"{stem}{branch}"
+        return sexagenary.GANZHI_LABELS[index % 60]
+
+    # 日付の区切りに使うタイムゾーン (国立天文台「暦要項」と同じ JST)
+    TZ_OFFSET_HOURS = 9.0
 
     @staticmethod
     def get_solar_term(year, month, day):
         """
         指定された日付の二十四節気を取得 (Class B Logic)
+        節入り時刻の暦表 (SolarTermIndex) を二分探索するので swisseph は呼ばない。
+        節入りした日はその日から新しい節気とみなす (日付の終わり時点で判定)。
         """
-        # 今日の太陽黄経を計算
+        return OrientalEngine.solar_term_dict(*OrientalEngine.get_solar_term_code(year, month, day))
+
+    @staticmethod
+    def get_solar_term_code(year, month, day):
+        """
+        get_solar_term の整数コード版: (暦表上の位置, 黄経の角度, 太陽黄経, 次の節入りまでの日数)
+        暦表の範囲外の日付は位置・日数とも -1 になる。
+        """
+        index = SolarTermIndex.default()
+        day_start = OrientalEngine.julian_day_number(year, month, day) - 0.5 - OrientalEngine.TZ_OFFSET_HOURS / 24.0
+        i = index.position(day_start + 1.0)
+        if i is None or i + 1 >= len(index.jd):
+            return OrientalEngine._get_solar_term_swe(year, month, day)
+        # 次の節入り日までの日数 (暦日)
+        days_until = int((index.next_jd(i) - day_start) // 1.0)
+        return i, index.angle(i), index.longitude(i, day_start + 0.5), days_until
+
+    @staticmethod
+    def solar_term_dict(position, angle, longitude, days_until):
+        """get_solar_term_code の結果を get_solar_term の dict 形式に展開する"""
+        if position < 0:
+            return {"name": OrientalEngine.SOLAR_TERMS[angle], "longitude": longitude, "angle": angle}
+        index = SolarTermIndex.default()
+        next_angle = index.angle(position + 1)
+        return {
+            "name": OrientalEngine.SOLAR_TERMS[angle],
+            "longitude": longitude,
+            "angle": angle,
+            "start_jd": index.start_jd(position),
+            "next": {
+                "name": OrientalEngine.SOLAR_TERMS[next_angle],
+                "angle": next_angle,
+                "start_jd": index.next_jd(position),
+                "days_until": days_until,
+            },
+        }
+
+    @staticmethod
+    def _get_solar_term_swe(year, month, day):
+        """暦表の範囲外の日付用: swisseph で正午の太陽黄経から直接求める"""
         jd = swe.julday(year, month, day, 12.0)
-        
-        # 【修正点】swe.calc_ut は ((long, lat, dist...), flags) というタプルを返す
-        # [0]で座標タプルを取り出し、さらに[0]で黄経(longitude)を取り出す
+
+        # swe.calc_ut は ((long, lat, dist...), flags) というタプルを返す
         res = swe.calc_ut(jd, swe.SUN)
-        sun_longitude = res[0][0] 
-        
-        # 太陽黄経(0-360)に基づいて、直前の節気を探す
-        # 辞書のキー(角度)を昇順にソート
-        sorted_keys = sorted(OrientalEngine.SOLAR_TERMS.keys())
-        
-        # デフォルト（該当なしの場合の安全策）
-        current_term_name = "Unknown"
-        
-        # 0度から順に見ていき、現在の黄経を超えない最大の角度を採用する
-        # 例: sun=10 なら 0(春分)を採用。 sun=350 なら 345(啓蟄)を採用。
-        target_angle = 0
-        for k in sorted_keys:
-            if sun_longitude >= k:
-                target_angle = k
-                current_term_name = OrientalEngine.SOLAR_TERMS[k]
-            else:
-                break
-        
-        return {"name": current_term_name, "longitude": sun_longitude}
\ No newline at end of file
+        sun_longitude = res[0][0]
+
+        # 節気は15度刻みなので、直前の節気の角度は切り捨てで求まる
+        angle = int(sun_longitude // 15) * 15
+        return -1, angle, sun_longitude, -1
@@ -0,0 +1,240 @@
+"""
+Tier 1 Cohort Parallel Executor
+
+    with CohortExecutor(workers=32) as ex:
+        result = ex.analyze_many(records)            # SolalendarTier1.analyze_many と同じ形
+        houses = ex.houses(jd, lat, lon, "placidus")  # HouseCalculator.compute と同じ形
+
+swisseph は GIL を握ったまま計算するのでスレッドでは並列化できない。入力列を共有メモリに
+置き、大きめのチャンク (行範囲) 単位でプロセスプールに割り当てる。ワーカーは結果を
+親が確保した共有メモリの出力列に直接書き込み、戻り値は行数だけなので pickle されるのは
+(共有メモリ名, 行範囲) の小さなタプルだけになる。
+ワーカーは起動時に1回だけ暦表・エフェメリスのパスを初期化する。
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 1チャンクの最小行数 (これより細かく分けると IPC とタスク管理のコストが目立つ)
+MIN_CHUNK = 50_000
+# ワーカーあたりのチャンク数 (負荷の偏りを均すため数個に分ける)
+CHUNKS_PER_WORKER = 4
+
+ANALYZE_COLUMNS = ("year", "month", "day", "hour", "minute", "lat", "lon", "utc_offset")
+ANALYZE_DEFAULTS = {"hour": 12, "minute": 0, "lat": 35.68, "lon": 139.76, "utc_offset": 0}
+
+
+# ---------------------------------------------------------------------------
+# 共有メモリ上の列
+# ---------------------------------------------------------------------------
+class _SharedColumns:
+    """名前付きの1次元/2次元配列を共有メモリに置く。spec (pickle 可能) でワーカーから開ける"""
+
+    def __init__(self, shapes_and_dtypes):
+        self.blocks = {}
+        self.arrays = {}
+        self.spec = {}
+        for name, (shape, dtype) in shapes_and_dtypes.items():
+            dtype = np.dtype(dtype)
+            size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            block = shared_memory.SharedMemory(create=True, size=size)
+            self.blocks[name] = block
+            self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            self.spec[name] = (block.name, shape, dtype.str)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        shared = cls({name: (a.shape, a.dtype) for name, a in arrays.items()})
+        for name, a in arrays.items():
+            shared.arrays[name][...] = a
+        return shared
+
+    def copy_out(self):
+        return {name: np.array(a) for name, a in self.arrays.items()}
+
+    def close(self):
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _attach(spec):
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        # ワーカーは親の resource tracker を共有している (親が共有メモリを作った後にプールを
+        # 起動する) ので、ここでの登録は親の登録と重なるだけ。unlink は親が行う
+        block = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+# ---------------------------------------------------------------------------
+# ワーカー側
+# ---------------------------------------------------------------------------
+def _init_worker(ephe_path):
+    import swisseph as swe
+    from tier1.sexagenary import SexagenaryCalculator
+    from tier1.solar_terms import SolarTermIndex
+
+    if ephe_path:
+        swe.set_ephe_path(ephe_path)
+    # 暦表の読み込みはワーカーごとに1回
+    SolarTermIndex.default()
+    SexagenaryCalculator.default()
+
+
+def _task_analyze_many(columns, now):
+    from tier1_engine import SolalendarTier1
+
+    result = SolalendarTier1.analyze_many(columns, now=now)
+    return _flatten_axes(result)
+
+
+def _task_houses(columns, system, polar_fallback):
+    from tier1.houses import HouseCalculator
+
+    calculator = HouseCalculator(system, polar_fallback=polar_fallback)
+    return calculator.compute(columns["jd"], columns["lat"], columns["lon"])
+
+
+_TASKS = {
+    "analyze_many": _task_analyze_many,
+    "houses": _task_houses,
+}
+
+
+def _run_chunk(task, in_spec, out_spec, start, stop, args):
+    blocks = []
+    try:
+        _compute_chunk(task, blocks, in_spec, out_spec, start, stop, args)
+        return stop - start
+    finally:
+        # 共有メモリ上の配列 (ビュー) は _compute_chunk のローカル変数と一緒に解放済み
+        for block in blocks:
+            block.close()
+
+
+def _compute_chunk(task, blocks, in_spec, out_spec, start, stop, args):
+    in_blocks, inputs = _attach(in_spec)
+    blocks.extend(in_blocks)
+    out_blocks, outputs = _attach(out_spec)
+    blocks.extend(out_blocks)
+    columns = {name: a[start:stop] for name, a in inputs.items()}
+    result = _TASKS[task](columns, *args)
+    for name, out in outputs.items():
+        out[start:stop] = result[name]
+
+
+def _flatten_axes(result):
+    return {f"{axis}.{key}": value for axis in ("trait_axis", "state_axis") for key, value in result[axis].items()}
+
+
+# ---------------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------------
+class CohortExecutor:
+    """
+    プロセスプールで Tier 1 のコホート計算を並列に実行する。
+    プールは with ブロック (または close() まで) の間使い回す。
+    """
+
+    def __init__(self, workers=None, ephe_path=None, chunk_size=None, mp_context="spawn"):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.ephe_path = ephe_path if ephe_path is not None else os.environ.get("SE_EPHE_PATH")
+        self._context = multiprocessing.get_context(mp_context)
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=self._context,
+                                             initializer=_init_worker, initargs=(self.ephe_path,))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _chunks(self, n):
+        size = self.chunk_size or max(MIN_CHUNK, math.ceil(n / (self.workers * CHUNKS_PER_WORKER)))
+        return [(start, min(start + size, n)) for start in range(0, n, size)]
+
+    def _run(self, task, inputs, out_shapes, args):
+        """inputs を共有メモリに置き、チャンクごとにワーカーで task を実行して出力列を返す"""
+        n = len(next(iter(inputs.values())))
+        with _SharedColumns.from_arrays(inputs) as shared_in, _SharedColumns(out_shapes) as shared_out:
+            chunks = self._chunks(n)
+            if len(chunks) <= 1 or self.workers == 1:
+                # 小さい入力はプロセスを使わずにその場で計算する
+                for start, stop in chunks:
+                    _run_chunk(task, shared_in.spec, shared_out.spec, start, stop, args)
+            else:
+                pool = self._get_pool()
+                futures = [pool.submit(_run_chunk, task, shared_in.spec, shared_out.spec, start, stop, args)
+                           for start, stop in chunks]
+                for future in futures:
+                    future.result()
+            return shared_out.copy_out()
+
+    # --- 公開 API ---
+    def analyze_many(self, records, now=None):
+        """SolalendarTier1.analyze_many の並列版 (結果の形も同じ)"""
+        from datetime import datetime
+
+        from tier1_engine import SolalendarTier1
+
+        now = now or datetime.now()
+        n = len(records["year"])
+        inputs = {}
+        for column in ANALYZE_COLUMNS:
+            value = records.get(column, ANALYZE_DEFAULTS.get(column))
+            dtype = np.int64 if column in ("year", "month", "day") else np.float64
+            inputs[column] = np.ascontiguousarray(np.broadcast_to(np.asarray(value, dtype=dtype), n))
+
+        # 出力列の dtype と、全員共通の部分 (metadata / environment) は先頭1件から決める
+        sample = SolalendarTier1.analyze_many({k: v[:1] for k, v in inputs.items()}, now=now)
+        out_shapes = {name: ((n,) + a.shape[1:], a.dtype) for name, a in _flatten_axes(sample).items()}
+        flat = self._run("analyze_many", inputs, out_shapes, (now,))
+
+        result = {"metadata": {**sample["metadata"], "count": n}, "trait_axis": {}, "state_axis": {},
+                  "environment": sample["environment"]}
+        for name, a in flat.items():
+            axis, key = name.split(".", 1)
+            result[axis][key] = a
+        return result
+
+    def houses(self, jd, lat, lon, system="placidus", polar_fallback="porphyry"):
+        """HouseCalculator.compute の並列版"""
+        jd, lat, lon = (np.ascontiguousarray(a, dtype=np.float64) for a in np.broadcast_arrays(jd, lat, lon))
+        n = len(jd)
+        out_shapes = {
+            "cusps": ((n, 12), np.float64),
+            "asc": ((n,), np.float64),
+            "mc": ((n,), np.float64),
+            "vertex": ((n,), np.float64),
+            "armc": ((n,), np.float64),
+            "fallback": ((n,), np.bool_),
+        }
+        return self._run("houses", {"jd": jd, "lat": lat, "lon": lon}, out_shapes, (system, polar_fallback))
@@ -0,0 +1,365 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+@dataclass(frozen=True, slots=True)
+class ReturnEvent:
+    """1件のイベント (jd は UT のユリウス日)"""
+    jd: float
+    planet: str        # "jupiter" / "saturn"
+    aspect: int        # 出生時の位置からの角度 (0 = リターン, 90 / 180 / 270)
+    kind: str          # "exact" (アスペクト成立) / "enter" / "exit" (リターンのオーブに出入り)
+    retrograde: bool   # 逆行中の通過か
+
+    @property
+    def aspect_name(self):
+        return PlanetReturnIndex.ASPECT_NAMES[self.aspect]
+
+    @property
+    def datetime(self):
+        """UT の日時"""
+        return datetime(2000, 1, 1, 12) + timedelta(days=self.jd - 2451545.0)
+
+    def to_dict(self):
+        return {"jd": self.jd, "datetime": self.datetime.isoformat(timespec="seconds"),
+                "planet": self.planet, "aspect": self.aspect_name, "kind": self.kind,
+                "retrograde": self.retrograde}
+
+
+class _Crossings:
+    """1人・1惑星分の通過 (格子の区間 [lo, hi] で挟んだ根。正確な時刻は必要になった時点で求める)"""
+    __slots__ = ("lo", "hi", "jd", "exact", "retrograde", "targets", "kinds")
+
+    def __init__(self, lo, hi, jd, targets, kinds):
+        self.lo, self.hi = lo, hi
+        self.jd = jd                        # 格子上の線形補間による近似 (exact[i] なら確定値)
+        self.exact = [False] * len(jd)
+        self.retrograde = [False] * len(jd)
+        self.targets = targets              # 通過する黄経
+        self.kinds = kinds
+
+
+class ReturnEvents:
+    """
+    1人分のイベント一覧 (PlanetReturnIndex.events() が返す。出生時刻ごとにキャッシュされる)
+    リターン期間の判定はオーブの出入り時刻の二分探索だけで行い、ephemeris は
+    問い合わせ時刻がどれかの根の挟み込み区間 (格子1区間) に入ったときだけ呼ぶ。
+    """
+
+    def __init__(self, index, birth_jd, natal, crossings, end_jd):
+        self.index = index
+        self.birth_jd = birth_jd
+        self.natal = natal              # 惑星名 -> 出生時の黄経
+        self._crossings = crossings     # (惑星名, 角度) -> _Crossings  (角度 None = オーブ境界)
+        self.end_jd = end_jd            # この日時まではイベントを網羅している
+        self._lock = threading.Lock()
+
+    def covers(self, jd):
+        return self.birth_jd <= jd < self.end_jd
+
+    def _refine(self, planet, c, i):
+        if not c.exact[i]:
+            jd, retrograde = self.index.find_crossing(planet, c.targets[i], c.lo[i], c.hi[i])
+            with self._lock:
+                c.jd[i], c.retrograde[i], c.exact[i] = jd, retrograde, True
+        return c.jd[i]
+
+    def in_return(self, planet, jd):
+        """jd 時点でトランジットの惑星が出生時の位置のオーブ内にあるか (出生直後の期間は除く)"""
+        if not self.covers(jd):
+            return self.index.in_return_direct(planet, self.natal[planet], self.birth_jd, jd)
+        c = self._crossings[(planet, None)]
+        k = bisect_right(c.jd, jd)
+        # jd が前後の根の挟み込み区間内なら、その根だけ正確に求めてから数え直す
+        for i in (k - 1, k):
+            if 0 <= i < len(c.jd) and not c.exact[i] and c.lo[i] <= jd <= c.hi[i]:
+                self._refine(planet, c, i)
+                k = bisect_right(c.jd, jd)
+        # 出生時はオーブ内 (差 0) から始まり、境界を通過するたびに内外が入れ替わる。
+        # 最初の退出 (k=1) 以降で偶数回通過していればオーブ内 (出生直後の逆行による出入りは数えない)
+        return k > 0 and k % 2 == 0 and jd - self.birth_jd >= self.index.PERIOD_DAYS[planet] / 2
+
+    def in_return_many(self, planet, jd):
+        """in_return の配列版 (挟み込み区間に問い合わせ時刻が入る根だけ正確に求める)"""
+        jd = np.asarray(jd, dtype=np.float64)
+        c = self._crossings.get((planet, None))
+        if c is not None and c.jd:
+            ordered = np.sort(jd)
+            touched = (np.searchsorted(ordered, c.lo, side="left") != np.searchsorted(ordered, c.hi, side="right"))
+            for i in np.flatnonzero(touched).tolist():
+                self._refine(planet, c, i)
+            k = np.searchsorted(np.asarray(c.jd), jd, side="right")
+        else:
+            k = np.zeros(jd.shape, dtype=np.int64)
+        inside = (k > 0) & (k % 2 == 0) & (jd - self.birth_jd >= self.index.PERIOD_DAYS[planet] / 2)
+        outside = (jd < self.birth_jd) | (jd >= self.end_jd)
+        if outside.any():
+            inside[outside] = [self.index.in_return_direct(planet, self.natal[planet], self.birth_jd, x)
+                               for x in jd[outside].tolist()]
+        return inside
+
+    def upcoming(self, jd, until=None, limit=None, planets=None, kinds=None):
+        """jd 以降 (until 未満) のイベントを時刻順に返す"""
+        until = min(until if until is not None else self.end_jd, self.end_jd)
+        found = []
+        for (planet, aspect), c in self._crossings.items():
+            if planets is not None and planet not in planets:
+                continue
+            # 近似時刻と真の時刻はどちらも挟み込み区間内なので、区間で候補を絞る
+            for i in range(bisect_left(c.hi, jd), bisect_right(c.lo, until)):
+                if kinds is not None and c.kinds[i] not in kinds:
+                    continue
+                exact = self._refine(planet, c, i)
+                if jd <= exact < until:
+                    found.append(ReturnEvent(exact, planet, aspect or 0, c.kinds[i], c.retrograde[i]))
+        found.sort(key=lambda e: e.jd)
+        return found[:limit] if limit is not None else found
+
+
+class PlanetReturnIndex:
+    """
+    Tier 1 L2: 木星・土星のリターン / トランジットのイベント索引
+    木星・土星の黄経の粗い格子 (GRID_STEP 日おき) を事前計算して持ち、
+    出生時の位置に対する各アスペクト (0/90/180/270度) とリターンのオーブ境界の通過を
+    格子上で挟み込み、正確な時刻は挟み込み区間内の Newton 法 (区間外に出たら二分法) で求める。
+    1人分のイベントは出生時刻 (1分単位) をキーにキャッシュする。
+
+        index = PlanetReturnIndex.default()
+        events = index.events(birth_jd)
+        events.in_return("saturn", jd_now)                 # サターンリターン中か (二分探索)
+        events.upcoming(jd_now, limit=5)                    # 今後のイベント
+
+    リターン期間 = トランジットの惑星が出生時の位置から ORB 度以内にある期間
+    (出生直後のオーブ内は除く)。格子の範囲外は ephemeris で直接判定する。
+    """
+
+    PLANETS = ("jupiter", "saturn")
+    ASPECTS = (0, 90, 180, 270)
+    ASPECT_NAMES = {0: "return", 90: "waxing_square", 180: "opposition", 270: "waning_square"}
+    ORB = 10.0                  # リターンとみなす角度 (度)
+    PERIOD_DAYS = {"jupiter": 4332.6, "saturn": 10759.2}
+    GRID_STEP = 4.0             # 日 (留の前後でも1区間に同じ角度の根が2つ入らない間隔)
+    JD_QUANTUM = 1.0 / 1440.0   # キャッシュキーの単位 (1分)
+    MAX_ENTRIES = 10_000
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "planet_grid.npz")
+
+    _default = None
+
+    def __init__(self, start_jd, step, longitudes, max_entries=None):
+        self.start_jd = float(start_jd)
+        self.step = float(step)
+        # 惑星名 -> 連続化 (unwrap) した黄経 (度)。補間と挟み込みにそのまま使える
+        self.longitudes = {name: np.asarray(longitudes[name], dtype=np.float64) for name in self.PLANETS}
+        n = len(self.longitudes[self.PLANETS[0]])
+        self.grid_jd = self.start_jd + self.step * np.arange(n)
+        self.end_jd = float(self.grid_jd[-1])
+        # 黄経の包絡 (前からの累積最大・後ろからの累積最小)。どちらも単調なので、ある黄経を
+        # 通過しうる区間 (逆行ループの範囲) を二分探索で絞り込める
+        self._envelopes = {name: (np.maximum.accumulate(lon), np.minimum.accumulate(lon[::-1])[::-1])
+                           for name, lon in self.longitudes.items()}
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- 構築・永続化 ---
+    @staticmethod
+    def _planet_code(swe, planet):
+        return {"jupiter": swe.JUPITER, "saturn": swe.SATURN}[planet]
+
+    @classmethod
+    def build(cls, start_year=1900, end_year=2100, step=None):
+        import swisseph as swe
+
+        step = step or cls.GRID_STEP
+        start_jd, end_jd = swe.julday(start_year, 1, 1, 0.0), swe.julday(end_year + 1, 1, 1, 0.0)
+        grid = start_jd + step * np.arange(int((end_jd - start_jd) // step) + 1)
+        longitudes = {}
+        for planet in cls.PLANETS:
+            code = cls._planet_code(swe, planet)
+            raw = np.array([swe.calc_ut(jd, code)[0][0] for jd in grid.tolist()])
+            longitudes[planet] = np.unwrap(raw, period=360.0)
+        return cls(start_jd, step, longitudes)
+
+    def save(self, path):
+        np.savez(path, start_jd=self.start_jd, step=self.step, **self.longitudes)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(float(data["start_jd"]), float(data["step"]), {name: data[name] for name in cls.PLANETS})
+
+    @classmethod
+    def default(cls):
+        """同梱の格子 (1900-2100) を返す。無ければその場で構築する。"""
+        if cls._default is None:
+            if os.path.exists(cls.DEFAULT_PATH):
+                cls._default = cls.load(cls.DEFAULT_PATH)
+            else:
+                cls._default = cls.build()
+        return cls._default
+
+    # --- 黄経 ---
+    def contains(self, jd):
+        return self.start_jd <= jd < self.end_jd
+
+    def longitude(self, planet, jd):
+        """格子からの線形補間による黄経 (度, 配列可。誤差は 0.01度未満)"""
+        return np.interp(jd, self.grid_jd, self.longitudes[planet]) % 360.0
+
+    def in_return_direct(self, planet, natal, birth_jd, jd):
+        """ephemeris で直接判定する (格子の範囲外用)"""
+        import swisseph as swe
+
+        if jd - birth_jd < self.PERIOD_DAYS[planet] / 2:
+            return False
+        lon = swe.calc_ut(jd, self._planet_code(swe, planet))[0][0]
+        return abs((lon - natal + 180.0) % 360.0 - 180.0) <= self.ORB
+
+    def in_return_many(self, planet, birth_jd, jd):
+        """
+        コホート用: 出生時刻の配列 birth_jd と時刻 jd (配列可) について、格子の補間だけで
+        リターン期間かを判定する (イベント一覧は作らない)。
+        """
+        birth_jd, jd = np.broadcast_arrays(np.asarray(birth_jd, dtype=np.float64), np.asarray(jd, dtype=np.float64))
+        diff = (self.longitude(planet, jd) - self.longitude(planet, birth_jd) + 180.0) % 360.0 - 180.0
+        inside = (np.abs(diff) <= self.ORB) & (jd - birth_jd >= self.PERIOD_DAYS[planet] / 2)
+        # 格子の範囲外 (補間できない) 行だけ ephemeris で判定する
+        outside = (birth_jd < self.start_jd) | (birth_jd >= self.end_jd) | (jd < self.start_jd) | (jd >= self.end_jd)
+        if outside.any():
+            import swisseph as swe
+
+            code = self._planet_code(swe, planet)
+            inside[outside] = [self.in_return_direct(planet, swe.calc_ut(b, code)[0][0], b, x)
+                               for b, x in zip(birth_jd[outside].tolist(), jd[outside].tolist())]
+        return inside
+
+    def find_crossing(self, planet, target, lo, hi, tol=1e-6):
+        """
+        [lo, hi] で挟み込んだ「黄経 = target」の時刻を求める (Newton 法、区間外に出たら二分法)。
+        (jd, 逆行中か) を返す。
+        """
+        import swisseph as swe
+
+        code = self._planet_code(swe, planet)
+
+        def f(jd):
+            pos = swe.calc_ut(jd, code, swe.FLG_SPEED)[0]
+            return (pos[0] - target + 180.0) % 360.0 - 180.0, pos[3]
+
+        f_lo, _ = f(lo)
+        jd = lo + (hi - lo) * 0.5
+        speed = 0.0
+        for _ in range(50):
+            value, speed = f(jd)
+            if (value < 0) == (f_lo < 0):
+                lo, f_lo = jd, value
+            else:
+                hi = jd
+            new = jd - value / speed if speed else lo + (hi - lo) * 0.5
+            if not lo < new < hi:
+                new = lo + (hi - lo) * 0.5
+            if abs(new - jd) < tol:
+                jd = new
+                break
+            jd = new
+        return jd, speed < 0
+
+    # --- 1人分のイベント ---
+    def events(self, birth_jd):
+        """出生時刻 birth_jd (UT) のイベント一覧 (キャッシュ)"""
+        key = round(birth_jd / self.JD_QUANTUM)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry
+        entry = self._build_events(key * self.JD_QUANTUM)
+        with self._lock:
+            entry = self._cache.setdefault(key, entry)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _build_events(self, birth_jd):
+        import swisseph as swe
+
+        natal = {p: swe.calc_ut(birth_jd, self._planet_code(swe, p))[0][0] for p in self.PLANETS}
+        if not self.contains(birth_jd):
+            return ReturnEvents(self, birth_jd, natal, {}, birth_jd)
+
+        first = int((birth_jd - self.start_jd) // self.step)
+        crossings = {}
+        for planet in self.PLANETS:
+            # 4つのアスペクトとオーブ境界 (+ORB / -ORB) をまとめて挟み込む
+            targets = [(natal[planet] + aspect) % 360.0 for aspect in self.ASPECTS]
+            targets += [(natal[planet] + self.ORB) % 360.0, (natal[planet] - self.ORB) % 360.0]
+            found = self._bracket(planet, np.array(targets), first)
+            for aspect, (lo, hi, approx) in zip(self.ASPECTS, found):
+                target = (natal[planet] + aspect) % 360.0
+                crossings[(planet, aspect)] = _Crossings(lo, hi, approx, [target] * len(lo), ["exact"] * len(lo))
+            # リターンのオーブ境界は両側を時刻順にまとめる
+            bounds = sorted(
+                (a, l, h, t) for (lo, hi, approx), t in zip(found[-2:], targets[-2:]) for a, l, h in zip(approx, lo, hi)
+            )
+            approx, lo, hi, targets = (list(column) for column in zip(*bounds)) if bounds else ([], [], [], [])
+            # 出入りは交互 (出生時はオーブ内なので最初は退出)
+            kinds = ["exit" if i % 2 == 0 else "enter" for i in range(len(bounds))]
+            crossings[(planet, None)] = _Crossings(lo, hi, approx, targets, kinds)
+        return ReturnEvents(self, birth_jd, natal, crossings, self.end_jd)
+
+    def _bracket(self, planet, targets, first):
+        """
+        grid_jd[first] 以降で「黄経 = target」を挟む格子の区間 (lo, hi) と線形補間の近似時刻を
+        target ごとに返す。出生を含む区間 (出生時の位置そのもの) は除く。
+        連続化した黄経上で target + 360k の各周回を、包絡の二分探索で絞った区間だけ調べる。
+        """
+        lon = self.longitudes[planet]
+        upper, lower = self._envelopes[planet]
+        # 出生以降に通過しうる周回 (target + 360k)
+        k_lo = np.ceil((lower[first] - targets) / 360.0)
+        k_hi = np.floor((upper[-1] - targets) / 360.0)
+        counts = np.maximum(k_hi - k_lo + 1, 0).astype(np.int64)
+        owner = np.repeat(np.arange(len(targets)), counts)
+        levels = targets[owner] + 360.0 * (np.repeat(k_lo, counts) + self._ramp(counts))
+        # 区間 i が level を跨ぎうるのは upper[i+1] >= level かつ lower[i] <= level のときだけ
+        start = np.maximum(np.searchsorted(upper, levels, side="left") - 1, first + 1)
+        stop = np.minimum(np.searchsorted(lower, levels, side="right"), len(lon) - 1)
+        lengths = np.maximum(stop - start, 0)
+        i = np.repeat(start, lengths) + self._ramp(lengths)
+        level = np.repeat(levels, lengths)
+        f0, f1 = lon[i] - level, lon[i + 1] - level
+        hit = (f0 < 0) != (f1 < 0)
+        i, f0, f1, owner = i[hit], f0[hit], f1[hit], np.repeat(owner, lengths)[hit]
+        approx = self.grid_jd[i] + self.step * f0 / (f0 - f1)
+        result = []
+        for k in range(len(targets)):
+            mine = owner == k
+            order = np.argsort(approx[mine], kind="stable")
+            lo = self.grid_jd[i[mine][order]]
+            result.append((lo.tolist(), (lo + self.step).tolist(), approx[mine][order].tolist()))
+        return result
+
+    @staticmethod
+    def _ramp(counts):
+        """[0..c0-1, 0..c1-1, ...] (counts の各要素ぶんの連番を連結したもの)"""
+        total = int(counts.sum())
+        return np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="木星・土星の黄経格子を生成する")
+    parser.add_argument("--start", type=int, default=1900)
+    parser.add_argument("--end", type=int, default=2100)
+    parser.add_argument("-o", "--output", default=PlanetReturnIndex.DEFAULT_PATH)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    PlanetReturnIndex.build(args.start, args.end).save(args.output)
@@ -0,0 +1,248 @@
+"""
+Tier 1 Profile Store (memory-mapped, columnar)
+
+一度計算すれば変わらない Trait 軸 (JD, LPN, ASC, 生年・生日の干支など) を
+固定長の列ファイルに保存し、mmap で読み出す。
+
+    store = ProfileStore.open("profiles/")            # 無ければ作成
+    store.append_births(["u1", "u2"], records)        # analyze_many の Trait 軸を追記
+    store.get("u1")                                   # {"jd": ..., "lpn": ..., ...} (O(1))
+    store.column("asc_sign")                          # 列全体 (mmap のビュー、コピーなし)
+    store.compact()                                   # 上書き・削除された行を詰める
+
+ディレクトリ構成:
+    meta.json              行数・世代などのメタデータ (一時ファイル + os.replace で更新)
+    <column>.<gen>.bin     列ごとの生データ (リトルエンディアン固定長)
+    ids.<gen>.txt          行ごとのユーザーID (改行区切り)
+
+- 書き込みは1プロセス (ライター) のみ。読み手は何プロセスでもよく、同じファイルを mmap
+  するのでページキャッシュを共有する。ライターの追記は refresh() で見えるようになる。
+- 追記は列データ → ID → meta.json の順に書くので、途中で落ちても meta.json の行数までは
+  一貫している (次回ライターとして開いたときに余分な末尾を切り詰める)。
+- 同じユーザーIDを追記すると新しい行が有効になる (古い行は compact() で消える)。
+- compact() は新しい世代のファイルを書いてから meta.json を差し替える。古い世代を
+  mmap している読み手はそのまま読める。
+"""
+import json
+import os
+
+import numpy as np
+
+COLUMNS = (
+    ("jd", "<f8"),
+    ("lat", "<f8"),
+    ("lon", "<f8"),
+    ("asc_degree", "<f8"),
+    ("lpn", "i1"),
+    ("asc_sign", "i1"),
+    ("birth_year_gz", "i1"),
+    ("birth_day_gz", "i1"),
+    ("deleted", "u1"),
+)
+COLUMN_DTYPES = {name: np.dtype(dtype) for name, dtype in COLUMNS}
+FORMAT_VERSION = 1
+
+
+class ProfileStore:
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        self._meta = None
+        self._columns = {}
+        self._ids = []
+        self._index = {}
+        self.refresh()
+        if writable:
+            self._truncate_to_meta()
+
+    @classmethod
+    def open(cls, path, writable=True):
+        """path のストアを開く (writable=True で存在しなければ作成)"""
+        if writable and not os.path.exists(os.path.join(path, "meta.json")):
+            os.makedirs(path, exist_ok=True)
+            meta = {"version": FORMAT_VERSION, "generation": 0, "rows": 0, "ids_bytes": 0,
+                    "columns": [[name, dtype] for name, dtype in COLUMNS]}
+            for name, _ in COLUMNS:
+                open(cls._column_path(path, name, 0), "wb").close()
+            open(cls._ids_path(path, 0), "wb").close()
+            cls._write_meta(path, meta)
+        return cls(path, writable=writable)
+
+    # --- ファイル ---
+    @staticmethod
+    def _column_path(path, name, generation):
+        return os.path.join(path, f"{name}.{generation}.bin")
+
+    @staticmethod
+    def _ids_path(path, generation):
+        return os.path.join(path, f"ids.{generation}.txt")
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def _truncate_to_meta(self):
+        """前回のライターが meta.json 更新前に落ちた場合の書きかけを捨てる"""
+        generation, rows = self._meta["generation"], self._meta["rows"]
+        for name, dtype in COLUMN_DTYPES.items():
+            os.truncate(self._column_path(self.path, name, generation), rows * dtype.itemsize)
+        os.truncate(self._ids_path(self.path, generation), self._meta["ids_bytes"])
+
+    # --- 読み出し ---
+    def refresh(self):
+        """meta.json を読み直し、増えた行・新しい世代を mmap し直す"""
+        with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported profile store version: {meta.get('version')}")
+        old = self._meta
+        same_generation = old is not None and old["generation"] == meta["generation"]
+        if same_generation and old["rows"] == meta["rows"]:
+            return
+
+        generation, rows = meta["generation"], meta["rows"]
+        self._columns = {
+            # np.memmap のままだと要素アクセスのたびにサブクラスのオブジェクトが作られるので、
+            # 同じバッファを指す素の ndarray として持つ
+            name: (np.memmap(self._column_path(self.path, name, generation), dtype=dtype, mode="r",
+                             shape=(rows,)).view(np.ndarray)
+                   if rows else np.empty(0, dtype=dtype))
+            for name, dtype in COLUMN_DTYPES.items()
+        }
+        # ID 索引: 同じ世代なら増えた分だけ読む
+        start_bytes = old["ids_bytes"] if same_generation else 0
+        if not same_generation:
+            self._ids, self._index = [], {}
+        with open(self._ids_path(self.path, generation), "rb") as f:
+            f.seek(start_bytes)
+            new_ids = f.read(meta["ids_bytes"] - start_bytes).decode("utf-8").split("\n")[:-1]
+        start_row = len(self._ids)
+        self._index.update(zip(new_ids, range(start_row, start_row + len(new_ids))))
+        # 最新の行が墓石のIDは索引から外す
+        for row in (np.flatnonzero(self._columns["deleted"][start_row:]) + start_row).tolist():
+            user_id = new_ids[row - start_row]
+            if self._index.get(user_id) == row:
+                del self._index[user_id]
+        self._ids.extend(new_ids)
+        self._meta = meta
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, user_id):
+        return user_id in self._index
+
+    def row(self, user_id):
+        """ユーザーIDの行番号 (無ければ None)"""
+        return self._index.get(user_id)
+
+    def rows(self, user_ids):
+        """row の配列版 (無いIDは -1)"""
+        index = self._index
+        return np.fromiter((index.get(u, -1) for u in user_ids), dtype=np.int64, count=len(user_ids))
+
+    def column(self, name):
+        """列全体 (mmap のビュー)。上書き・削除された行も含むので rows() と組み合わせて使う"""
+        return self._columns[name]
+
+    def get(self, user_id):
+        """1ユーザー分の Trait 軸 (無ければ None)"""
+        row = self._index.get(user_id)
+        if row is None:
+            return None
+        return {name: self._columns[name][row].item() for name in COLUMN_DTYPES if name != "deleted"}
+
+    def ids(self):
+        return list(self._index)
+
+    # --- 書き込み ---
+    def _require_writable(self):
+        if not self.writable:
+            raise PermissionError("profile store is opened read-only")
+
+    def append(self, user_ids, columns):
+        """
+        user_ids と同じ長さの列 (COLUMNS の名前、deleted は省略可) を追記する。
+        既存のユーザーIDは新しい行で置き換わる。
+        """
+        self._require_writable()
+        user_ids = [str(u) for u in user_ids]
+        if any("\n" in u for u in user_ids):
+            raise ValueError("user id must not contain a newline")
+        n = len(user_ids)
+        if n == 0:
+            return
+        generation = self._meta["generation"]
+        for name, dtype in COLUMN_DTYPES.items():
+            default = 0 if name == "deleted" else None
+            value = columns.get(name, default)
+            if value is None:
+                raise KeyError(name)
+            data = np.ascontiguousarray(np.broadcast_to(np.asarray(value), n), dtype=dtype)
+            with open(self._column_path(self.path, name, generation), "ab") as f:
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        encoded = "".join(u + "\n" for u in user_ids).encode("utf-8")
+        with open(self._ids_path(self.path, generation), "ab") as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        meta = dict(self._meta, rows=self._meta["rows"] + n, ids_bytes=self._meta["ids_bytes"] + len(encoded))
+        self._write_meta(self.path, meta)
+        self.refresh()
+
+    def append_births(self, user_ids, records, now=None):
+        """出生データ (analyze_many と同じ列指向の入力) から Trait 軸を計算して追記する"""
+        from tier1_engine import SolalendarTier1
+
+        n = len(user_ids)
+        trait = SolalendarTier1.analyze_many(records, now=now)["trait_axis"]
+        self.append(user_ids, {
+            "jd": trait["jdn"],
+            "lat": np.broadcast_to(np.asarray(records.get("lat", 35.68), dtype=np.float64), n),
+            "lon": np.broadcast_to(np.asarray(records.get("lon", 139.76), dtype=np.float64), n),
+            "asc_degree": trait["ascendant_degree"],
+            "lpn": trait["lpn_phase"],
+            "asc_sign": trait["ascendant_sign"],
+            "birth_year_gz": trait["birth_year_ganzhi"],
+            "birth_day_gz": trait["birth_day_ganzhi"],
+        })
+
+    def delete(self, user_ids):
+        """削除 (墓石の行を追記する。領域は compact() で回収)"""
+        user_ids = [u for u in user_ids if u in self._index]
+        if user_ids:
+            zeros = {name: 0 for name in COLUMN_DTYPES}
+            self.append(user_ids, {**zeros, "deleted": 1})
+
+    def compact(self):
+        """有効な行 (各ユーザーの最新行) だけを新しい世代に書き出して差し替える"""
+        self._require_writable()
+        live_ids = list(self._index)
+        live_rows = np.fromiter(self._index.values(), dtype=np.int64, count=len(live_ids))
+        old_generation = self._meta["generation"]
+        generation = old_generation + 1
+        for name in COLUMN_DTYPES:
+            data = np.ascontiguousarray(self._columns[name][live_rows])
+            with open(self._column_path(self.path, name, generation), "wb") as f:
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        encoded = "".join(u + "\n" for u in live_ids).encode("utf-8")
+        with open(self._ids_path(self.path, generation), "wb") as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        meta = dict(self._meta, generation=generation, rows=len(live_ids), ids_bytes=len(encoded))
+        self._write_meta(self.path, meta)
+        self.refresh()
+        # 古い世代は削除 (mmap 中の読み手は unlink 後もそのまま読める)
+        for name in COLUMN_DTYPES:
+            os.remove(self._column_path(self.path, name, old_generation))
+        os.remove(self._ids_path(self.path, old_generation))
@@ -0,0 +1,224 @@
+"""
+Tier 1 Result Model (compact)
+
+SolalendarTier1.analyze_compact() の戻り値。ラベル文字列やライブラリの dict は持たず、
+小さな整数コード (星座・LPN・干支・節気の番号) だけを保持し、ラベルは共有テーブルから
+必要になった時点で引く。従来の入れ子 dict が必要な場合は to_dict() を使う。
+
+直列化:
+- to_json() / from_json(): 位置固定の JSON 配列 (キー名を持たない)
+- to_bytes() / from_bytes(): struct による固定長バイナリ + 名前 (UTF-8)
+
+StateDay は forecast() が返す1日分の State 軸 (同じく整数コードのみ)。
+"""
+import json
+import struct
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from tier1.oriental_engine import OrientalEngine
+from tier1.semantic_library import PYTHAGOREAN_LIBRARY
+from tier1.sexagenary import GANZHI_LABELS
+
+ZODIAC_SIGNS = (
+    "Aries (牡羊座)", "Taurus (牡牛座)", "Gemini (双子座)", "Cancer (蟹座)",
+    "Leo (獅子座)", "Virgo (乙女座)", "Libra (天秤座)", "Scorpio (蠍座)",
+    "Sagittarius (射手座)", "Capricorn (山羊座)", "Aquarius (水瓶座)", "Pisces (魚座)"
+)
+
+# L2: Pinnacles (phase 1-4)
+LIFE_STAGES = (
+    {"phase": 1, "name": "Development (種まき)", "desc": "自我の形成と試行錯誤の時期"},
+    {"phase": 2, "name": "Creation (開花)", "desc": "責任ある行動と建設の時期"},
+    {"phase": 3, "name": "Expansion (収穫)", "desc": "影響力の拡大と成熟の時期"},
+    {"phase": 4, "name": "Reflection (継承)", "desc": "智慧の統合と社会還元"},
+)
+
+FORMAT_VERSION = 2
+# version, timestamp(us), age, jd, lat, lon, birth_year_gz, birth_day_gz, lpn, asc_sign,
+# stage, saturn_return, jupiter_return, current_year_phase, term_position, term_angle, sun_longitude,
+# term_days_until, year_gz, day_gz, personal_month, personal_day, len(name)
+_STRUCT = struct.Struct("<BqhdddBBBBB??BiHdhBBBBH")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _state_axis(r):
+    """State 軸 (L2-L4) の従来形式。Tier1Result と StateDay で共有する"""
+    return {
+        "layer_2_infra": {
+            "stage": dict(r.life_stage),
+            "saturn_return": r.saturn_return,
+            "jupiter_return": r.jupiter_return
+        },
+        "layer_3_env": {
+            "current_year_phase": r.current_year_phase,
+            "solar_term": r.solar_term,    # 二十四節気
+            "year_ganzhi": r.year_ganzhi   # 年の干支
+        },
+        "layer_4_clock": {
+            **(r.state_info or {}),  # 数秘データ(Label/Keywordなど)を展開
+            "personal_month": r.personal_month,
+            "personal_day": r.personal_day,
+            "day_ganzhi": r.day_ganzhi  # 日の干支
+        }
+    }
+
+
+class _StateLabels:
+    """State 軸のラベル解決 (Tier1Result / StateDay 共通)"""
+    __slots__ = ()
+
+    @property
+    def year_ganzhi(self):
+        return GANZHI_LABELS[self.year_gz]
+
+    @property
+    def day_ganzhi(self):
+        return GANZHI_LABELS[self.day_gz]
+
+    @property
+    def state_info(self):
+        return PYTHAGOREAN_LIBRARY.get(self.current_year_phase)
+
+    @property
+    def life_stage(self):
+        return LIFE_STAGES[self.stage - 1]
+
+    @property
+    def solar_term(self):
+        return OrientalEngine.solar_term_dict(self.term_position, self.term_angle, self.sun_longitude,
+                                              self.term_days_until)
+
+
+@dataclass(frozen=True, slots=True)
+class Tier1Result(_StateLabels):
+    # metadata
+    name: str
+    timestamp: datetime
+    age: int
+    # trait axis
+    jd: float
+    lat: float
+    lon: float
+    birth_year_gz: int      # 0-59
+    birth_day_gz: int       # 0-59
+    lpn: int                # 1-9
+    asc_sign: int           # 0-11 (ZODIAC_SIGNS)
+    # state axis
+    stage: int              # 1-4 (LIFE_STAGES)
+    saturn_return: bool     # トランジットの土星が出生時の位置の ORB 度以内 (tier1.planet_returns)
+    jupiter_return: bool    # 同じく木星
+    current_year_phase: int
+    term_position: int      # SolarTermIndex 上の位置 (範囲外は -1)
+    term_angle: int         # 節気の太陽黄経 (15度刻み)
+    sun_longitude: float
+    term_days_until: int    # 次の節入りまでの日数 (範囲外は -1)
+    year_gz: int
+    day_gz: int
+    personal_month: int
+    personal_day: int
+    # 計測が有効な場合のレイヤー別所要時間 (直列化の対象外)
+    timings: dict = None
+
+    # --- ラベル (共有テーブルから遅延解決) ---
+    @property
+    def ascendant(self):
+        return ZODIAC_SIGNS[self.asc_sign]
+
+    @property
+    def birth_year_ganzhi(self):
+        return GANZHI_LABELS[self.birth_year_gz]
+
+    @property
+    def birth_day_ganzhi(self):
+        return GANZHI_LABELS[self.birth_day_gz]
+
+    @property
+    def trait_info(self):
+        return PYTHAGOREAN_LIBRARY.get(self.lpn)
+
+    # --- 従来形式 ---
+    def to_dict(self):
+        """analyze() が返していた入れ子 dict と同じ形"""
+        metadata = {"name": self.name, "timestamp": self.timestamp.isoformat(), "age": self.age}
+        if self.timings:
+            metadata["timings"] = self.timings
+        trait_info = self.trait_info
+        return {
+            "metadata": metadata,
+
+            "trait_axis": {
+                "layer_0_kernel": {"jdn": self.jd, "lat": self.lat, "lon": self.lon},
+                "layer_0_extended": {
+                    "birth_year_ganzhi": self.birth_year_ganzhi,
+                    "birth_day_ganzhi": self.birth_day_ganzhi
+                },
+                "layer_1a_codec": {"lpn_phase": self.lpn},
+                "layer_1b_library": dict(trait_info) if trait_info is not None else None,
+                "layer_5_skin": {"ascendant": self.ascendant}
+            },
+
+            "state_axis": _state_axis(self)
+        }
+
+    # --- コンパクト直列化 ---
+    def _values(self):
+        return (
+            (self.timestamp - _EPOCH) // _MICROSECOND, self.age, self.jd, self.lat, self.lon,
+            self.birth_year_gz, self.birth_day_gz, self.lpn, self.asc_sign, self.stage, self.saturn_return,
+            self.jupiter_return, self.current_year_phase, self.term_position, self.term_angle, self.sun_longitude,
+            self.term_days_until, self.year_gz, self.day_gz, self.personal_month, self.personal_day,
+        )
+
+    @classmethod
+    def _from_values(cls, name, values):
+        timestamp_us, *rest = values
+        return cls(name, _EPOCH + timedelta(microseconds=timestamp_us), *rest)
+
+    def to_json(self):
+        """[version, name, timestamp(us), age, ...] の JSON 配列"""
+        return json.dumps([FORMAT_VERSION, self.name, *self._values()], ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        version, name, *values = json.loads(text)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported Tier1Result format version: {version}")
+        values[10] = bool(values[10])  # saturn_return
+        values[11] = bool(values[11])  # jupiter_return
+        return cls._from_values(name, values)
+
+    def to_bytes(self):
+        name = self.name.encode("utf-8")
+        return _STRUCT.pack(FORMAT_VERSION, *self._values(), len(name)) + name
+
+    @classmethod
+    def from_bytes(cls, data):
+        version, *values, name_length = _STRUCT.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported Tier1Result format version: {version}")
+        name = bytes(data[_STRUCT.size:_STRUCT.size + name_length]).decode("utf-8")
+        return cls._from_values(name, values)
+
+
+@dataclass(frozen=True, slots=True)
+class StateDay(_StateLabels):
+    """SolalendarTier1.forecast() の1日分 (State 軸の L2-L4 のみ)"""
+    date: date
+    age: int
+    stage: int
+    saturn_return: bool
+    jupiter_return: bool
+    current_year_phase: int
+    term_position: int
+    term_angle: int
+    sun_longitude: float
+    term_days_until: int
+    year_gz: int
+    day_gz: int
+    personal_month: int
+    personal_day: int
+
+    def to_dict(self):
+        return {"date": self.date.isoformat(), "age": self.age, **_state_axis(self)}
@@ -0,0 +1,134 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from tier1.solar_terms import SolarTermIndex
+
+# 六十干支データ (ラベルは一度だけ生成して共有する)
+HEAVENLY_STEMS = ("甲 (Wood+)", "乙 (Wood-)", "丙 (Fire+)", "丁 (Fire-)", "戊 (Earth+)", "己 (Earth-)", "庚 (Metal+)", "辛 (Metal-)", "壬 (Water+)", "癸 (Water-)")
+EARTHLY_BRANCHES = ("子 (Rat)", "丑 (Ox)", "寅 (Tiger)", "卯 (Rabbit)", "辰 (Dragon)", "巳 (Snake)", "午 (Horse)", "未 (Sheep)", "申 (Monkey)", "酉 (Rooster)", "戌 (Dog)", "亥 (Boar)")
+GANZHI_LABELS = tuple(f"{HEAVENLY_STEMS[i % 10]}{EARTHLY_BRANCHES[i % 12]}" for i in range(60))
+_GANZHI_ARRAY = np.array(GANZHI_LABELS, dtype=object)
+
+
+def julian_day_number(year, month, day):
+    """
+    グレゴリオ暦 → ユリウス通日 (正午基準の整数JDN)
+    整数演算のみ (Fliegel & Van Flandern) なので NumPy配列にもそのまま使える。
+    """
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    return day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+
+
+def ganzhi_index(stem, branch):
+    """(十干, 十二支) → 六十干支インデックス (中国剰余定理: 6s - 5b mod 60)"""
+    return (6 * stem - 5 * branch) % 60
+
+
+def labels(indices):
+    """インデックス (スカラー/配列) → 干支ラベル"""
+    if np.ndim(indices) == 0:
+        return GANZHI_LABELS[int(indices)]
+    return _GANZHI_ARRAY[np.asarray(indices)]
+
+
+class SexagenaryCalculator:
+    """
+    Tier 1 Class C: 四柱 (年・月・日・時) の干支を整数演算だけで求める。
+    - 日柱: 整数JDN から (JDN - 11) mod 60
+    - 年柱/月柱: 節入り日 (SolarTermIndex) の二分探索。年は立春、月は12の「節」で切り替わる
+    - 時柱: 日干と時刻から (夜子時: 23時台は翌日の子の刻の干を用いる)
+    swisseph は呼ばず、すべての関数はスカラーでも NumPy 配列でも動作する。
+    結果は 0-59 の整数インデックスで返し、ラベルは GANZHI_LABELS で解決する。
+    """
+
+    _default = None
+
+    def __init__(self, index=None, tz_offset_hours=9.0):
+        self.index = index or SolarTermIndex.default()
+        # 節入りの「現地日付」の JDN (節入りした日はその日から新しい節気)
+        self.term_day = np.floor(self.index.jd + 0.5 + tz_offset_hours / 24.0).astype(np.int64)
+        self._term_day_list = self.term_day.tolist()
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def _term_position(self, jdn):
+        """JDN → 暦表上の節気位置 (範囲外は ValueError)"""
+        if np.ndim(jdn) == 0:
+            pos = bisect_right(self._term_day_list, int(jdn)) - 1
+        else:
+            pos = np.searchsorted(self.term_day, jdn, side="right") - 1
+        if np.any(pos < 0) or np.any(pos >= len(self.term_day) - 1):
+            raise ValueError(
+                f"date out of solar-term table range ({self.index.start_year}-{self.index.end_year})"
+            )
+        return pos
+
+    def _solar_year_and_month(self, jdn):
+        """
+        節気位置 → (節切りの年, 寅月=0 から数えた節月)
+        暦表は各年「小寒, 大寒, 立春, ...」の順なので、年内位置 0,1 は前年扱い。
+        """
+        pos = self._term_position(jdn)
+        row, j = pos // 24, pos % 24
+        solar_year = self.index.start_year + row - (j < 2)
+        month = ((j + 22) % 24) // 2
+        return solar_year, month
+
+    # --- 各柱 ---
+    @staticmethod
+    def day_pillar(years, months, days):
+        return (julian_day_number(years, months, days) - 11) % 60
+
+    def year_pillar(self, years, months, days):
+        solar_year, _ = self._solar_year_and_month(julian_day_number(years, months, days))
+        return (solar_year - 1984) % 60
+
+    def month_pillar(self, years, months, days):
+        solar_year, month = self._solar_year_and_month(julian_day_number(years, months, days))
+        return self._month_index(solar_year, month)
+
+    @staticmethod
+    def hour_pillar(day_index, hours):
+        seq = (hours + 1) // 2  # 0 = 子の刻 (0時台), 12 = 夜子 (23時台)
+        return ganzhi_index((2 * (day_index % 10) + seq) % 10, seq % 12)
+
+    @staticmethod
+    def _month_index(solar_year, month):
+        # 月干は年干から決まる (甲・己の年は丙寅月から始まる)
+        year_stem = (solar_year - 1984) % 10
+        return ganzhi_index((2 * year_stem + 2 + month) % 10, (month + 2) % 12)
+
+    def pillars(self, years, months, days, hours=None):
+        """
+        四柱をまとめて算出 (JDN と節気の探索は1回だけ)
+        配列入力の場合は int8 配列の dict を返す。hours を省略すると時柱は含まない。
+        """
+        array_input = np.ndim(years) > 0
+        if array_input:
+            years = np.asarray(years, dtype=np.int64)
+            months = np.asarray(months, dtype=np.int64)
+            days = np.asarray(days, dtype=np.int64)
+        jdn = julian_day_number(years, months, days)
+        solar_year, month = self._solar_year_and_month(jdn)
+        day_index = (jdn - 11) % 60
+        result = {
+            "year": (solar_year - 1984) % 60,
+            "month": self._month_index(solar_year, month),
+            "day": day_index,
+        }
+        if hours is not None:
+            if array_input:
+                hours = np.asarray(hours, dtype=np.int64)
+            result["hour"] = self.hour_pillar(day_index, hours)
+        if array_input:
+            result = {k: v.astype(np.int8) for k, v in result.items()}
+        else:
+            result = {k: int(v) for k, v in result.items()}
+        return result
@@ -0,0 +1,123 @@
+import os
+from bisect import bisect_right
+
+import numpy as np
+
+
+class SolarTermIndex:
+    """
+    Tier 1 Class B: 二十四節気の暦表 (Ephemeris Index)
+    各節気の始まる瞬間 (太陽黄経が15度の倍数を通過する UT) を事前計算し、
+    ソート済み配列として保持する。検索は二分探索のみで swisseph を呼ばない。
+
+    配列は年ごとに「小寒(285度) → ... → 冬至(270度)」の24件が並ぶため、
+    i 番目の節気の黄経は (285 + 15 * i) % 360 で求まり、角度列を保存する必要はない。
+    """
+
+    FIRST_ANGLE = 285  # 各年の最初の節気 = 小寒
+    TERMS_PER_YEAR = 24
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "solar_terms.npz")
+
+    _default = None
+
+    def __init__(self, start_year, jd):
+        self.start_year = int(start_year)
+        self.jd = np.asarray(jd, dtype=np.float64)
+        self._jd_list = self.jd.tolist()  # bisect 用 (スカラー検索は list の方が速い)
+
+    @property
+    def end_year(self):
+        return self.start_year + len(self.jd) // self.TERMS_PER_YEAR - 1
+
+    # --- 構築・永続化 ---
+    @classmethod
+    def build(cls, start_year=1900, end_year=2100):
+        """swisseph で太陽黄経の根を求めて暦表を構築する (Newton法)"""
+        import swisseph as swe
+
+        jd = np.empty((end_year - start_year + 1) * cls.TERMS_PER_YEAR, dtype=np.float64)
+        i = 0
+        for year in range(start_year, end_year + 1):
+            # 小寒はおよそ1月5日、以降は平均15.22日間隔
+            guess = swe.julday(year, 1, 5, 12.0)
+            for k in range(cls.TERMS_PER_YEAR):
+                target = (cls.FIRST_ANGLE + 15 * k) % 360
+                jd[i] = cls._find_ingress(swe, target, guess + k * 15.2184)
+                i += 1
+        return cls(start_year, jd)
+
+    @staticmethod
+    def _find_ingress(swe, target, jd, tol=1e-7):
+        for _ in range(20):
+            pos, _ = swe.calc_ut(jd, swe.SUN, swe.FLG_SPEED)
+            delta = (target - pos[0] + 180.0) % 360.0 - 180.0
+            step = delta / pos[3]
+            jd += step
+            if abs(step) < tol:
+                break
+        return jd
+
+    def save(self, path):
+        np.savez(path, start_year=self.start_year, jd=self.jd)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(int(data["start_year"]), data["jd"])
+
+    @classmethod
+    def default(cls):
+        """同梱の暦表 (1900-2100) を返す。無ければその場で構築する。"""
+        if cls._default is None:
+            if os.path.exists(cls.DEFAULT_PATH):
+                cls._default = cls.load(cls.DEFAULT_PATH)
+            else:
+                cls._default = cls.build()
+        return cls._default
+
+    # --- 検索 ---
+    def angle(self, i):
+        """暦表の i 番目の節気の太陽黄経 (度)"""
+        return (self.FIRST_ANGLE + 15 * i) % 360
+
+    def start_jd(self, i):
+        """暦表の i 番目の節入り時刻 (UT)"""
+        return self._jd_list[i]
+
+    def next_jd(self, i):
+        """i 番目の節気が終わる時刻 = 次の節入り時刻 (UT)"""
+        return self._jd_list[i + 1]
+
+    def contains(self, jd_ut):
+        return self._jd_list[0] <= jd_ut < self._jd_list[-1]
+
+    def position(self, jd_ut):
+        """
+        jd_ut 時点で有効な節気の暦表インデックス (二分探索)
+        範囲外の場合は None
+        """
+        if not self.contains(jd_ut):
+            return None
+        return bisect_right(self._jd_list, jd_ut) - 1
+
+    def positions(self, jd_ut):
+        """position の配列版"""
+        return np.searchsorted(self.jd, jd_ut, side="right") - 1
+
+    def longitude(self, i, jd_ut):
+        """前後の節入り時刻から線形補間した太陽黄経 (誤差は0.02度程度)"""
+        start, end = self._jd_list[i], self._jd_list[i + 1]
+        return (self.angle(i) + 15.0 * (jd_ut - start) / (end - start)) % 360.0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="二十四節気の暦表を生成する")
+    parser.add_argument("--start", type=int, default=1900)
+    parser.add_argument("--end", type=int, default=2100)
+    parser.add_argument("-o", "--output", default=SolarTermIndex.DEFAULT_PATH)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    SolarTermIndex.build(args.start, args.end).save(args.output)
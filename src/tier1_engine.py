@@ -1,103 +1,449 @@
+import numpy as np
 import swisseph as swe
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from tier1.codec_engine import Tier1Codec
-from tier1.semantic_library import PYTHAGOREAN_LIBRARY
+from tier1.environment import DailyEnvironment
+from tier1.gazetteer import Gazetteer
+from tier1.houses import HouseCalculator
+from tier1.layer_graph import LayerGraph
+from tier1.planet_returns import PlanetReturnIndex
+from tier1.result_model import LIFE_STAGES, ZODIAC_SIGNS, StateDay, Tier1Result
+from tier1.solar_terms import SolarTermIndex
+from tier1.sexagenary import SexagenaryCalculator
 # ▼▼▼ 追加1: 新しいエンジンのインポート ▼▼▼
 from tier1.oriental_engine import OrientalEngine
+import tracing
 
 class SolalendarTier1:
-    def __init__(self, name, year, month, day, hour=12, minute=0, lat=35.68, lon=139.76):
+    def __init__(self, name, year, month, day, hour=12, minute=0, lat=35.68, lon=139.76, house_system="placidus",
+                 tz=None):
         self.name = name
         self.year, self.month, self.day = year, month, day
         self.hour, self.minute = hour, minute
         self.lat, self.lon = lat, lon
+        # IANA タイムゾーン名。指定すると hour/minute を出生地の現地時刻として UT に変換する
+        # (None の場合は従来どおり UT として扱う)
+        self.tz = tz
         self.codec = Tier1Codec()
+        self.house_system = house_system
+
+    @classmethod
+    def at_place(cls, name, year, month, day, hour, minute, place, house_system="placidus"):
+        """出生地 (tier1.gazetteer.Place または地名) の緯度経度・タイムゾーンで作る"""
+        if isinstance(place, str):
+            resolved = Gazetteer.default().lookup(place)
+            if resolved is None:
+                raise ValueError(f"unknown place: {place!r}")
+            place = resolved
+        return cls(name, year, month, day, hour, minute, place.lat, place.lon, house_system, tz=place.tz)
+
+    ZODIAC_SIGNS = ZODIAC_SIGNS
 
     def _get_zodiac_sign(self, degree):
-        signs = [
-            "Aries (牡羊座)", "Taurus (牡牛座)", "Gemini (双子座)", "Cancer (蟹座)", 
-            "Leo (獅子座)", "Virgo (乙女座)", "Libra (天秤座)", "Scorpio (蠍座)", 
-            "Sagittarius (射手座)", "Capricorn (山羊座)", "Aquarius (水瓶座)", "Pisces (魚座)"
-        ]
-        return signs[int(degree / 30) % 12]
+        return self.ZODIAC_SIGNS[self._get_zodiac_index(degree)]
+
+    @staticmethod
+    def _get_zodiac_index(degree):
+        return int(degree / 30) % 12
 
     def _calculate_life_stage(self, age, lpn):
         """年齢と運命数(LPN)から、人生の4つの頂点（Pinnacles）を算出"""
+        return LIFE_STAGES[self._life_stage_phase(age, lpn) - 1]
+
+    @staticmethod
+    def _life_stage_phase(age, lpn):
         p1_end = 36 - lpn
         p2_end = p1_end + 9
         p3_end = p2_end + 9
         
         if age <= p1_end:
-            return {"phase": 1, "name": "Development (種まき)", "desc": "自我の形成と試行錯誤の時期"}
+            return 1
         elif age <= p2_end:
-            return {"phase": 2, "name": "Creation (開花)", "desc": "責任ある行動と建設の時期"}
+            return 2
         elif age <= p3_end:
-            return {"phase": 3, "name": "Expansion (収穫)", "desc": "影響力の拡大と成熟の時期"}
+            return 3
         else:
-            return {"phase": 4, "name": "Reflection (継承)", "desc": "智慧の統合と社会還元"}
+            return 4
 
-    def analyze(self):
-        # --- 基本計算 ---
-        jd = swe.julday(self.year, self.month, self.day, self.hour + self.minute/60.0)
-        now = datetime.now()
-        age = now.year - self.year - ((now.month, now.day) < (self.month, self.day))
+    @staticmethod
+    def _julday(y, m, d, hour, minute, tz=None):
+        """出生時刻のユリウス日 (UT)。tz があれば現地時刻から UTC オフセット (夏時間を含む) を引く"""
+        jd = swe.julday(y, m, d, hour + minute/60.0)
+        if tz:
+            jd -= Gazetteer.utc_offset(tz, y, m, d, hour, minute) / 24.0
+        return jd
+
+    def _birth_jd(self):
+        return self._julday(self.year, self.month, self.day, self.hour, self.minute, self.tz)
+
+    @staticmethod
+    def _returns_on(birth_jd, state_jd):
+        """(土星リターン中か, 木星リターン中か)。キャッシュしたイベント一覧の二分探索で判定する"""
+        events = PlanetReturnIndex.default().events(birth_jd)
+        return events.in_return("saturn", state_jd), events.in_return("jupiter", state_jd)
+
+    def return_events(self):
+        """出生時刻の木星・土星のイベント一覧 (tier1.planet_returns.ReturnEvents, 出生時刻ごとにキャッシュ)"""
+        jd = self._birth_jd()
+        return PlanetReturnIndex.default().events(jd)
+
+    def upcoming_events(self, start=None, days=3650, limit=None):
+        """start (既定は今日) から days 日以内の木星・土星のリターン・トランジット (ReturnEvent のリスト)"""
+        start = start or date.today()
+        jd = DailyEnvironment.for_date(start).state_jd - 0.5
+        return self.return_events().upcoming(jd, jd + days, limit=limit)
+
+    def analyze(self, now=None, env=None):
+        """解析結果を従来の入れ子 dict で返す (analyze_compact().to_dict())"""
+        return self.analyze_compact(now, env).to_dict()
+
+    def analyze_compact(self, now=None, env=None):
+        """
+        解析結果を整数コード中心の Tier1Result で返す (ラベルは参照時に共有テーブルから引く)
+        now: 基準日時 (date / datetime)。指定すると結果が再現できる (省略時は現在時刻)
+        env: その日の全員共通の環境 (tier1.environment.DailyEnvironment)。省略時は now の日付、
+             now も無ければプロセスで共有する今日のスナップショットを使う
+        """
+        # 計測が無効なら t は None (各レイヤー後の `if t:` 分岐だけで済む)
+        t = tracing.start("tier1.analyze")
+        if now is None:
+            now = datetime.now()
+            env = env or DailyEnvironment.today()
+        else:
+            if not isinstance(now, datetime):
+                now = datetime.combine(now, time())
+            env = env or DailyEnvironment.for_date(now.date())
+        today = env.date
+
+        # --- 基本計算 (L0: Kernel) ---
+        jd = self._birth_jd()
+        age = today.year - self.year - ((today.month, today.day) < (self.month, self.day))
+        # 生年月日時点の干支（Trait用）
+        birth_year_gz, birth_day_gz = OrientalEngine.get_sexagenary_codes(self.year, self.month, self.day)
+        if t: t.lap("L0.kernel")
 
         # --- Axis 1: Trait (本質) ---
         lpn_phase = self.codec.calculate_lpn(self.year, self.month, self.day)
-        trait_info = PYTHAGOREAN_LIBRARY.get(lpn_phase)
+        if t: t.lap("L1.codec_library")
 
         # L5: Ascendant
-        houses, ascmc = swe.houses(jd, self.lat, self.lon, b'P')
-        asc_sign = self._get_zodiac_sign(ascmc[0])
+        asc_sign = self._get_zodiac_index(HouseCalculator.for_system(self.house_system).ascendant(jd, self.lat, self.lon))
+        if t: t.lap("L5.skin")
 
         # --- Axis 2: State (状態) ---
-        current_phase = self.codec.calculate_phase(now.year, self.month, self.day)
-        state_info = PYTHAGOREAN_LIBRARY.get(current_phase)
-        
         # L2 (Infrastructure)
-        life_stage = self._calculate_life_stage(age, lpn_phase)
-        is_saturn_return = (28 <= age <= 30) or (58 <= age <= 60)
+        stage = self._life_stage_phase(age, lpn_phase)
+        is_saturn_return, is_jupiter_return = self._returns_on(jd, env.state_jd)
+        if t: t.lap("L2.infra")
 
-        # ▼▼▼ 追加2: 東洋・季節エンジンの計算実行 ▼▼▼
-        # 1. 生年月日時点の干支（Trait用）
-        birth_oriental = OrientalEngine.get_sexagenary_cycle(self.year, self.month, self.day)
-        
-        # 2. 現在時点の干支と季節（State用）
-        current_oriental = OrientalEngine.get_sexagenary_cycle(now.year, now.month, now.day)
-        current_solar_term = OrientalEngine.get_solar_term(now.year, now.month, now.day)
-        # ▲▲▲ ここまで ▲▲▲
+        # L3 (Environment): 今日の干支と季節は全員共通のスナップショットから
+        current_phase = self.codec.calculate_phase(today.year, self.month, self.day)
+        if t: t.lap("L3.env")
+
+        # L4 (Clock)
+        personal_month = self.codec.calculate_personal_month(today.year, today.month, self.month, self.day)
+        personal_day = self.codec.calculate_personal_day(today.year, today.month, today.day, self.month, self.day)
+        if t: t.lap("L4.clock")
+
+        timings = None
+        if t:
+            t.finish()
+            timings = t.timings()
+
+        return Tier1Result(
+            self.name, now, age,
+            jd, self.lat, self.lon, birth_year_gz, birth_day_gz, lpn_phase, asc_sign,
+            stage, is_saturn_return, is_jupiter_return, current_phase,
+            env.term_position, env.term_angle, env.sun_longitude, env.term_days_until,
+            env.year_gz, env.day_gz, personal_month, personal_day,
+            timings,
+        )
+
+    def houses(self):
+        """全カスプと感受点 (ASC / MC / Vertex) を返す (極圏では Porphyry にフォールバック)"""
+        jd = self._birth_jd()
+        cusps, ascmc, fallback = HouseCalculator.for_system(self.house_system).compute_one(jd, self.lat, self.lon)
+        return {"system": self.house_system, "cusps": list(cusps), "asc": ascmc[0], "mc": ascmc[1],
+                "vertex": ascmc[3], "fallback": fallback}
+
+    # ------------------------------------------------------------------
+    # Forecast (State Axis の日次系列)
+    # ------------------------------------------------------------------
+    def _age_on(self, y, m, d):
+        return y - self.year - ((m, d) < (self.month, self.day))
+
+    def forecast(self, start, end, step=1):
+        """
+        start 以上 end 未満の日付 (step 日おき) について State 軸 (L2-L4) を StateDay で順に返す。
+        1パスの漸化で計算する: 日干支は +step (mod 60)、節気は節入り時刻を跨いだときだけ進め、
+        年干支は節気が変わったとき、数秘の年・月の値は年・月が変わったときだけ計算し直す。
+        """
+        if step < 1:
+            raise ValueError("step must be >= 1")
+        index = SolarTermIndex.default()
+        tz = OrientalEngine.TZ_OFFSET_HOURS / 24.0
+        codec = self.codec
+        bm, bd = self.month, self.day
+        lpn_phase = codec.calculate_lpn(self.year, bm, bd)
+        events = self.return_events()
+
+        jdn = OrientalEngine.julian_day_number(start.year, start.month, start.day)
+        day_gz = (jdn - 11) % 60
+        day_step = timedelta(days=step)
+        year = month = position = None
+        current = start
+        while current < end:
+            y, m, d = current.year, current.month, current.day
+            # 数秘: 年・月が変わったときだけ年/月の値を計算し直す
+            if y != year:
+                year, month = y, None
+                current_phase = codec.calculate_phase(y, bm, bd)
+            if m != month:
+                month = m
+                personal_month = codec.calculate_personal_month(y, m, bm, bd)
+            personal_day = codec.calculate_personal_day(y, m, d, bm, bd)
+            age = self._age_on(y, m, d)
+
+            # 節気: 日付の終わり (翌日 0:00 JST) 時点で有効な節気。節入りを跨いだときだけ探し直す
+            day_start = jdn - 0.5 - tz
+            day_end = day_start + 1.0
+            if position is None or not index.start_jd(position) <= day_end < index.next_jd(position):
+                position = index.position(day_end)
+                # 年干支は立春 (節入り) でしか変わらない
+                year_gz = OrientalEngine.get_sexagenary_codes(y, m, d)[0]
+            if position is None:
+                # 暦表の範囲外
+                term_position, term_angle, sun_longitude, days_until = OrientalEngine.get_solar_term_code(y, m, d)
+            else:
+                term_position, term_angle = position, index.angle(position)
+                sun_longitude = index.longitude(position, day_start + 0.5)
+                days_until = int((index.next_jd(position) - day_start) // 1.0)
+
+            # L2: 木星・土星のリターン (その日の正午 JST。キャッシュしたイベント一覧の二分探索)
+            state_jd = jdn - tz
+            yield StateDay(
+                current, age, self._life_stage_phase(age, lpn_phase),
+                events.in_return("saturn", state_jd), events.in_return("jupiter", state_jd),
+                current_phase, term_position, term_angle, sun_longitude, days_until,
+                year_gz, day_gz, personal_month, personal_day,
+            )
+            current += day_step
+            jdn += step
+            day_gz = (day_gz + step) % 60
+
+    def forecast_columns(self, start, end, step=1):
+        """
+        forecast の列指向版。日付と State 軸の値を NumPy 配列の dict で返す (暦表の範囲内の日付のみ)。
+        """
+        dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"), step)
+        years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        days = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+        bm, bd = self.month, self.day
+
+        before_birthday = (months < bm) | ((months == bm) & (days < bd))
+        age = years - self.year - before_birthday
+        p1_end = 36 - self.codec.calculate_lpn(self.year, bm, bd)
+        stage = (1 + (age > p1_end).astype(np.int8) + (age > p1_end + 9) + (age > p1_end + 18)).astype(np.int8)
+
+        pillars = SexagenaryCalculator.default().pillars(years, months, days)
+        index = SolarTermIndex.default()
+        day_start = OrientalEngine.julian_day_number(years, months, days) - 0.5 - OrientalEngine.TZ_OFFSET_HOURS / 24.0
+        position = index.positions(day_start + 1.0)
+        if len(position) and (position[0] < 0 or position[-1] + 1 >= len(index.jd)):
+            raise ValueError(f"forecast range outside the solar term table ({index.start_year}-{index.end_year})")
+        term_start, term_end = index.jd[position], index.jd[position + 1]
+        term_angle = (index.FIRST_ANGLE + 15 * position) % 360
+        events = self.return_events()
+        state_jd = day_start + 0.5
+
+        return {
+            "date": dates,
+            "age": age,
+            "stage": stage,
+            "saturn_return": events.in_return_many("saturn", state_jd),
+            "jupiter_return": events.in_return_many("jupiter", state_jd),
+            "current_year_phase": Tier1Codec.calculate_phase_many(years, bm, bd),
+            "personal_month": Tier1Codec.calculate_personal_month_many(years, months, bm, bd),
+            "personal_day": Tier1Codec.calculate_personal_day_many(years, months, days, bm, bd),
+            "term_position": position,
+            "term_angle": term_angle,
+            "sun_longitude": (term_angle + 15.0 * (day_start + 0.5 - term_start) / (term_end - term_start)) % 360.0,
+            "term_days_until": ((term_end - day_start) // 1.0).astype(np.int64),
+            "year_ganzhi": pillars["year"],
+            "day_ganzhi": pillars["day"],
+        }
+
+    # ------------------------------------------------------------------
+    # Cohort Mode (Batch)
+    # ------------------------------------------------------------------
+    @classmethod
+    def analyze_many(cls, records, now=None, env=None):
+        """
+        analyze() のコホート版。
+        records は列指向の入力 (year/month/day は必須、hour/minute/lat/lon は省略可) で、
+        各列は同じ長さの配列。結果も列指向 (NumPy配列) で返す。
+        utc_offset (時間, 省略時 0) を渡すと hour/minute を現地時刻として UT に変換する
+        (出生地のタイムゾーンからは Gazetteer.utc_offset_many で求められる)。
+        "now" に依存する State 計算はバッチ全体で1回だけ行う (now / env は analyze_compact と同じ)。
+        """
+        if now is None:
+            now = datetime.now()
+            env = env or DailyEnvironment.today()
+        else:
+            if not isinstance(now, datetime):
+                now = datetime.combine(now, time())
+            env = env or DailyEnvironment.for_date(now.date())
+        today = env.date
+        years = np.asarray(records["year"], dtype=np.int64)
+        months = np.asarray(records["month"], dtype=np.int64)
+        days = np.asarray(records["day"], dtype=np.int64)
+        n = len(years)
+        hours = np.broadcast_to(np.asarray(records.get("hour", 12), dtype=np.float64), n)
+        minutes = np.broadcast_to(np.asarray(records.get("minute", 0), dtype=np.float64), n)
+        lats = np.broadcast_to(np.asarray(records.get("lat", 35.68), dtype=np.float64), n)
+        lons = np.broadcast_to(np.asarray(records.get("lon", 139.76), dtype=np.float64), n)
+        utc_offsets = np.broadcast_to(np.asarray(records.get("utc_offset", 0), dtype=np.float64), n)
+
+        # --- 基本計算 ---
+        jdn = OrientalEngine.julian_day_number(years, months, days)
+        jd = jdn - 0.5 + (hours + minutes / 60.0 - utc_offsets) / 24.0
+        before_birthday = (today.month < months) | ((today.month == months) & (today.day < days))
+        age = today.year - years - before_birthday
+
+        # --- Axis 1: Trait ---
+        lpn_phase = Tier1Codec.calculate_lpn_many(years, months, days)
+        asc_degree = cls._ascendant_many(jd, lats, lons)
+        asc_sign = (asc_degree // 30).astype(np.int8) % 12
+        birth_year_ganzhi, birth_day_ganzhi = OrientalEngine.get_sexagenary_indices(years, months, days)
+
+        # --- Axis 2: State ---
+        current_phase = Tier1Codec.calculate_phase_many(today.year, months, days)
+        personal_month = Tier1Codec.calculate_personal_month_many(today.year, today.month, months, days)
+        personal_day = Tier1Codec.calculate_personal_day_many(today.year, today.month, today.day, months, days)
+        p1_end = 36 - lpn_phase.astype(np.int64)
+        stage = (1 + (age > p1_end).astype(np.int8) + (age > p1_end + 9) + (age > p1_end + 18)).astype(np.int8)
+        # L2: 木星・土星のリターン (格子の補間で全員分をまとめて判定する)
+        returns = PlanetReturnIndex.default()
+        saturn_return = returns.in_return_many("saturn", jd, env.state_jd)
+        jupiter_return = returns.in_return_many("jupiter", jd, env.state_jd)
 
         return {
-            "metadata": {"name": self.name, "timestamp": now.isoformat(), "age": age},
-            
+            "metadata": {"timestamp": now.isoformat(), "count": n},
             "trait_axis": {
-                "layer_0_kernel": {"jdn": jd, "lat": self.lat, "lon": self.lon},
-                # ▼▼▼ 追加3: Traitデータの拡張 ▼▼▼
-                "layer_0_extended": {
-                    "birth_year_ganzhi": birth_oriental['year_ganzhi'],
-                    "birth_day_ganzhi": birth_oriental['day_ganzhi']
-                },
-                # ▲▲▲ ここまで ▲▲▲
-                "layer_1a_codec": {"lpn_phase": lpn_phase},
-                "layer_1b_library": trait_info,
-                "layer_5_skin": {"ascendant": asc_sign}
+                "jdn": jd,
+                "lpn_phase": lpn_phase,
+                "ascendant_degree": asc_degree,
+                "ascendant_sign": asc_sign,
+                "birth_year_ganzhi": birth_year_ganzhi,
+                "birth_day_ganzhi": birth_day_ganzhi,
             },
-            
             "state_axis": {
-                "layer_2_infra": {
-                    "stage": life_stage, 
-                    "saturn_return": is_saturn_return
-                },
-                # ▼▼▼ 追加4: Stateデータの拡張 (Layer 3 & 4) ▼▼▼
-                "layer_3_env": {
-                    "current_year_phase": current_phase,
-                    "solar_term": current_solar_term,    # 二十四節気
-                    "year_ganzhi": current_oriental['year_ganzhi'] # 年の干支
-                },
-                "layer_4_clock": {
-                    **state_info, # 既存の数秘データ(Label/Keywordなど)を展開
-                    "day_ganzhi": current_oriental['day_ganzhi'] # 日の干支
-                }
-                # ▲▲▲ ここまで ▲▲▲
-            }
-        }
\ No newline at end of file
+                "age": age,
+                "stage": stage,
+                "saturn_return": saturn_return,
+                "jupiter_return": jupiter_return,
+                "current_year_phase": current_phase,
+                "personal_month": personal_month,
+                "personal_day": personal_day,
+            },
+            # 全員に共通の State (L3/L4)
+            "environment": {
+                "solar_term": env.solar_term,
+                "year_ganzhi": env.year_ganzhi,
+                "day_ganzhi": env.day_ganzhi,
+            },
+        }
+
+    @staticmethod
+    def _ascendant_many(jd, lat, lon):
+        """
+        アセンダント黄経 (度) の配列計算。
+        ASC はハウス方式に依存しないので、視恒星時 (IAU 1982 + 章動主要項) と
+        真黄道傾斜角から閉形式で求める (swe.houses との差は 0.01度未満)。
+        """
+        d = jd - 2451545.0
+        t = d / 36525.0
+        gmst = 280.46061837 + 360.98564736629 * d + 0.000387933 * t * t - t ** 3 / 38710000.0
+
+        # 章動 (主要4項, 秒角)
+        omega = np.radians(125.04452 - 1934.136261 * t)
+        l_sun = np.radians(280.4665 + 36000.7698 * t)
+        l_moon = np.radians(218.3165 + 481267.8813 * t)
+        d_psi = -17.20 * np.sin(omega) - 1.32 * np.sin(2 * l_sun) - 0.23 * np.sin(2 * l_moon) + 0.21 * np.sin(2 * omega)
+        d_eps = 9.20 * np.cos(omega) + 0.57 * np.cos(2 * l_sun) + 0.10 * np.cos(2 * l_moon) - 0.09 * np.cos(2 * omega)
+        eps0 = 84381.448 - 46.8150 * t - 0.00059 * t * t + 0.001813 * t ** 3
+        eps = np.radians((eps0 + d_eps) / 3600.0)
+
+        armc = np.radians((gmst + d_psi * np.cos(eps) / 3600.0 + lon) % 360.0)
+        phi = np.radians(lat)
+        asc = np.degrees(np.arctan2(np.cos(armc), -(np.sin(armc) * np.cos(eps) + np.tan(phi) * np.sin(eps))))
+        return asc % 360.0
+
+
+class IncrementalTier1:
+    """
+    Tier 1 の差分再計算 (サイドバーで時刻だけ変えた場合など)
+    レイヤーを依存グラフ (tier1.layer_graph) として持ち、変わった入力に依存するレイヤーだけを
+    再計算する。例えば出生時刻の変更では jd と Ascendant だけが再計算され、LPN・干支・
+    State 軸は前回の値を再利用する。直近の内訳は last_report ({"recomputed", "reused"})。
+    """
+
+    INPUTS = ("year", "month", "day", "hour", "minute", "tz", "lat", "lon", "today")
+
+    def __init__(self, house_system="placidus"):
+        self.graph = self.build_graph(house_system)
+
+    @classmethod
+    def build_graph(cls, house_system="placidus"):
+        codec = Tier1Codec
+        houses = HouseCalculator.for_system(house_system)
+        graph = LayerGraph(cls.INPUTS)
+        # L0: Kernel
+        graph.node("jd", ("year", "month", "day", "hour", "minute", "tz"), SolalendarTier1._julday)
+        graph.node("birth_ganzhi", ("year", "month", "day"), OrientalEngine.get_sexagenary_codes)
+        graph.node("age", ("year", "month", "day", "today"),
+                   lambda y, m, d, today: today.year - y - ((today.month, today.day) < (m, d)))
+        # L1: Codec
+        graph.node("lpn", ("year", "month", "day"), codec.calculate_lpn)
+        # L5: Ascendant
+        graph.node("ascendant", ("jd", "lat", "lon"),
+                   lambda jd, lat, lon: SolalendarTier1._get_zodiac_index(houses.ascendant(jd, lat, lon)))
+        # L2: Infrastructure
+        graph.node("stage", ("age", "lpn"), SolalendarTier1._life_stage_phase)
+        # L3: Environment (今日だけに依存する。全員共通のスナップショットを共有する)
+        graph.node("env", ("today",), DailyEnvironment.for_date)
+        graph.node("returns", ("jd", "env"), lambda jd, env: SolalendarTier1._returns_on(jd, env.state_jd))
+        # L3/L4: 数秘の年・月・日
+        graph.node("clock", ("month", "day", "today"), lambda m, d, today: (
+            codec.calculate_phase(today.year, m, d),
+            codec.calculate_personal_month(today.year, today.month, m, d),
+            codec.calculate_personal_day(today.year, today.month, today.day, m, d),
+        ))
+        return graph
+
+    @property
+    def last_report(self):
+        return self.graph.last_report
+
+    def analyze_compact(self, name, year, month, day, hour=12, minute=0, lat=35.68, lon=139.76, now=None, tz=None):
+        """SolalendarTier1(...).analyze_compact() と同じ結果を、変わったレイヤーだけ再計算して返す"""
+        if now is None:
+            now = datetime.now()
+        elif not isinstance(now, datetime):
+            now = datetime.combine(now, time())
+        v, _ = self.graph.evaluate(year=year, month=month, day=day, hour=hour, minute=minute, tz=tz,
+                                   lat=lat, lon=lon, today=now.date())
+        env = v["env"]
+        current_phase, personal_month, personal_day = v["clock"]
+        return Tier1Result(
+            name, now, v["age"],
+            v["jd"], lat, lon, *v["birth_ganzhi"], v["lpn"], v["ascendant"],
+            v["stage"], *v["returns"], current_phase,
+            env.term_position, env.term_angle, env.sun_longitude, env.term_days_until,
+            env.year_gz, env.day_gz, personal_month, personal_day,
+        )
+
+    def analyze(self, *args, **kwargs):
+        """analyze_compact の従来 dict 版"""
+        return self.analyze_compact(*args, **kwargs).to_dict()
@@ -1,4 +1,9 @@
 # src/tier2_b5v.py
+import math
+
+from b5v.item_bank import BIGFIVE_ITEMS, VALS_ITEMS, VALS_TYPES
+from b5v.scoring import ScoringKey, vals_type_codes
+
 
 class SolalendarB5V:
     """
@@ -30,6 +35,9 @@ class SolalendarB5V:
                 {"id": "N2", "text": "プレッシャーがかかる状況でも、冷静でいられる", "score": -1}
             ]
         }
+        # 本診断 (BigFive 50問 / VALS) の質問票。採点は b5v.scoring でまとめて行う
+        self.bigfive_full_questions = BIGFIVE_ITEMS
+        self.vals_questions = VALS_ITEMS
 
     def calculate_bigfive(self, answers):
         """回答（1-5）を受け取り、各因子のスコア（0-100）を算出する"""
@@ -55,6 +63,36 @@ class SolalendarB5V:
             
         return scores
 
+    def calculate_bigfive_full(self, answers):
+        """
+        50問版の回答（1-5、未回答は省略可）から各因子のスコア（0-100）を算出する。
+        1問も回答のない因子は None（中央値 50 で埋めると「平均的」と区別できなくなるため）
+        """
+        key = ScoringKey.bigfive()
+        return self._factor_scores(key, self._score_one(key, answers))
+
+    def calculate_vals(self, answers):
+        """
+        VALS の回答から動機・リソースのスコアと8タイプの判定を返す。
+        未回答の因子は None、リソースか主要動機が未回答でタイプを決められない場合は type も None
+        """
+        key = ScoringKey.vals()
+        scores = self._score_one(key, answers)
+        code = int(vals_type_codes(scores, key.factors))
+        return {"scores": self._factor_scores(key, scores), "type": VALS_TYPES[code] if code >= 0 else None}
+
+    @staticmethod
+    def _score_one(key, answers):
+        """1人分の因子スコア (未回答の因子は NaN)。質問票の項目に1問も回答がなければ ValueError"""
+        responses = key.responses([answers])
+        if not responses.any():
+            raise ValueError("no answers for this questionnaire")
+        return key.score(responses)[0]
+
+    @staticmethod
+    def _factor_scores(key, scores):
+        return {factor: (None if math.isnan(score) else score) for factor, score in zip(key.factors, scores.tolist())}
+
     def get_tier1_prediction(self, tier1_data):
         """Tier 1の星座データから、BigFiveの傾向を予測する（仮説生成）"""
         # ここでは簡易的に「エレメント」から予測を作成
@@ -1,146 +1,158 @@
 import json
 import os
-from openai import OpenAI
+from llm.cache import cache_key
+from llm.client import chat_completion, run_sync
+from llm.singleflight import SingleFlight
+import tracing
+from tier2_rules import Tier2Rules
 
 # ---------------------------------------------------------
-# SYSTEM PROMPT v2.0 (Embedded)
+# SYSTEM PROMPT v3.0 (Embedded)
+# Phase 1 のエレメント割当・Phase 2・Phase 3 (Japan-VALS) は決定論的なので
+# tier2_rules でローカルに計算する。LLM には自由記述からの Big Five 推定だけを頼む。
 # ---------------------------------------------------------
-TIER2_SYSTEM_PROMPT = """
-# Role Definition
-You are the "Tier 2 Psychometric Engine" for Solalendar.
-Your goal is to deterministically map user input to the "Solalendar Tier 2 Structure" (Big Five & VALS).
-You must strictly follow the defined logic for elemental conversion and cultural adjustments.
-
-# Input Data Schema
-You will receive input in the following JSON format:
-1. [ANCHOR_DATA]:
-   - `curiosity_score` (int 1-5): Intellectual hunger.
-   - `confidence_score` (int 1-5): Self-efficacy.
-   - `action_score` (int 1-5): Impulse to act.
-   - `social_norm_flag` (boolean): Sensitivity to "Ryoshiki" (Social gaze/Reputation).
-   - `primary_driver` (string): "Ideals", "Achievement", or "Self-Expression".
-2. [FREE_TEXT]: User's journal text.
-
-# Inference Protocols (STRICTLY FOLLOW)
-
-## Phase 1: Big Five & Elemental Mapping
-Target: [FREE_TEXT]
-Method: Analyze linguistic features to score Big Five (0-100).
-Conversion Logic (Element Assignment):
-*Assign the "Dominant Element" based on the highest scoring trait cluster:*
-- **FIRE (Passion/Intuition)**: Correlates with High Extraversion (>60) AND High Openness (>60).
-- **EARTH (Sensation/Stability)**: Correlates with High Conscientiousness (>60) AND Low Openness (<50).
-- **AIR (Logic/Thinking)**: Correlates with Very High Openness (>70) AND Moderate/Low Neuroticism.
-- **WATER (Feeling/Emotion)**: Correlates with High Agreeableness (>60) OR High Neuroticism (>60).
-*If no clear peak exists, default to "Mutable (Mixed)".*
-
-## Phase 2: Resource Calculation (The Fuel)
-Target: [ANCHOR_DATA] ONLY.
-Formula:
-`Resource_Sum` = `curiosity_score` + `confidence_score` + `action_score` (Max 15)
-
-Thresholds:
-- **High Resources**: `Resource_Sum` >= 12
-- **Moderate Resources**: `Resource_Sum` between 8 and 11
-- **Low Resources**: `Resource_Sum` <= 7
-
-## Phase 3: Japan-VALS Type Determination (The Logic Tree)
-Combine [Phase 2 Resource] + [primary_driver] + [social_norm_flag].
-
-### Logic Branch A: High Resources (>=12)
-- Driver="Ideals" -> **Thinker** (Intellectual, Reflective)
-- Driver="Achievement" -> **Achiever** (Goal-oriented, Status-conscious)
-- Driver="Self-Expression" -> **Experiencer** (Active, Impulsive)
-*Note: If `Resource_Sum` is 15 (Max) -> Upgrade to **Innovator**.*
-
-### Logic Branch B: Moderate Resources (8-11)
-- Driver="Ideals" -> **Believer** (Conservative, Moral code)
-- Driver="Achievement" -> **Striver** (Approval seeking, Trendy)
-- Driver="Self-Expression" -> **Maker** (Practical, Constructive)
-
-### Logic Branch C: Low Resources (<=7) WITH Cultural Filter
-*CRITICAL JAPAN-VALS ADJUSTMENT:*
-- IF `social_norm_flag` is **TRUE** (High Ryoshiki):
-  - Do NOT classify as "Survivor". The user maintains social appearances.
-  - FORCE Classification -> **Believer** (Clinging to traditional values as safety).
-- IF `social_norm_flag` is **FALSE**:
-  - Classification -> **Survivor** (Focus on safety/needs, detached from society).
-
-# Output Format (JSON Only)
-Response must be a valid JSON object.
-
-{
-  "layer_6_behavior": {
-    "big_five_scores": {
-      "openness": 0-100,
-      "conscientiousness": 0-100,
-      "extraversion": 0-100,
-      "agreeableness": 0-100,
-      "neuroticism": 0-100
-    },
-    "dominant_element": "Fire/Earth/Air/Water/Mutable",
-    "element_reasoning": "Why this element was chosen based on the mapping logic."
-  },
-  "layer_7_motivation": {
-    "resource_score": (int),
-    "resource_level": "High/Moderate/Low",
-    "ryoshiki_filter_active": (boolean),
-    "vals_type": "Innovator/Thinker/Achiever/Experiencer/Believer/Striver/Maker/Survivor",
-    "diagnosis": "Brief explanation of how Resources + Driver + Ryoshiki determined this type."
-  }
-}
+TIER2_SYSTEM_PROMPT = """You are the Big Five rater of the Solalendar Tier 2 engine.
+Read the user's journal text (FREE_TEXT) and score each Big Five trait from its linguistic features (0-100, 50 = neutral).
+Respond with JSON only:
+{"openness": int, "conscientiousness": int, "extraversion": int, "agreeableness": int, "neuroticism": int}
 """
 
+# プロンプトを変更したら上げる (応答キャッシュのキーに含まれる)
+TIER2_PROMPT_VERSION = "3.0"
+
 class SolalendarTier2:
-    def __init__(self, api_key):
+    MODEL = "gpt-4o-mini" # Big Five の推定だけなので小さいモデルで足りる
+
+    def __init__(self, api_key, cache=None, coalesce=True):
         self.api_key = api_key
+        self.cache = cache # llm.cache.ResponseCache (None = キャッシュしない)
+        # 同じ自由記述の同時リクエストを1回の LLM 呼び出しに合流させる (プロセス共有)
+        self.flights = SingleFlight.default() if coalesce else None
         
-    def analyze(self, anchor_data, free_text):
+    def analyze(self, anchor_data, free_text, bypass_cache=False, bigfive_scores=None):
+        """
+        アンケート結果と自由記述から Tier 2 構造データを作る (analyze_async の同期ラッパー)。
+        layer_7_motivation とエレメント割当はローカルのルールで計算する。
+        bigfive_scores (SolalendarB5V の因子スコア) を渡した場合は LLM を呼ばない。
+        """
+        if bigfive_scores is not None or not self.api_key:
+            # LLM を呼ばない経路はイベントループを経由せずその場で計算する
+            with tracing.trace("tier2.analyze") as t:
+                result = self._analyze_local(anchor_data, bigfive_scores)
+            return tracing.with_timings(result, t)
+        return run_sync(self.analyze_async(anchor_data, free_text, bypass_cache, bigfive_scores))
+
+    async def analyze_async(self, anchor_data, free_text, bypass_cache=False, bigfive_scores=None):
         """
-        アンケート結果と自由記述をAIに送り、Tier 2構造データを取得する
+        analyze の非同期版。共有クライアント (llm.client) を使い、待ち時間中はスレッドを塞がない。
+        bypass_cache=True の場合はキャッシュを読まずに再生成する (結果は保存する)
         """
-        # APIキーがない場合はモック（ダミーデータ）を返す（エラー回避用）
-        if not self.api_key:
-            return self._get_mock_data()
+        with tracing.trace("tier2.analyze") as t:
+            if bigfive_scores is not None or not self.api_key:
+                result = self._analyze_local(anchor_data, bigfive_scores)
+            else:
+                result = await self._analyze(anchor_data, free_text, bypass_cache)
+        return tracing.with_timings(result, t)
+
+    def _analyze_local(self, anchor_data, bigfive_scores):
+        with tracing.span("tier2.rules"):
+            try:
+                motivation = Tier2Rules.motivation(anchor_data)
+                if bigfive_scores is None:
+                    # APIキーがない場合は Big Five だけモック（ダミーデータ）にする（エラー回避用）
+                    behavior = self._get_mock_data()["layer_6_behavior"]
+                else:
+                    behavior = Tier2Rules.behavior(bigfive_scores)
+            except (KeyError, TypeError, ValueError) as e:
+                return self._input_error(e)
+        return {"layer_6_behavior": behavior, "layer_7_motivation": motivation}
+
+    @staticmethod
+    def _input_error(e):
+        """アンケート・Big Five の入力不備 (項目の欠落・範囲外・未知の動機) を従来どおり error の dict で返す"""
+        detail = f"missing field: {e.args[0]}" if isinstance(e, KeyError) else str(e)
+        return {"error": f"Tier 2 input error: {detail}"}
+
+    async def _analyze(self, anchor_data, free_text, bypass_cache):
+        with tracing.span("tier2.rules"):
+            try:
+                motivation = Tier2Rules.motivation(anchor_data)
+            except (KeyError, TypeError, ValueError) as e:
+                return self._input_error(e)
+
+        if self.flights is None:
+            big_five = await self._infer_big_five(free_text, bypass_cache)
+        else:
+            flight_key = "tier2:" + cache_key(self.MODEL, TIER2_PROMPT_VERSION, {"FREE_TEXT": free_text})
+            with tracing.span("tier2.singleflight"):
+                big_five = await self.flights.do_async(flight_key, self._infer_big_five, free_text, bypass_cache)
+        if "error" in big_five:
+            return {"error": big_five["error"], "layer_7_motivation": motivation}
+        with tracing.span("tier2.rules"):
+            try:
+                behavior = Tier2Rules.behavior(big_five)
+            except (KeyError, TypeError, ValueError) as e:
+                return {"error": str(e), "layer_7_motivation": motivation}
+        return {"layer_6_behavior": behavior, "layer_7_motivation": motivation}
+
+    async def _infer_big_five(self, free_text, bypass_cache):
+        """自由記述 → {"openness": 0-100, ...} (LLM)。アンケート部分は渡さないのでキャッシュは本文だけで効く"""
+        payload = {"FREE_TEXT": free_text}
+        key = None
+        if self.cache is not None:
+            with tracing.span("tier2.cache_lookup"):
+                key = self.cache.key(self.MODEL, TIER2_PROMPT_VERSION, payload)
+                cached = None if bypass_cache else self._valid_big_five(self.cache.get(key))
+            if cached is not None:
+                return cached
 
         try:
-            client = OpenAI(api_key=self.api_key)
-            
             # AIへの入力データ構築
-            user_input_json = json.dumps({
-                "ANCHOR_DATA": anchor_data,
-                "FREE_TEXT": free_text
-            }, ensure_ascii=False)
-
-            response = client.chat.completions.create(
-                model="gpt-4o", # または gpt-3.5-turbo
-                messages=[
-                    {"role": "system", "content": TIER2_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_input_json}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2 # 決定論的にするため低めに設定
-            )
+            with tracing.span("tier2.prompt_build"):
+                user_input_json = json.dumps(payload, ensure_ascii=False)
+
+            with tracing.span("tier2.llm_call", model=self.MODEL) as s:
+                response = await chat_completion(
+                    self.api_key,
+                    model=self.MODEL,
+                    messages=[
+                        {"role": "system", "content": TIER2_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_input_json}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.2, # 決定論的にするため低めに設定
+                    max_tokens=200  # 5つの整数の JSON には十分 (冗長な応答でも途中で切れないように余裕を持たせる)
+                )
+                tracing.record_usage(s, response)
             
             result_json = response.choices[0].message.content
-            return json.loads(result_json)
+            # 形の崩れた応答はキャッシュせずにエラーとして返す (次の呼び出しで再生成される)
+            result = self._valid_big_five(json.loads(result_json))
+            if result is None:
+                return {"error": f"unexpected Big Five reply from the model: {result_json[:200]}"}
+            if key is not None:
+                self.cache.set(key, result)
+            return result
             
         except Exception as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def _valid_big_five(reply):
+        """LLM の応答 (またはキャッシュの値) を 5因子の数値 dict に揃える。形が違えば None"""
+        if not isinstance(reply, dict):
+            return None
+        try:
+            return Tier2Rules.normalize_big_five(reply)
+        except (TypeError, ValueError):
+            return None
+
     def _get_mock_data(self):
-        """APIキーがない場合のシミュレーションデータ"""
+        """APIキーがない場合のシミュレーションデータ (Big Five 部分)"""
         return {
             "layer_6_behavior": {
                 "big_five_scores": {"openness": 50, "conscientiousness": 50, "extraversion": 50, "agreeableness": 50, "neuroticism": 50},
                 "dominant_element": "Mutable (Mock)",
                 "element_reasoning": "No API Key provided. Running in simulation mode."
-            },
-            "layer_7_motivation": {
-                "resource_score": 0,
-                "resource_level": "Unknown",
-                "ryoshiki_filter_active": False,
-                "vals_type": "Unknown",
-                "diagnosis": "Please enter OpenAI API Key to activate the engine."
             }
-        }
\ No newline at end of file
+        }
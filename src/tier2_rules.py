@@ -0,0 +1,132 @@
+"""
+Tier 2 Rule Engine (local, deterministic)
+
+Tier 2 のうちルールで決まる部分 (旧 TIER2_SYSTEM_PROMPT v2.0 の Phase 1 のエレメント割当・
+Phase 2・Phase 3) をローカルで計算する。LLM に任せるのは自由記述からの Big Five 推定だけ。
+
+    Tier2Rules.motivation(anchor_data)   # layer_7_motivation (Phase 2 + 3)
+    Tier2Rules.behavior(big_five)        # layer_6_behavior (Phase 1 のエレメント割当)
+
+big_five は {"openness": 0-100, ...} (LLM の出力形式) でも
+{"Openness": 0-100, ...} (SolalendarB5V の出力形式) でもよい。
+"""
+
+BIG_FIVE_TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+ANCHOR_SCORES = ("curiosity_score", "confidence_score", "action_score")
+
+# Phase 2: Resource_Sum (3-15) の閾値
+RESOURCE_HIGH = 12
+RESOURCE_MODERATE = 8
+RESOURCE_MAX = 15
+
+# Phase 3: 動機 → (High, Moderate) のタイプ
+VALS_BRANCHES = {
+    "Ideals": ("Thinker", "Believer"),
+    "Achievement": ("Achiever", "Striver"),
+    "Self-Expression": ("Experiencer", "Maker"),
+}
+DRIVER_ALIASES = {"SelfExpression": "Self-Expression", "Self Expression": "Self-Expression"}
+
+
+class Tier2Rules:
+
+    # --- Phase 2: Resource ---
+    @staticmethod
+    def resource_level(resource_sum):
+        if resource_sum >= RESOURCE_HIGH:
+            return "High"
+        if resource_sum >= RESOURCE_MODERATE:
+            return "Moderate"
+        return "Low"
+
+    # --- Phase 3: Japan-VALS ---
+    @staticmethod
+    def vals_type(resource_sum, primary_driver, social_norm_flag):
+        """(vals_type, ryoshiki_filter_active) を返す"""
+        level = Tier2Rules.resource_level(resource_sum)
+        if level == "Low":
+            # 良識 (世間の目) を気にする場合は Survivor にせず Believer とする
+            return ("Believer", True) if social_norm_flag else ("Survivor", False)
+        if level == "High" and resource_sum >= RESOURCE_MAX:
+            return "Innovator", False
+        high, moderate = VALS_BRANCHES[primary_driver]
+        return (high if level == "High" else moderate), False
+
+    @staticmethod
+    def motivation(anchor_data):
+        """ANCHOR_DATA → layer_7_motivation"""
+        scores = []
+        for name in ANCHOR_SCORES:
+            value = int(anchor_data[name])
+            if not 1 <= value <= 5:
+                raise ValueError(f"{name} must be 1-5, got {value}")
+            scores.append(value)
+        driver = anchor_data["primary_driver"]
+        driver = DRIVER_ALIASES.get(driver, driver)
+        if driver not in VALS_BRANCHES:
+            raise ValueError(f"unknown primary_driver: {driver!r} (choose from {list(VALS_BRANCHES)})")
+        social_norm_flag = bool(anchor_data.get("social_norm_flag", False))
+
+        resource_sum = sum(scores)
+        level = Tier2Rules.resource_level(resource_sum)
+        vals_type, ryoshiki = Tier2Rules.vals_type(resource_sum, driver, social_norm_flag)
+        if ryoshiki:
+            diagnosis = (f"Resource_Sum={resource_sum} (Low) with social_norm_flag=True: "
+                         f"Ryoshiki filter keeps the user out of Survivor -> {vals_type}.")
+        elif vals_type in ("Innovator", "Survivor"):
+            diagnosis = f"Resource_Sum={resource_sum} ({level}) -> {vals_type} regardless of driver."
+        else:
+            diagnosis = f"Resource_Sum={resource_sum} ({level}) + Driver={driver} -> {vals_type}."
+        return {
+            "resource_score": resource_sum,
+            "resource_level": level,
+            "ryoshiki_filter_active": ryoshiki,
+            "vals_type": vals_type,
+            "diagnosis": diagnosis,
+        }
+
+    # --- Phase 1: Element ---
+    @staticmethod
+    def normalize_big_five(big_five):
+        """キーを小文字に揃え、5因子が揃っているか確認する"""
+        scores = {str(k).lower(): float(v) for k, v in big_five.items()}
+        missing = [t for t in BIG_FIVE_TRAITS if t not in scores]
+        if missing:
+            raise ValueError(f"missing Big Five scores: {missing}")
+        return {t: scores[t] for t in BIG_FIVE_TRAITS}
+
+    @staticmethod
+    def dominant_element(big_five):
+        """
+        (element, reasoning) を返す。条件を満たすエレメントが複数あるときは
+        そのクラスタの強さ (関係する因子スコアの平均) が最も高いものを選ぶ。
+        """
+        s = Tier2Rules.normalize_big_five(big_five)
+        o, c, e, a, n = (s[t] for t in BIG_FIVE_TRAITS)
+        candidates = []
+        if e > 60 and o > 60:
+            candidates.append(((e + o) / 2, "Fire", f"Extraversion {e:g} > 60 and Openness {o:g} > 60"))
+        if c > 60 and o < 50:
+            candidates.append(((c + 100 - o) / 2, "Earth", f"Conscientiousness {c:g} > 60 and Openness {o:g} < 50"))
+        if o > 70 and n <= 60:
+            candidates.append(((o + 100 - n) / 2, "Air", f"Openness {o:g} > 70 and Neuroticism {n:g} not high"))
+        if a > 60 or n > 60:
+            candidates.append((max(a, n), "Water", f"Agreeableness {a:g} or Neuroticism {n:g} > 60"))
+        if not candidates:
+            return "Mutable", "No trait cluster passes its threshold (no clear peak)."
+        strength, element, reason = max(candidates, key=lambda c: c[0])
+        if len(candidates) > 1:
+            others = ", ".join(c[1] for c in candidates if c[1] != element)
+            reason += f" (strongest cluster, {strength:g}; also matched {others})"
+        return element, reason + "."
+
+    @staticmethod
+    def behavior(big_five):
+        """Big Five スコア → layer_6_behavior"""
+        scores = Tier2Rules.normalize_big_five(big_five)
+        element, reasoning = Tier2Rules.dominant_element(scores)
+        return {
+            "big_five_scores": {t: round(v) for t, v in scores.items()},
+            "dominant_element": element,
+            "element_reasoning": reasoning,
+        }
@@ -0,0 +1,157 @@
+"""
+Tier 3 Bulk Runner (JSONL in → JSONL out)
+
+    python tier3_batch.py records.jsonl results.jsonl --concurrency 32 --rpm 500 --tpm 200000
+
+入力は1行1レコード: {"id": "...", "tier1": {...}, "tier2": {...}}  (id 省略時は行番号)
+出力は1行1結果:     {"id": "...", "result": {...}}
+
+結果は1件ごとに追記・flush する。出力ファイル自体がチェックポイントで、
+再実行すると出力済みの id をスキップして続きから処理する
+(強制終了で途中まで書かれた最終行は切り捨てる)。
+1件の処理が例外で失敗しても {"id": "...", "error": "..."} を書いて次へ進む。
+--retry-errors で再実行するときは、エラー行を出力ファイルから取り除いてから処理し直すので
+1つの id の行は常に1つだけになる。
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from llm import client as llm_client
+from llm.rate_limit import RateLimiter
+from tier3_engine import SolalendarTier3
+
+# 応答側のトークン数の見積もり (tpm 制限の予約用)
+COMPLETION_TOKENS_ESTIMATE = 600
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield str(record.get("id", line_no)), record
+
+
+def load_checkpoint(path, retry_errors=False):
+    """
+    出力済みの id を返す。途中で途切れた最終行があればファイルを切り詰める。
+    retry_errors=True の場合、エラーで終わったレコードは未完了として扱い、
+    その行を出力ファイルから取り除く (再処理の結果と id が重複しないように)。
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good_size = 0
+    kept, dropped = [], False
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                row = json.loads(raw)
+            except ValueError:
+                break
+            good_size += len(raw)
+            if retry_errors and is_error_row(row):
+                done.discard(row["id"])
+                dropped = True
+            else:
+                done.add(row["id"])
+                kept.append(raw)
+    if retry_errors and dropped:
+        # 一時ファイルに書いてから置き換える (途中で落ちても元のファイルは壊れない)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.writelines(raw for raw in kept if json.loads(raw)["id"] in done)
+        os.replace(tmp_path, path)
+    elif good_size != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_size)
+    return done
+
+
+def is_error_row(row):
+    """処理中の例外の行 ({"id", "error"}) と、エラーを返した結果の行の両方"""
+    return "error" in row or "error" in row.get("result", {})
+
+
+def estimate_tokens(engine, record):
+    prompt = engine.build_prompt(record["tier1"], record["tier2"])
+    return prompt.tokens["total"] + COMPLETION_TOKENS_ESTIMATE
+
+
+async def run_job(input_path, output_path, api_key, concurrency=16, rpm=None, tpm=None,
+                  retry_errors=False, cache=None, progress_every=100):
+    """ジョブを実行して統計 (processed / skipped / errors / elapsed) を返す"""
+    done = load_checkpoint(output_path, retry_errors)
+    engine = SolalendarTier3(api_key, cache=cache)
+    limiter = RateLimiter(rpm, tpm)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {"processed": 0, "skipped": 0, "errors": 0}
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                record_id, record = item
+                try:
+                    await limiter.acquire(estimate_tokens(engine, record))
+                    row = {"id": record_id,
+                           "result": await engine.integrate_async(record["tier1"], record["tier2"])}
+                except Exception as e:
+                    # 1件の失敗でワーカーが止まると queue.put が詰まってジョブ全体が止まるので、
+                    # エラー行を書いて次のレコードへ進む
+                    row = {"id": record_id, "error": f"{type(e).__name__}: {e}"}
+                # 書き込みはイベントループ上で行われるので行が混ざることはない
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["processed"] += 1
+                stats["errors"] += is_error_row(row)
+                if progress_every and stats["processed"] % progress_every == 0:
+                    rate = stats["processed"] / (time.monotonic() - started)
+                    print(f"[tier3_batch] {stats['processed']} done ({rate:.1f} rec/s, {stats['errors']} errors)",
+                          file=sys.stderr)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for record_id, record in read_records(input_path):
+            if record_id in done:
+                stats["skipped"] += 1
+                continue
+            await queue.put((record_id, record))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    stats["elapsed"] = time.monotonic() - started
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable bulk Tier 3 integration (JSONL in, JSONL out)")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", ""))
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (e.g. a local stub server)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rpm", type=float, help="max requests per minute")
+    parser.add_argument("--tpm", type=float, help="max tokens per minute")
+    parser.add_argument("--retry-errors", action="store_true", help="re-run records whose result was an error")
+    args = parser.parse_args(argv)
+
+    llm_client.configure(max_concurrency=max(args.concurrency, llm_client.MAX_CONCURRENCY), base_url=args.base_url)
+    stats = asyncio.run(run_job(args.input, args.output, args.api_key, args.concurrency,
+                                args.rpm, args.tpm, args.retry_errors))
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
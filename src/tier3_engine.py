@@ -1,102 +1,258 @@
-import openai
 import json
-import streamlit as st
+from llm.cache import cache_key
+from llm.client import chat_completion, chat_completion_stream, iterate_sync, run_sync
+from llm.prompt import PromptBuilder, compact
+from llm.singleflight import FlightAbandoned, SingleFlight
+from llm.streaming import IncrementalJSONParser
+import tracing
+
+# プロンプトを変更したら上げる (応答キャッシュのキーに含まれる)
+TIER3_PROMPT_VERSION = "2.1"
+
+# 入力トークンの上限 (超えたら Tier 2 の記述を切り詰める)
+TIER3_TOKEN_BUDGET = 2000
+
+
+# ペルソナ・入力の読み方・出力スキーマは全リクエスト共通の固定文字列 (呼び出しごとに組み立てない)。
+# 先頭がバイト単位で毎回同じになるので、プロバイダ側のプロンプトキャッシュが再利用できる
+TIER3_SYSTEM_PROMPT = """You are 'The System Administrator of Fate' (Solalendar Core).
+Your mission is to eliminate user anxiety by explaining the structural relationship between their innate specs (Trait), their current environment (State), and their observed behavior (Tier 2).
+
+Analyze the gap between:
+1. Inner Core (What they are) vs Outer Mask (How they appear)
+2. Life Stage (Long-term goal) vs Current Year Mode (Short-term task)
+
+Input (key=value): TRAIT core=Inner Core (L1: label/keyword/element), mask=Outer Mask (L5: first impression/social interface); STATE stage=Life Stage (L2), saturn_return=true means crisis/re-structuring, jupiter_return=true means expansion/new opportunity, year=Current Year Mode (L4: label/keyword); TIER2 = observed behavior.
+
+Output ONLY valid JSON:
+{"gap_analysis": {"tier1_element": "Primary Element of L1 (e.g. Air, Water)", "tier2_element": "Inferred Element of L2 behavior", "relationship_type": "Conflict / Harmony / Complement / Suppression", "stress_level": "High / Medium / Low"}, "wisdom_message": {"headline": "A short, poetic, and reassuring title (Japanese)", "narrative": "Empathetic explanation of their current situation. Explain why they might feel conflict between their inner self, social mask, and current life stage. (Japanese)", "actionable_advice": "One concrete, philosophical yet practical action to align their path. (Japanese)"}}"""
+
+# Tier 2 の結果のうちプロンプトに載せないキー
+_TIER2_SKIP = ("metadata", "timestamp")
+
+
+def _label(info, *fields):
+    """ラベル辞書のエントリ → "label/keyword/element" (無い項目は省く)"""
+    info = info or {}
+    return "/".join(str(info[f]) for f in fields if info.get(f)) or "Unknown"
+
 
 class SolalendarTier3:
-    def __init__(self, api_key):
-        self.client = openai.OpenAI(api_key=api_key)
+    MODEL = "gpt-4o-mini"
 
-    def integrate(self, tier1_data, tier2_result):
-        """
-        Tier 1 (Trait/State Axis) + Tier 2 (Action) -> Tier 3 Wisdom
-        """
-        
+    _prompt_builder = PromptBuilder(TIER3_SYSTEM_PROMPT, budget=TIER3_TOKEN_BUDGET)
+
+    def __init__(self, api_key, cache=None, coalesce=True):
+        self.api_key = api_key
+        self.cache = cache # llm.cache.ResponseCache (None = キャッシュしない)
+        # 同じ入力の同時リクエストを1回の LLM 呼び出しに合流させる (プロセス共有)
+        self.flights = SingleFlight.default() if coalesce else None
+
+    def _request_key(self, tier1_data, tier2_result):
+        """入力の正準ハッシュ (metadata の解析時刻などはプロンプトに使わないので除外する)"""
+        return cache_key(self.MODEL, TIER3_PROMPT_VERSION, {
+            "trait_axis": tier1_data.get('trait_axis', {}),
+            "state_axis": tier1_data.get('state_axis', {}),
+            # プロンプトと同じ射影 (保存時刻などを除いた compact 表現) をキーにする
+            "tier2": self._tier2_text(tier2_result)
+        })
+
+    @staticmethod
+    def _tier2_text(tier2_result):
+        """プロンプトに載せる Tier 2 の部分 (metadata / timestamp は除く)"""
+        return compact(tier2_result, skip=_TIER2_SKIP) if isinstance(tier2_result, dict) else str(tier2_result)
+
+    def _cache_key(self, tier1_data, tier2_result):
+        """応答キャッシュのキー"""
+        if self.cache is None:
+            return None
+        return self._request_key(tier1_data, tier2_result)
+
+    def build_prompt(self, tier1_data, tier2_result):
+        """Tier 1 / Tier 2 のデータから llm.prompt.Prompt (system / user / セクション別トークン数) を作る"""
         # --- 1. Tier 1 データの解凍 (New Axis Structure) ---
-        # 安全にデータを取り出す
         t_axis = tier1_data.get('trait_axis', {})
         s_axis = tier1_data.get('state_axis', {})
-        
+
         # [Trait Axis] 本質的なスペック
-        l1_bios = t_axis.get('layer_1b_library', {})
-        l5_skin = t_axis.get('layer_5_skin', {})
-        
-        trait_desc = (
-            f"Inner Core (L1): {l1_bios.get('label', 'Unknown')} "
-            f"[Keywords: {l1_bios.get('keyword', '')} / Element: {l1_bios.get('element', '')}]\n"
-            f"Outer Mask (L5): {l5_skin.get('ascendant', 'Unknown')} "
-            f"(First Impression/Social Interface)"
-        )
+        mask = (t_axis.get('layer_5_skin') or {}).get('ascendant', 'Unknown')
+        trait = f"core={_label(t_axis.get('layer_1b_library'), 'label', 'keyword', 'element')} mask={mask}"
 
         # [State Axis] 現在の環境・時期
-        l2_infra = s_axis.get('layer_2_infra', {})
-        l4_runtime = s_axis.get('layer_4_clock', {})
-        
-        life_stage_info = l2_infra.get('stage', {})
-        saturn_status = "ACTIVE (Crisis/Re-structuring)" if l2_infra.get('saturn_return') else "Inactive (Normal Orbit)"
-        
-        state_desc = (
-            f"Life Stage (L2): Phase {life_stage_info.get('phase', '?')} - {life_stage_info.get('name', 'Unknown')}\n"
-            f"   > Context: {life_stage_info.get('desc', '')}\n"
-            f"   > Saturn Return: {saturn_status}\n"
-            f"Current Year Mode (L4): {l4_runtime.get('label', 'Unknown')} "
-            f"[Theme: {l4_runtime.get('keyword', '')}]"
-        )
+        l2_infra = s_axis.get('layer_2_infra') or {}
+        stage = _label(l2_infra.get('stage'), 'phase', 'name', 'desc')
+        saturn = "true" if l2_infra.get('saturn_return') else "false"
+        jupiter = "true" if l2_infra.get('jupiter_return') else "false"
+        state = (f"stage={stage} saturn_return={saturn} jupiter_return={jupiter} "
+                 f"year={_label(s_axis.get('layer_4_clock'), 'label', 'keyword')}")
 
         # --- 2. Tier 2 データの解凍 (Behavior) ---
-        # Tier 2の結果を要約テキストとして整形
-        tier2_summary = "Tier 2 Analysis Result: " + str(tier2_result)
-
-        # --- 3. Prompt Engineering ---
-        # システム管理者としてのペルソナ定義
-        system_prompt = """
-        You are 'The System Administrator of Fate' (Solalendar Core). 
-        Your mission is to eliminate user anxiety by explaining the structural relationship between their innate specs (Trait), their current environment (State), and their observed behavior (Tier 2).
-
-        Analyze the gap between:
-        1. Inner Core (What they are) vs Outer Mask (How they appear)
-        2. Life Stage (Long-term goal) vs Current Year Mode (Short-term task)
-        
-        Output ONLY valid JSON:
-        {
-            "gap_analysis": {
-                "tier1_element": "Primary Element of L1 (e.g. Air, Water)",
-                "tier2_element": "Inferred Element of L2 behavior",
-                "relationship_type": "Conflict / Harmony / Complement / Suppression",
-                "stress_level": "High / Medium / Low"
-            },
-            "wisdom_message": {
-                "headline": "A short, poetic, and reassuring title (Japanese)",
-                "narrative": "Empathetic explanation of their current situation. Explain why they might feel conflict between their inner self, social mask, and current life stage. (Japanese)",
-                "actionable_advice": "One concrete, philosophical yet practical action to align their path. (Japanese)"
-            }
-        }
+        tier2 = self._tier2_text(tier2_result)
+
+        # --- 3. Prompt ---
+        return self._prompt_builder.build([
+            ("TRAIT", trait, False),
+            ("STATE", state, False),
+            ("TIER2", tier2, True),
+        ], footer="Generate the integration report.")
+
+    def _build_prompts(self, tier1_data, tier2_result):
+        """Tier 1 / Tier 2 のデータから (system_prompt, user_prompt) を組み立てる"""
+        prompt = self.build_prompt(tier1_data, tier2_result)
+        return prompt.system, prompt.user
+
+    def integrate(self, tier1_data, tier2_result, bypass_cache=False):
+        """
+        Tier 1 (Trait/State Axis) + Tier 2 (Action) -> Tier 3 Wisdom
+        (integrate_async の同期ラッパー)
         """
+        return run_sync(self.integrate_async(tier1_data, tier2_result, bypass_cache))
 
-        user_prompt = f"""
-        # SYSTEM DIAGNOSTICS REQUEST
-        
-        ## [UNIT: TRAIT AXIS (Immutable Specs)]
-        {trait_desc}
-        
-        ## [ENV: STATE AXIS (Current Variables)]
-        {state_desc}
-        
-        ## [LOG: TIER 2 BEHAVIOR (Observed)]
-        {tier2_summary}
-        
-        Generate the integration report.
+    async def integrate_async(self, tier1_data, tier2_result, bypass_cache=False):
         """
+        integrate の非同期版。共有クライアント (llm.client) を使い、待ち時間中はスレッドを塞がない。
+        bypass_cache=True の場合はキャッシュを読まずに再生成する (結果は保存する)
+        """
+        with tracing.trace("tier3.integrate") as t:
+            result = await self._integrate(tier1_data, tier2_result, bypass_cache)
+        return tracing.with_timings(result, t)
+
+    async def _integrate(self, tier1_data, tier2_result, bypass_cache):
+        with tracing.span("tier3.cache_lookup"):
+            key = self._cache_key(tier1_data, tier2_result)
+            cached = self.cache.get(key) if key is not None and not bypass_cache else None
+        if cached is not None:
+            return cached
+
+        if self.flights is None:
+            return await self._generate(tier1_data, tier2_result, key)
+        flight_key = "tier3:" + (key or self._request_key(tier1_data, tier2_result))
+        with tracing.span("tier3.singleflight"):
+            return await self.flights.do_async(flight_key, self._generate, tier1_data, tier2_result, key)
 
-        # --- 4. Call LLM ---
+    async def _generate(self, tier1_data, tier2_result, key):
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            return json.loads(response.choices[0].message.content)
+            # 予算超過 (ValueError) や入力の形の不備もエラーの dict で返す
+            with tracing.span("tier3.prompt_build") as s:
+                prompt = self.build_prompt(tier1_data, tier2_result)
+                s.set(**{f"prompt_tokens.{name}": n for name, n in prompt.tokens.items()})
+
+            # --- 4. Call LLM ---
+            with tracing.span("tier3.llm_call", model=self.MODEL) as s:
+                response = await chat_completion(
+                    self.api_key,
+                    model=self.MODEL,
+                    messages=prompt.messages(),
+                    response_format={"type": "json_object"}
+                )
+                tracing.record_usage(s, response)
+            result = json.loads(response.choices[0].message.content)
+            if key is not None:
+                self.cache.set(key, result)
+            return result
         except Exception as e:
-            return {"error": f"Tier 3 Integration Error: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Tier 3 Integration Error: {str(e)}"}
+
+    def integrate_stream(self, tier1_data, tier2_result, bypass_cache=False):
+        """integrate_stream_async の同期版 (Streamlit などスレッドベースの呼び出し元用)"""
+        return iterate_sync(self.integrate_stream_async(tier1_data, tier2_result, bypass_cache))
+
+    async def integrate_stream_async(self, tier1_data, tier2_result, bypass_cache=False):
+        """
+        integrate のストリーミング版。
+        応答をトークン単位で受け取りながら JSON を逐次パースし、
+        フィールドが確定するたびに (path, value) を返す
+        (例: (("wisdom_message", "headline"), "..."))。
+        最後に path = () で完全な結果 (またはエラー) を返す。
+
+        計測は lap 方式 (tracing.start)。yield をまたいで span の context manager を開いたままにすると、
+        iterate_sync では1ステップごとに別のタスク (= 別のコンテキスト) で再開されるため。
+        """
+        t = tracing.start("tier3.integrate_stream")
+        try:
+            async for path, value in self._integrate_stream(tier1_data, tier2_result, bypass_cache, t):
+                if path == () and t:
+                    t.finish()
+                    value = tracing.with_timings(value, t)
+                    t = None
+                yield path, value
+        finally:
+            if t:
+                t.finish()  # 呼び出し側が途中で読むのをやめた場合
+
+    async def _integrate_stream(self, tier1_data, tier2_result, bypass_cache, t):
+        key = self._cache_key(tier1_data, tier2_result)
+        cached = self.cache.get(key) if key is not None and not bypass_cache else None
+        if t:
+            t.lap("tier3.cache_lookup", hit=cached is not None)
+        if cached is None and self.flights is not None:
+            # 同じ入力のストリームが実行中ならその完了を待って結果を共有する
+            flight_key = "tier3:" + (key or self._request_key(tier1_data, tier2_result))
+            future, leader = self.flights.acquire(flight_key)
+            if leader:
+                async for item in self._stream_leader(tier1_data, tier2_result, key, flight_key, future, t):
+                    yield item
+                return
+            try:
+                cached = await SingleFlight.wait_async(future)
+            except FlightAbandoned:
+                pass  # 先行のストリームが途中で止まった場合は自前で生成する
+            if t:
+                t.lap("tier3.singleflight")
+        if cached is not None:
+            for section, fields in cached.items():
+                for field, value in (fields.items() if isinstance(fields, dict) else []):
+                    yield (section, field), value
+            yield (), cached
+            return
+
+        async for item in self._stream(tier1_data, tier2_result, key, t):
+            yield item
+
+    async def _stream_leader(self, tier1_data, tier2_result, key, flight_key, future, t=None):
+        """_stream を実行し、最後の完全な結果を合流したフォロワーに渡す"""
+        result = None
+        try:
+            async for path, value in self._stream(tier1_data, tier2_result, key, t):
+                if path == ():
+                    result = value
+                yield path, value
+        finally:
+            # 呼び出し側が途中で読むのをやめた場合 (result なし) はフォロワーにやり直させる
+            if result is not None:
+                self.flights.release(flight_key, future, result)
+            else:
+                self.flights.abandon(flight_key, future)
+
+    async def _stream(self, tier1_data, tier2_result, key, t=None):
+        """t は lap 方式の計測 (tracing.start の戻り値、無効時は None)"""
+        parser = IncrementalJSONParser()
+        usage = {}
+        try:
+            prompt = self.build_prompt(tier1_data, tier2_result)
+            if t:
+                t.lap("tier3.prompt_build", **{f"prompt_tokens.{name}": n for name, n in prompt.tokens.items()})
+            async for delta in chat_completion_stream(
+                self.api_key,
+                on_usage=lambda chunk: usage.update(prompt_tokens=chunk.usage.prompt_tokens,
+                                                    completion_tokens=chunk.usage.completion_tokens,
+                                                    total_tokens=chunk.usage.total_tokens),
+                model=self.MODEL,
+                messages=prompt.messages(),
+                response_format={"type": "json_object"},
+                stream_options={"include_usage": True}
+            ):
+                for path, value in parser.feed(delta):
+                    yield path, value
+            result = parser.result()
+            if t:
+                t.lap("tier3.llm_call", model=self.MODEL, **usage)
+        except Exception as e:
+            if t:
+                t.lap("tier3.llm_call", model=self.MODEL, error=repr(e))
+            yield (), {"error": f"Tier 3 Integration Error: {str(e)}"}
+            return
+
+        if key is not None:
+            self.cache.set(key, result)
+        yield (), result
\ No newline at end of file
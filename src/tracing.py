@@ -0,0 +1,237 @@
+"""
+Per-layer timing / tracing (opt-in)
+
+    import tracing
+    tracing.enable(tracing.LogExporter())          # ログ1行/スパン
+    collector = tracing.InMemoryCollector()        # OpenTelemetry 形式でプロセス内に蓄積
+    tracing.enable(collector)
+
+計測の書き方は2通り:
+- `with tracing.trace("tier3.integrate"):` / `with tracing.span("tier3.llm_call") as s:`
+  (非同期処理やネストに対応。無効時は共有の no-op オブジェクトが返る)
+- `t = tracing.start("tier1.analyze")` → 各レイヤーの後で `if t: t.lap("L0.kernel")` → `t.finish()`
+  (マイクロ秒単位のホットパス用。無効時は start() が None を返すだけで、分岐1回分のコストしかない)
+"""
+import contextvars
+import logging
+import os
+import time
+
+ENABLED = False
+_exporters = []
+_current = contextvars.ContextVar("solalendar_span", default=None)
+
+
+def enable(*exporters):
+    """計測を有効にし、エクスポーターを登録する (エクスポーター無しでも metadata.timings は付く)"""
+    global ENABLED
+    _exporters.extend(exporters)
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+    _exporters.clear()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def timings(self):
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "trace", "parent", "span_id", "attributes", "start_ns", "wall_start_ns",
+                 "duration_ns", "_lap_ns", "_token")
+
+    def __init__(self, trace, name, parent, attributes):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.span_id = os.urandom(8).hex()
+        self.attributes = attributes
+        self.duration_ns = 0
+        self._token = None
+
+    def begin(self):
+        self.wall_start_ns = time.time_ns()
+        self.start_ns = self._lap_ns = time.perf_counter_ns()
+        return self
+
+    def finish(self):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        self.trace.spans.append(self)
+
+    def lap(self, name, **attributes):
+        """直前の lap (または開始) から現在までを子スパン name として記録する"""
+        now = time.perf_counter_ns()
+        child = Span(self.trace, name, self, attributes)
+        child.start_ns = self._lap_ns
+        child.wall_start_ns = self.wall_start_ns + (self._lap_ns - self.start_ns)
+        child.duration_ns = now - self._lap_ns
+        self.trace.spans.append(child)
+        self._lap_ns = now
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes["error"] = repr(exc)
+        _current.reset(self._token)
+        self.finish()
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self):
+        return self.duration_ns / 1e6
+
+    def timings(self):
+        """{子スパン名: ミリ秒} と "total" (このスパン自身)"""
+        result = {span.name: round(span.duration_ms, 4) for span in self.trace.spans if span.parent is self}
+        result["total"] = round(self.duration_ms, 4)
+        return result
+
+
+class Trace(Span):
+    """1リクエスト分のルートスパン。終了時に配下のスパンをエクスポーターへ渡す。"""
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, name, attributes):
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        super().__init__(self, name, None, attributes)
+
+    def finish(self):
+        super().finish()
+        for exporter in _exporters:
+            exporter.export(self)
+
+
+def _new_span(name, attributes):
+    parent = _current.get()
+    if parent is not None:
+        return Span(parent.trace, name, parent, attributes)
+    return Trace(name, attributes)
+
+
+def trace(name, **attributes):
+    """リクエスト全体を計測する context manager。既に計測中ならその子スパンになる。"""
+    if not ENABLED:
+        return _NOOP
+    return _new_span(name, attributes)
+
+
+def start(name, **attributes):
+    """lap() 方式の計測を開始する。無効時は None (呼び出し側は `if t:` で分岐する)"""
+    if not ENABLED:
+        return None
+    return _new_span(name, attributes).begin()
+
+
+def span(name, **attributes):
+    """計測中のリクエスト内のスパン (計測中でなければ no-op)"""
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.trace, name, parent, attributes)
+
+
+def with_timings(result, span):
+    """計測中なら result のコピーに metadata.timings を付けて返す (キャッシュ済みの dict は書き換えない)"""
+    timings = span.timings()
+    if not timings or not isinstance(result, dict):
+        return result
+    return {**result, "metadata": {**result.get("metadata", {}), "timings": timings}}
+
+
+def record_usage(span, response):
+    """LLM 応答の usage (トークン数) をスパンの属性に記録する"""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens,
+                 total_tokens=usage.total_tokens)
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+class LogExporter:
+    """1スパン = 1ログ行"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("solalendar.trace")
+        self.level = level
+
+    def export(self, trace):
+        for span in trace.spans:
+            attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            self.logger.log(self.level, "trace=%s span=%s duration_ms=%.3f %s",
+                            trace.trace_id, span.name, span.duration_ms, attrs)
+
+
+def to_otel_dict(trace, span):
+    """OpenTelemetry (OTLP/JSON) のスパン表現"""
+    return {
+        "traceId": trace.trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent.span_id if span.parent is not None else "",
+        "name": span.name,
+        "startTimeUnixNano": span.wall_start_ns,
+        "endTimeUnixNano": span.wall_start_ns + span.duration_ns,
+        "attributes": dict(span.attributes),
+    }
+
+
+class InMemoryCollector:
+    """プロセス内コレクター。スパンを OTLP 形式の dict で保持する (上限を超えたら古い順に捨てる)"""
+
+    def __init__(self, max_spans=10_000):
+        self.max_spans = max_spans
+        self.spans = []
+
+    def export(self, trace):
+        self.spans.extend(to_otel_dict(trace, span) for span in trace.spans)
+        if len(self.spans) > self.max_spans:
+            del self.spans[:len(self.spans) - self.max_spans]
+
+    def clear(self):
+        self.spans.clear()
+
+
+class OpenTelemetryExporter:
+    """opentelemetry-api がある環境で、記録済みのスパンを OTel の Tracer に流し直す"""
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace as otel_trace
+
+        self._otel = otel_trace
+        self.tracer = tracer or otel_trace.get_tracer("solalendar")
+
+    def export(self, trace):
+        started = {}
+        # 親が先に開始されるよう開始時刻順に作る
+        for span in sorted(trace.spans, key=lambda s: s.start_ns):
+            parent = started.get(id(span.parent)) if span.parent is not None else None
+            context = self._otel.set_span_in_context(parent) if parent is not None else None
+            otel_span = self.tracer.start_span(span.name, context=context, start_time=span.wall_start_ns,
+                                               attributes=span.attributes)
+            started[id(span)] = otel_span
+        for span in trace.spans:
+            started[id(span)].end(end_time=span.wall_start_ns + span.duration_ns)